@@ -236,9 +236,12 @@ class ActivationManager:
             app.settings_menu.entryconfig(1, state=tk.DISABLED)  # 导出目录设置
             app.settings_menu.entryconfig(2, state=tk.DISABLED)  # 提示框设置
             app.settings_menu.entryconfig(3, state=tk.DISABLED)  # 日志窗口
+            app.settings_menu.entryconfig(4, state=tk.DISABLED)  # 文件夹监视设置
+            app.file_operations.stop_watching()
             
-            # 禁用文件菜单中的导出图表
+            # 禁用文件菜单中的导出图表和基金筛选
             file_menu.entryconfig("导出图表", state=tk.DISABLED)
+            file_menu.entryconfig("基金筛选", state=tk.DISABLED)
             
             # 禁用自定义分析按钮
             app.components["btn_custom"].config(state=tk.DISABLED)
@@ -259,10 +262,12 @@ class ActivationManager:
             app.settings_menu.entryconfig(1, state=tk.NORMAL)
             app.settings_menu.entryconfig(2, state=tk.NORMAL)
             app.settings_menu.entryconfig(3, state=tk.NORMAL)
+            app.settings_menu.entryconfig(4, state=tk.NORMAL)
             
             # 启用文件菜单中的导出图表（如果有数据）
-            if app.df is not None and len(app.df) > 0:
+            if app.nav_series is not None and len(app.nav_series) > 0:
                 file_menu.entryconfig("导出图表", state=tk.NORMAL)
+            file_menu.entryconfig("基金筛选", state=tk.NORMAL)
             
             # 启用自定义分析按钮
             app.components["btn_custom"].config(state=tk.NORMAL)
@@ -270,7 +275,7 @@ class ActivationManager:
             app.components["btn_reset_app"].config(state=tk.NORMAL)
             
             # 启用日期输入框（如果有数据）
-            if app.df is not None and len(app.df) > 0:
+            if app.nav_series is not None and len(app.nav_series) > 0:
                 app.components["start_entry"].config(state=tk.NORMAL)
                 app.components["end_entry"].config(state=tk.NORMAL)
             else:
@@ -1,10 +1,8 @@
 # analysis_operations.py
 import os
 import tkinter as tk
-import pandas as pd
-from tkinter import Tk, ttk, filedialog, messagebox
+from tkinter import ttk, filedialog
 from datetime import datetime
-from core import PerformanceAnalysis
 from utils import normalize_date_string
 from tooltip import ToolTip
 
@@ -15,8 +13,10 @@ class AnalysisOperations:
 
     def reset_application(self):
         """重置应用程序"""
-        self.app.df = None
-        self.app.full_view_data = None
+        self.app.nav_series = None
+        self.app.session = None
+        self.app.current_file = None
+        self.app.import_state = None
         self.app.current_plot_data = None  # 重置当前图表数据
 
         # 清空Max/Min数据
@@ -62,6 +62,7 @@ class AnalysisOperations:
         menu = self.app.root.nametowidget(".!menu")
         file_menu = menu.winfo_children()[0]  # 文件菜单是第一个
         file_menu.entryconfig("导出图表", state=tk.DISABLED)
+        file_menu.entryconfig("刷新数据", state=tk.DISABLED)
 
         self.app.components["btn_custom"].config(state=tk.DISABLED)
         self.app.components["btn_reset"].config(state=tk.DISABLED)
@@ -80,7 +81,7 @@ class AnalysisOperations:
 
     def calculate_fixed_freq(self):
         """计算固定周期的业绩指标，并更新到界面上"""
-        if self.app.df is None or len(self.app.df) == 0:
+        if self.app.session is None or len(self.app.session) == 0:
             # 数据为空时，保持 / 占位符
             return
 
@@ -89,8 +90,7 @@ class AnalysisOperations:
         for item in self.app.components["result_tree"].get_children():
             self.app.components["result_tree"].delete(item)
 
-        performance_analyzer = PerformanceAnalysis(self.app.df, self.app.log)
-        results = performance_analyzer.calculate_fixed_freq()
+        results = self.app.session.calculate_fixed_freq()
 
         if not results:
             self.app.log("数据天数不足，无法计算固定周期业绩", "warning")
@@ -111,7 +111,7 @@ class AnalysisOperations:
             self.show_custom_message("警告", "软件未激活，无法使用此功能")
             return
             
-        if self.app.df is None or len(self.app.df) == 0:
+        if self.app.nav_series is None or len(self.app.nav_series) == 0:
             self.show_custom_message("警告", "请先导入数据文件！")
             self.app.log("自定义分析失败: 无数据", "warning")
             return
@@ -140,9 +140,9 @@ class AnalysisOperations:
             end_date = datetime.strptime(self.app.components["end_entry"].get(), "%Y-%m-%d")
             
             # 检查日期是否在数据范围内
-            if self.app.df is not None and len(self.app.df) > 0:
-                min_data_date = self.app.df['日期'].min()
-                max_data_date = self.app.df['日期'].max()
+            if self.app.session is not None and len(self.app.session) > 0:
+                min_data_date = self.app.session.first_date
+                max_data_date = self.app.session.last_date
                 
                 if start_date < min_data_date or start_date > max_data_date:
                     self.show_custom_message("错误", f"开始日期必须在数据日期范围内: {min_data_date.strftime('%Y-%m-%d')} 至 {max_data_date.strftime('%Y-%m-%d')}")
@@ -156,8 +156,7 @@ class AnalysisOperations:
 
             self.app.log(f"开始自定义分析: {self.app.components['start_entry'].get()} 至 {self.app.components['end_entry'].get()}", "info")
 
-            performance_analyzer = PerformanceAnalysis(self.app.df, self.app.log)
-            result = performance_analyzer.calculate_custom_range(start_date, end_date)
+            result = self.app.session.calculate_custom_range(start_date, end_date)
 
             if result is None:
                 return
@@ -191,13 +190,12 @@ class AnalysisOperations:
             self.show_custom_message("警告", "软件未激活，无法使用此功能")
             return
             
-        if self.app.df is None or self.app.full_view_data is None:
+        if self.app.session is None or self.app.nav_series is None:
             return
 
-        self.app.df = self.app.full_view_data.copy()
-
-        min_date = self.app.df['日期'].min().date()
-        max_date = self.app.df['日期'].max().date()
+        # 数据自导入后未变化，直接复用会话，无需复制数据
+        min_date = self.app.session.first_date.date()
+        max_date = self.app.session.last_date.date()
 
         self.app.components["start_entry"].config(state='normal')
         self.app.components["start_entry"].delete(0, tk.END)
@@ -226,175 +224,32 @@ class AnalysisOperations:
 
     def analyze_performance(self, start_date=None, end_date=None):
         """分析业绩并生成图表"""
-        if self.app.df is None or len(self.app.df) == 0:
+        if self.app.session is None or len(self.app.session) == 0:
             return
 
-        self.app.ax.clear()
-
-        performance_analyzer = PerformanceAnalysis(self.app.df, self.app.log)
         df_plot, self.app.chart_title, self.app.current_start_date, self.app.current_end_date = \
-            performance_analyzer.prepare_chart_data(start_date, end_date)
-
-        # 存储当前显示的图表数据，用于悬停事件
-        self.app.current_plot_data = df_plot.copy()
-
-        # 每次绘制新图表前，清除旧的悬停标注对象和标记
-        if self.app.chart_utils.hover_line_x:
-            try:
-                self.app.chart_utils.hover_line_x.remove()
-            except:
-                pass
-            self.app.chart_utils.hover_line_x = None
-
-        if self.app.chart_utils.hover_line_y:
-            try:
-                self.app.chart_utils.hover_line_y.remove()
-            except:
-                pass
-            self.app.chart_utils.hover_line_y = None
+            self.app.session.prepare_chart_data(start_date, end_date)
 
-        if self.app.chart_utils.hover_marker:
-            try:
-                self.app.chart_utils.hover_marker.remove()
-            except:
-                pass
-            self.app.chart_utils.hover_marker = None
+        # 存储当前显示的图表数据（共享序列的零拷贝视图）及其横坐标，用于悬停事件
+        self.app.chart_utils.set_plot_data(df_plot)
 
-        if self.app.chart_utils.hover_text_obj:
-            try:
-                self.app.chart_utils.hover_text_obj.remove()
-            except:
-                pass
-            self.app.chart_utils.hover_text_obj = None
+        min_idx = int(df_plot.navs.argmin())
+        max_idx = int(df_plot.navs.argmax())
 
-        # 每次重绘图表，都清空并重新绘制 Max/Min 文本和标记
-        if self.app.chart_utils.max_min_text_obj:
-            for text_obj in self.app.chart_utils.max_min_text_obj:
-                try:
-                    text_obj.remove()
-                except:
-                    pass
-            self.app.chart_utils.max_min_text_obj = []
-
-        unit_color = self.config.colors["chart_line"]
-
-        self.app.ax.plot(
-            df_plot['日期'],
-            df_plot['单位净值'],
-            color=unit_color,
-            linestyle='-',
-            linewidth=1.0
-        )
+        self.app.min_date_str = df_plot.date_at(min_idx).strftime("%y/%m/%d")
+        self.app.min_value = df_plot.navs[min_idx]
+        self.app.max_date_str = df_plot.date_at(max_idx).strftime("%y/%m/%d")
+        self.app.max_value = df_plot.navs[max_idx]
 
-        min_idx = df_plot['单位净值'].idxmin()
-        max_idx = df_plot['单位净值'].idxmax()
-
-        self.app.min_date_str = df_plot.loc[min_idx, '日期'].strftime("%y/%m/%d")
-        self.app.min_value = df_plot.loc[min_idx, '单位净值']
-        self.app.max_date_str = df_plot.loc[max_idx, '日期'].strftime("%y/%m/%d")
-        self.app.max_value = df_plot.loc[max_idx, '单位净值']
-
-        self.app.ax.plot(
-            df_plot.loc[max_idx, '日期'],
-            self.app.max_value,
-            marker='o',
-            markersize=6,
-            markerfacecolor='none',
-            markeredgecolor=self.config.colors["max_color"],
-            markeredgewidth=1.5,
-            linestyle='',
-            zorder=10
-        )
+        # 只更新常驻的曲线、Max/Min 标记和文本框以及坐标轴范围，不清空重建图表
+        lod_indices = self.app.chart_utils.update_chart(df_plot, max_idx, min_idx)
+        if lod_indices is not None:
+            self.app.log(f"绘图数据已抽稀: {len(df_plot)} -> {len(lod_indices)} 个点", "info")
 
-        self.app.ax.plot(
-            df_plot.loc[min_idx, '日期'],
-            self.app.min_value,
-            marker='o',
-            markersize=6,
-            markerfacecolor='none',
-            markeredgecolor=self.config.colors["min_color"],
-            markeredgewidth=1.5,
-            linestyle='',
-            zorder=10
-        )
-
-        # 检查是否显示文本框
-        if self.config.get("show_textbox", True):
-            # 根据配置设置Max/Min文本框位置
-            position = self.config.get("max_min_position")
-            alpha = self.config.get("textbox_alpha")
-
-            # 调整Max/Min文本框位置，避免重叠
-            if position == "top-left":
-                max_x, max_y = 0.02, 0.95
-                min_x, min_y = 0.02, 0.85
-                max_ha, max_va = 'left', 'top'
-                min_ha, min_va = 'left', 'top'
-            elif position == "top-right":
-                max_x, max_y = 0.98, 0.95
-                min_x, min_y = 0.98, 0.85
-                max_ha, max_va = 'right', 'top'
-                min_ha, min_va = 'right', 'top'
-            elif position == "bottom-left":
-                max_x, max_y = 0.02, 0.15
-                min_x, min_y = 0.02, 0.05
-                max_ha, max_va = 'left', 'bottom'
-                min_ha, min_va = 'left', 'bottom'
-            elif position == "bottom-right":
-                max_x, max_y = 0.98, 0.15
-                min_x, min_y = 0.98, 0.05
-                max_ha, max_va = 'right', 'bottom'
-                min_ha, min_va = 'right', 'bottom'
-
-            # 修正：统一文本格式以保证框体大小一致，保持左对齐
-            max_text = f'Max: {self.app.max_value: >8.4f} ({self.app.max_date_str})'
-            min_text = f'Min: {self.app.min_value: >8.4f} ({self.app.min_date_str})'
-
-            max_text_obj = self.app.ax.text(
-                max_x, max_y,
-                max_text,
-                transform=self.app.ax.transAxes,
-                fontsize=8,
-                color=self.config.colors["max_color"],
-                bbox=dict(
-                    boxstyle="round,pad=0.3",  # 减小内边距
-                    fc="white",
-                    ec="none",
-                    lw=0,
-                    alpha=alpha
-                ),
-                ha=max_ha,
-                va=max_va,
-                zorder=10
-            )
-
-            min_text_obj = self.app.ax.text(
-                min_x, min_y,
-                min_text,
-                transform=self.app.ax.transAxes,
-                fontsize=8,
-                color=self.config.colors["min_color"],
-                bbox=dict(
-                    boxstyle="round,pad=0.3",  # 减小内边距
-                    fc="white",
-                    ec="none",
-                    lw=0,
-                    alpha=alpha
-                ),
-                ha=min_ha,
-                va=min_va,
-                zorder=10
-            )
-            self.app.chart_utils.max_min_text_obj = [max_text_obj, min_text_obj]
-
-        # 设置图表格式
-        self.app.chart_utils.setup_chart_formatting(df_plot)
-
-        # 如果有悬停日期设置，重新添加悬停标记
+        # 如果有悬停日期设置，把悬停标记移到新区间中的对应位置
         if self.config.get("show_hover_data") and self.config.get("hover_date"):
             self.app.chart_utils.update_chart_with_hover_date()
 
-        self.app.canvas.draw()
         self.app.log("净值趋势图生成完成", "success")
 
     def export_chart(self):
@@ -430,52 +285,18 @@ class AnalysisOperations:
         file_path = os.path.join(export_dir, filename)
 
         try:
-            # 如果启用了悬停数据显示，添加悬停数据
+            # 如果启用了悬停数据显示，导出时临时显示悬停日期标记（不添加文本）
+            hover_date = None
             if self.config.get("show_hover_data") and self.config.get("hover_date"):
                 try:
                     hover_date = datetime.strptime(self.config.get("hover_date"), "%Y-%m-%d")
-                    if self.app.current_plot_data is not None:
-                        # 找到最接近的日期
-                        closest_idx = self.app.current_plot_data['日期'].sub(hover_date).abs().idxmin()
-                        closest_row = self.app.current_plot_data.loc[closest_idx]
-                        nav = closest_row['单位净值']
-                        date = closest_row['日期']
-
-                        # 添加悬停十字线但不添加文本
-                        self.app.ax.axvline(
-                            x=date,
-                            color=self.config.colors["chart_hover"],
-                            linestyle='--',
-                            linewidth=1,
-                            alpha=0.5,
-                            zorder=5
-                        )
-
-                        self.app.ax.axhline(
-                            y=nav,
-                            color=self.config.colors["chart_hover"],
-                            linestyle='--',
-                            linewidth=1,
-                            alpha=0.5,
-                            zorder=5
-                        )
-
-                        # 添加空心圆标记
-                        self.app.ax.plot(
-                            date,
-                            nav,
-                            marker='o',
-                            markersize=5,
-                            markerfacecolor='none',
-                            markeredgecolor=self.config.colors["chart_hover"],
-                            markeredgewidth=1.5,
-                            linestyle='',
-                            zorder=10
-                        )
                 except ValueError:
                     self.app.log("悬停日期格式无效，将不显示悬停数据", "warning")
 
-            self.app.figure.savefig(file_path, dpi=300, bbox_inches='tight')
+            # 导出分辨率高于屏幕，使用全部数据点绘制
+            with self.app.chart_utils.hover_date_markers_shown(hover_date), \
+                    self.app.chart_utils.full_resolution():
+                self.app.figure.savefig(file_path, dpi=300, bbox_inches='tight')
             self.app.log(f"图表已导出: {file_path}", "success")
         except Exception as e:
             self.show_custom_message("错误", f"保存图表时出错:\n{str(e)}")
@@ -487,7 +308,7 @@ class AnalysisOperations:
             self.show_custom_message("警告", "软件未激活，无法使用此功能")
             return
             
-        if self.app.df is None or len(self.app.df) == 0:
+        if self.app.nav_series is None or len(self.app.nav_series) == 0:
             self.show_custom_message("警告", "请先导入数据文件！")
             self.app.log("设置导出图表失败: 无数据", "warning")
             return
@@ -538,9 +359,9 @@ class AnalysisOperations:
                 hover_date = datetime.strptime(normalized_date, "%Y-%m-%d")
 
                 # 检查日期是否在数据范围内
-                if self.app.df is not None and len(self.app.df) > 0:
-                    min_date = self.app.df['日期'].min()
-                    max_date = self.app.df['日期'].max()
+                if self.app.session is not None and len(self.app.session) > 0:
+                    min_date = self.app.session.first_date
+                    max_date = self.app.session.last_date
                     if hover_date < min_date or hover_date > max_date:
                         # 显示错误提示 - 修改为200x130大小
                         error_window = tk.Toplevel(settings_window)
@@ -618,7 +439,7 @@ class AnalysisOperations:
                 # 清除悬停日期标记并重新绘制图表
                 self.app.chart_utils.remove_hover_date_marker()
                 # 重新绘制图表以确保交叉线被清除
-                if self.app.df is not None and len(self.app.df) > 0:
+                if self.app.nav_series is not None and len(self.app.nav_series) > 0:
                     self.app.analyze_performance()
             settings_window.destroy()
             self.app.log("导出图表设置已保存", "success")
@@ -734,6 +555,64 @@ class AnalysisOperations:
         # 初始显示状态
         toggle_directory_options()
 
+    def set_watch_settings(self):
+        """设置文件夹监视：监视目录中当前数据文件更新时自动增量刷新"""
+        if not self.app.is_activated:
+            self.show_custom_message("警告", "软件未激活，无法使用此功能")
+            return
+
+        settings_window = tk.Toplevel(self.app.root)
+        settings_window.title("文件夹监视设置")
+        settings_window.geometry("220x160")
+        settings_window.resizable(False, False)
+        settings_window.transient(self.app.root)
+        settings_window.grab_set()
+        settings_window.configure(bg=self.config.colors["background"])
+
+        # 设置窗口居中显示
+        self.app.center_window_relative(settings_window, self.app.root)
+
+        main_frame = ttk.Frame(settings_window, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # 按钮框架 - 提前定义
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(20, 0))
+
+        watch_var = tk.BooleanVar(value=self.config.get("watch_enabled", False))
+        selected_dir = tk.StringVar(value=self.config.get("watch_directory", ""))
+
+        def browse_directory():
+            directory = filedialog.askdirectory(initialdir=selected_dir.get() or os.getcwd())
+            if directory:
+                selected_dir.set(directory)
+                browse_button.tooltip.update_text(directory)
+
+        ttk.Checkbutton(main_frame, text="启用文件夹监视", variable=watch_var).pack(anchor=tk.W, pady=(5, 0))
+
+        dir_frame = ttk.Frame(main_frame)
+        dir_frame.pack(fill=tk.X, pady=(5, 0))
+        browse_button = ttk.Button(dir_frame, text="选择目录", command=browse_directory, width=10)
+        browse_button.pack(side=tk.LEFT, padx=(20, 5))
+        browse_button.tooltip = ToolTip(browse_button, selected_dir.get() or "未选择目录")
+
+        def save_settings():
+            if watch_var.get() and not selected_dir.get():
+                self.show_custom_message("警告", "请先选择监视目录")
+                return
+            self.config.settings["watch_directory"] = selected_dir.get()
+            self.config.set("watch_enabled", watch_var.get())
+            settings_window.destroy()
+            self.app.file_operations.start_watching()
+            if not watch_var.get():
+                self.app.log("文件夹监视已关闭", "success")
+
+        def cancel_settings():
+            settings_window.destroy()
+
+        ttk.Button(button_frame, text="确定", command=save_settings, width=10).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="取消", command=cancel_settings, width=10).pack(side=tk.RIGHT)
+
     def set_textbox_settings(self):
         """设置提示框位置"""
         if not self.app.is_activated:
@@ -810,7 +689,7 @@ class AnalysisOperations:
             self.app.log("提示框设置已保存", "success")
 
             # 重新绘制图表以应用新设置
-            if self.app.df is not None and len(self.app.df) > 0:
+            if self.app.nav_series is not None and len(self.app.nav_series) > 0:
                 self.app.analyze_performance()
 
         def cancel_settings():
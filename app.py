@@ -17,6 +17,8 @@ from core import PerformanceAnalysis
 from utils import setup_fonts, normalize_date_string, detect_file_type, read_csv_file, read_excel_file, log_to_text_widget, cleanup_exit, log_message, OPEN_WINDOWS, MAX_WINDOWS
 from gui_components import create_menu_bar, create_main_interface, create_log_window
 from config import Config
+from result_cache import ResultCache
+from parse_cache import ParseCache
 from tooltip import ToolTip
 from chart_utils import ChartUtils
 from event_handlers import EventHandlers
@@ -24,6 +26,7 @@ from window_utils import WindowUtils
 from activation import ActivationManager
 from file_operations import FileOperations
 from analysis_operations import AnalysisOperations
+from screening_window import ScreeningWindow
 
 # 辅助函数：处理打包后的路径
 def resource_path(relative_path):
@@ -111,9 +114,18 @@ class PerformanceBacktestTool:
         self.activation_manager = ActivationManager()
         self.is_activated = self.activation_manager.check_activation()
 
-        self.df = None
+        self.nav_series = None  # 导入后全局共享的净值序列
+        self.session = None  # 导入数据后创建的分析会话
+        self.current_file = None  # 当前数据文件路径，供刷新使用
+        self.import_state = None  # CSV 增量导入状态
+        # 分析结果缓存，按数据指纹区分，重复导入同一份数据时也可复用
+        self.result_cache = ResultCache(self.config.get("result_cache_size", 64))
+        # 清洗后数组的磁盘缓存，重复导入同一文件时跳过解析
+        if self.config.get("parse_cache_enabled", True):
+            self.parse_cache = ParseCache.from_config(self.config)
+        else:
+            self.parse_cache = None
         self.chart_title = "净值趋势图"
-        self.full_view_data = None
         self.current_start_date = None
         self.current_end_date = None
         self.current_plot_data = None  # 存储当前显示的图表数据
@@ -212,9 +224,11 @@ class PerformanceBacktestTool:
         self.window_utils = WindowUtils(self)
         self.file_operations = FileOperations(self)
         self.analysis_operations = AnalysisOperations(self)
+        self.screening_window = ScreeningWindow(self)
 
         self.canvas.mpl_connect('motion_notify_event', self.chart_utils.on_hover)
         self.canvas.mpl_connect('axes_leave_event', self.chart_utils.on_leave)
+        self.canvas.mpl_connect('draw_event', self.chart_utils.on_draw)
 
         setup_fonts()
         self.chart_utils.initialize_chart()
@@ -229,7 +243,7 @@ class PerformanceBacktestTool:
         self.activation_manager.update_activation_status(self)
         
         # 初始化按钮状态
-        if self.df is None or len(self.df) == 0:
+        if self.nav_series is None or len(self.nav_series) == 0:
             self.components["btn_custom"].config(state=tk.DISABLED)
             self.components["btn_reset"].config(state=tk.DISABLED)
         
@@ -255,6 +269,10 @@ class PerformanceBacktestTool:
         else:
             self.log("软件已激活，请导入文件开始使用", "success")
         self.log("rizona.cn@gmail.com", "success")
+
+        # 按配置启动文件夹监视（需已激活）
+        if self.is_activated:
+            self.file_operations.start_watching()
         
     def fix_initial_layout(self):
         """修复初始布局问题"""
@@ -357,6 +375,9 @@ class PerformanceBacktestTool:
     def import_data(self):
         self.file_operations.import_data()
 
+    def refresh_data(self):
+        self.file_operations.refresh_data()
+
     def calculate_fixed_freq(self):
         """计算固定周期的业绩指标，并更新到界面上"""
         self.analysis_operations.calculate_fixed_freq()
@@ -373,6 +394,13 @@ class PerformanceBacktestTool:
     def export_chart(self):
         self.analysis_operations.export_chart()
 
+    def show_screening(self):
+        """打开基金筛选窗口"""
+        if not self.is_activated:
+            self.analysis_operations.show_custom_message("警告", "软件未激活，无法使用此功能")
+            return
+        self.screening_window.show()
+
     def clear_log_text(self):
         """清空日志内容"""
         for log_text in self.log_texts.values():
@@ -388,6 +416,10 @@ class PerformanceBacktestTool:
         """设置导出目录"""
         self.analysis_operations.set_export_directory()
 
+    def set_watch_settings(self):
+        """设置文件夹监视"""
+        self.analysis_operations.set_watch_settings()
+
     def set_textbox_settings(self):
         """设置提示框位置"""
         self.analysis_operations.set_textbox_settings()
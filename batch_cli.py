@@ -0,0 +1,206 @@
+# batch_cli.py
+"""无界面批量回测
+
+用法:
+    python batch_cli.py data/*.csv 产品目录 -o results.csv
+    python batch_cli.py 产品目录 --start 2023-01-01 --end 2023-12-31 -o results.parquet --workers 8
+    python batch_cli.py 产品目录 --store 净值库目录
+
+对每个文件计算固定周期业绩（可选自定义区间），结果写为 CSV / JSON / Parquet；
+各文件耗时写入 <输出名>.timings.csv，失败的文件及原因写入 <输出名>.failures.json。
+指定 --store 时解析后的序列同时写入净值库（基金 ID 为文件名去掉扩展名），供筛选窗口等读取。
+不导入 tkinter，可在服务器上运行。
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from core import AnalysisSession
+from import_pipeline import parse_nav_file, ImportFailed
+from nav_store import NavStore
+from folder_watcher import WATCH_EXTENSIONS
+from utils import log_message
+
+OUTPUT_FORMATS = ('csv', 'json', 'parquet')
+
+def collect_files(patterns):
+    """展开通配符和目录，返回 (去重后按名称排序的数据文件列表, 不存在或没有匹配文件的输入列表)"""
+    files, missing = [], []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+            matches = [path for path in matches if path.lower().endswith(WATCH_EXTENSIONS)]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+            if not matches:
+                missing.append(pattern)
+        for path in matches:
+            path = os.path.abspath(path)
+            if os.path.isfile(path) and path not in files:
+                files.append(path)
+    return sorted(files), missing
+
+def fund_id_for(file_path):
+    """净值库中的基金 ID：文件名去掉扩展名"""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+def backtest_file(file_path, start_date=None, end_date=None, store_dir=None):
+    """在工作进程中回测一个文件，返回 (结果行列表, 耗时字典, 警告列表, 净值库条目)；失败时抛出异常
+
+    结果中的天数、年化收益和最大回撤（正数）均为数值，数据不足的周期为 NaN。
+
+    指定 store_dir 时把解析后的序列写入净值库的数组文件，索引由主进程统一登记；否则条目为 None。
+    """
+    warnings = []
+
+    def log(message, message_type="info"):
+        if message_type in ("warning", "error"):
+            warnings.append(message)
+
+    t0 = time.perf_counter()
+    series, _ = parse_nav_file(file_path, log)
+    t1 = time.perf_counter()
+
+    store_entry = None
+    if store_dir is not None:
+        store_entry = NavStore(store_dir).write_series(fund_id_for(file_path), series)
+
+    session = AnalysisSession(series, log)
+    name = os.path.basename(file_path)
+    rows = [{
+        'file': name,
+        'period': period,
+        'days': days,
+        'annual_return': annual_return,
+        'max_drawdown': max_drawdown
+    } for period, days, annual_return, max_drawdown in session.fixed_freq_values()]
+
+    if start_date is not None and end_date is not None:
+        result = session.calculate_custom_range(start_date, end_date)
+        if result is not None:
+            rows.append({
+                'file': name,
+                'period': f"{result['actual_start_date'].date()} 至 {result['actual_end_date'].date()}",
+                'days': result['days'],
+                'annual_return': result['annual_return'],
+                'max_drawdown': result['max_drawdown']
+            })
+    t2 = time.perf_counter()
+
+    timings = {'rows': len(series), 'parse_seconds': t1 - t0, 'analysis_seconds': t2 - t1}
+    return rows, timings, warnings, store_entry
+
+def _backtest_task(file_path, start_date, end_date, store_dir):
+    """工作进程入口：异常转换为可序列化的错误信息"""
+    try:
+        return file_path, backtest_file(file_path, start_date, end_date, store_dir), None
+    except ImportFailed as e:
+        return file_path, None, str(e)
+    except Exception as e:
+        return file_path, None, f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+
+def run_batch(files, start_date=None, end_date=None, workers=None, log_callback=None, store_dir=None):
+    """用进程池回测多个文件，返回 (结果 DataFrame, 耗时 DataFrame, 失败列表)
+
+    指定 store_dir 时成功解析的文件同时写入该目录的净值库。
+    """
+    log = log_callback if log_callback else log_message
+    rows, timings, failures = [], [], []
+    store_entries = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_backtest_task, path, start_date, end_date, store_dir) for path in files]
+        for done, future in enumerate(as_completed(futures), 1):
+            file_path, result, error = future.result()
+            name = os.path.basename(file_path)
+            if error is not None:
+                failures.append({'file': file_path, 'error': error})
+                log(f"[{done}/{len(files)}] {name} 失败: {error.splitlines()[0]}", "error")
+                continue
+
+            file_rows, file_timing, warnings, store_entry = result
+            rows.extend(file_rows)
+            if store_entry is not None:
+                store_entries[fund_id_for(file_path)] = store_entry
+            timings.append(dict(file=file_path, **file_timing))
+            for message in warnings:
+                log(f"{name}: {message}", "warning")
+            log(f"[{done}/{len(files)}] {name}: {file_timing['rows']} 行, "
+                f"解析 {file_timing['parse_seconds']:.3f}s, 计算 {file_timing['analysis_seconds']:.3f}s", "info")
+
+    if store_dir is not None:
+        NavStore(store_dir).add_entries(store_entries)
+        log(f"已写入净值库 {store_dir}: {len(store_entries)} 只基金", "info")
+
+    columns = ['file', 'period', 'days', 'annual_return', 'max_drawdown']
+    return pd.DataFrame(rows, columns=columns), pd.DataFrame(timings), failures
+
+def write_results(df, output_path, output_format):
+    """按格式写出结果；Parquet 需要安装 pyarrow 或 fastparquet"""
+    if output_format == 'csv':
+        df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    elif output_format == 'json':
+        df.to_json(output_path, orient='records', force_ascii=False, indent=1)
+    else:
+        df.to_parquet(output_path, index=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="业绩表现批量回测（无界面）")
+    parser.add_argument("inputs", nargs="+", help="数据文件、通配符或目录")
+    parser.add_argument("-o", "--output", default="backtest_results.csv", help="结果文件路径")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="结果格式，默认按输出文件扩展名判断")
+    parser.add_argument("--start", help="自定义区间起始日期，如 2023-01-01")
+    parser.add_argument("--end", help="自定义区间结束日期，如 2023-12-31")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认为 CPU 核数")
+    parser.add_argument("--store", help="同时把解析后的净值序列写入该目录的净值库")
+    args = parser.parse_args(argv)
+
+    if (args.start is None) != (args.end is None):
+        parser.error("--start 和 --end 需要同时指定")
+    start_date = pd.Timestamp(args.start) if args.start else None
+    end_date = pd.Timestamp(args.end) if args.end else None
+
+    output_format = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+    if output_format not in OUTPUT_FORMATS:
+        parser.error(f"无法识别的输出格式: {output_format}，请使用 --format 指定")
+
+    files, missing = collect_files(args.inputs)
+    for pattern in missing:
+        log_message(f"输入不存在或没有匹配的文件: {pattern}", "error")
+    if not files:
+        log_message("没有找到数据文件", "error")
+        return 2
+
+    log_message(f"开始回测 {len(files)} 个文件", "info")
+    started = time.perf_counter()
+    results, timings, failures = run_batch(files, start_date, end_date, args.workers, store_dir=args.store)
+    failures = [{'file': pattern, 'error': "输入不存在或没有匹配的文件"} for pattern in missing] + failures
+
+    try:
+        write_results(results, args.output, output_format)
+    except ImportError as e:
+        log_message(f"写出 Parquet 需要 pyarrow 或 fastparquet: {str(e)}", "error")
+        return 2
+    log_message(f"结果已写入: {args.output}", "info")
+
+    if not timings.empty:
+        timings_path = os.path.splitext(args.output)[0] + ".timings.csv"
+        timings.to_csv(timings_path, index=False, encoding='utf-8-sig')
+        log_message(f"各文件耗时已写入: {timings_path}", "info")
+    if failures:
+        failures_path = os.path.splitext(args.output)[0] + ".failures.json"
+        with open(failures_path, "w", encoding="utf-8") as f:
+            json.dump(failures, f, ensure_ascii=False, indent=1)
+        log_message(f"{len(failures)} 个文件失败，详情见: {failures_path}", "warning")
+
+    log_message(f"完成: 成功 {len(timings)} 个, 失败 {len(failures)} 个, "
+                f"总耗时 {time.perf_counter() - started:.2f}s", "info")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# benchmarks.py
+"""性能基准脚本
+
+用法:
+    python benchmarks.py clean [--rows 1000000]
+    python benchmarks.py shared [--funds 5000] [--days 2500] [--workers 4] [--windows 20]
+"""
+import argparse
+import time
+from contextlib import ExitStack
+import numpy as np
+import pandas as pd
+from utils import clean_numeric_string, clean_numeric_series
+from nav_series import NavSeries
+from panel import NavPanel
+from shared_panel import SharedPanelExecutor
+
+def _timeit(func, repeat=3):
+    """返回多次运行中的最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_clean_numeric(rows):
+    """对比逐行 apply(clean_numeric_string) 与 clean_numeric_series 的耗时"""
+    rng = np.random.default_rng(0)
+    navs = rng.uniform(0.5, 3.0, rows)
+    # 模拟导出文件中常见的带单位、千分位和空格的净值文本
+    texts = pd.Series([f" {v:,.4f}元 " for v in navs], dtype=object)
+
+    baseline = texts.apply(clean_numeric_string)
+    vectorized = clean_numeric_series(texts)
+    if not pd.to_numeric(baseline, errors='coerce').equals(pd.to_numeric(vectorized, errors='coerce')):
+        raise AssertionError("向量化清理结果与逐行清理不一致")
+
+    t_apply = _timeit(lambda: texts.apply(clean_numeric_string))
+    t_vector = _timeit(lambda: clean_numeric_series(texts))
+    print(f"clean_numeric ({rows} 行)")
+    print(f"  apply(clean_numeric_string): {t_apply:.3f}s")
+    print(f"  clean_numeric_series:        {t_vector:.3f}s")
+    print(f"  加速比: {t_apply / t_vector:.1f}x")
+
+def bench_shared_panel(funds, days, workers, windows):
+    """对比多进程面板计算中序列化传递数组与共享内存的耗时"""
+    rng = np.random.default_rng(0)
+    axis = np.arange(12000, 12000 + days * 7 // 5, dtype=np.int64)
+    series = {}
+    for i in range(funds):
+        fund_days = np.sort(rng.choice(axis, days, replace=False))
+        series[f"F{i}"] = NavSeries(fund_days, np.cumprod(1 + rng.normal(0.0003, 0.01, days)))
+    panel = NavPanel.from_series(series)
+    sweep = [(pd.Timestamp(np.datetime64(int(axis[0]) + 30 * k, 'D')),
+              pd.Timestamp(np.datetime64(int(axis[-1]) - 30 * k, 'D'))) for k in range(windows)]
+
+    expected = panel.fixed_freq_metrics()
+    with ExitStack() as stack:
+        # 进程池启动和复制到共享内存是一次性开销，单独计时，不计入每次任务
+        executors, setup = {}, {}
+        for shared in (False, True):
+            start = time.perf_counter()
+            executors[shared] = stack.enter_context(SharedPanelExecutor(panel, workers, shared=shared))
+            # 首次提交任务时才启动工作进程，同时校验结果
+            if not executors[shared].fixed_freq_metrics().equals(expected):
+                raise AssertionError("多进程计算结果与单进程不一致")
+            setup[shared] = time.perf_counter() - start
+
+        def run(shared, job):
+            if job == 'fixed_freq':
+                executors[shared].fixed_freq_metrics()
+            else:
+                executors[shared].custom_range_sweep(sweep)
+
+        print(f"shared_panel ({funds} 只基金 × {days} 天, 矩阵 {panel.navs.nbytes / 1e6:.0f} MB, {workers} 进程)")
+        print(f"  启动（含首次计算）: 序列化 {setup[False]:.3f}s, 共享内存 {setup[True]:.3f}s")
+        for job, label in (('fixed_freq', '固定周期'), ('sweep', f'{windows} 个区间扫描')):
+            t_pickle = _timeit(lambda: run(False, job))
+            t_shared = _timeit(lambda: run(True, job))
+            print(f"  {label}: 序列化 {t_pickle:.3f}s, 共享内存 {t_shared:.3f}s, 加速比 {t_pickle / t_shared:.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="业绩表现回测工具性能基准")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    clean = sub.add_parser("clean", help="单位净值清理")
+    clean.add_argument("--rows", type=int, default=1_000_000)
+    shared = sub.add_parser("shared", help="多进程面板计算：共享内存与序列化对比")
+    shared.add_argument("--funds", type=int, default=5000)
+    shared.add_argument("--days", type=int, default=2500)
+    shared.add_argument("--workers", type=int, default=4)
+    shared.add_argument("--windows", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.bench == "clean":
+        bench_clean_numeric(args.rows)
+    elif args.bench == "shared":
+        bench_shared_panel(args.funds, args.days, args.workers, args.windows)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,31 @@
 # chart_utils.py
+import numpy as np
 import matplotlib.dates as mdates
+from contextlib import contextmanager
 from matplotlib.ticker import StrMethodFormatter, MaxNLocator
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
 from datetime import datetime
+from nav_series import nearest_sorted
+
+# 抽稀绘图时每个像素列保留的点数（最小值和最大值）
+LOD_POINTS_PER_PIXEL = 2
+
+# Max/Min 文本框的位置：(Max 的 (x, y, ha, va), Min 的 (x, y, ha, va))
+MAX_MIN_TEXT_POSITIONS = {
+    "top-left": ((0.02, 0.95, 'left', 'top'), (0.02, 0.85, 'left', 'top')),
+    "top-right": ((0.98, 0.95, 'right', 'top'), (0.98, 0.85, 'right', 'top')),
+    "bottom-left": ((0.02, 0.15, 'left', 'bottom'), (0.02, 0.05, 'left', 'bottom')),
+    "bottom-right": ((0.98, 0.15, 'right', 'bottom'), (0.98, 0.05, 'right', 'bottom'))
+}
+
+# Hover 文本框相对 Max/Min 文本框的位置：(x, y, ha, va)
+HOVER_TEXT_POSITIONS = {
+    "top-left": (0.02, 0.75, 'left', 'top'),
+    "top-right": (0.98, 0.75, 'right', 'top'),
+    "bottom-left": (0.02, 0.25, 'left', 'bottom'),
+    "bottom-right": (0.98, 0.25, 'right', 'bottom')
+}
 
 class ChartUtils:
     def __init__(self, app):
@@ -13,47 +36,34 @@ class ChartUtils:
         self.hover_marker = None
         self.hover_text_obj = None
         self.hover_date_marker = None
+        self.hover_date_marker_x = None
+        self.hover_date_marker_y = None
         self.max_min_text_obj = []
+        self.max_marker = None
+        self.min_marker = None
+        # 图表静态部分的位图缓存，悬停时只在其上重绘十字线等动态对象
+        self._background = None
+        # 当前图表数据点的 matplotlib 日期数值（升序），绘图时计算一次，悬停查找用二分
+        self.plot_x = None
+        # 鼠标移动事件合并：只保留最新的横坐标，按最高帧率在 Tk after 循环中处理
+        self._pending_x = None
+        self._hover_after_id = None
+        self._hover_index = None
+        # 净值曲线及抽稀后绘制的位置（None 表示绘制了全部数据点）和对应的坐标
+        self.nav_line = None
+        self.lod_indices = None
+        self._lod_xy = None
+        self._layout_pending = True
 
     def initialize_chart(self):
+        """清空坐标轴并创建常驻的图表对象；之后切换区间只更新这些对象，不再清空重建"""
         self.app.ax.clear()
         self.app.current_plot_data = None  # 清空当前图表数据
-
-        if self.hover_line_x:
-            try:
-                self.hover_line_x.remove()
-            except:
-                pass
-            self.hover_line_x = None
-
-        if self.hover_line_y:
-            try:
-                self.hover_line_y.remove()
-            except:
-                pass
-            self.hover_line_y = None
-
-        if self.hover_marker:
-            try:
-                self.hover_marker.remove()
-            except:
-                pass
-            self.hover_marker = None
-
-        if self.hover_text_obj:
-            try:
-                self.hover_text_obj.remove()
-            except:
-                pass
-            self.hover_text_obj = None
-
-        if self.max_min_text_obj:
-            for text_obj in self.max_min_text_obj:
-                try:
-                    text_obj.remove()
-                except:
-                    pass
-            self.max_min_text_obj = []
+        self.plot_x = None
+        self.lod_indices = None
+        self._lod_xy = None
+        # 首次绘制数据时再按实际刻度标签调整一次布局
+        self._layout_pending = True
 
         self.app.figure.subplots_adjust(left=0.10, right=0.95, top=0.92, bottom=0.35)
         self.app.figure.tight_layout(pad=1.5)
@@ -81,12 +91,110 @@ class ChartUtils:
 
         plt.setp(self.app.ax.get_xticklabels(), rotation=30, ha='right', fontsize=4)
 
+        self.create_chart_artists()
+        self.create_hover_artists()
         self.app.canvas.draw()
 
+    def create_chart_artists(self):
+        """创建常驻的净值曲线、Max/Min 标记和文本框以及悬停日期标记，初始为空或隐藏
+
+        横坐标统一使用 matplotlib 日期数值，坐标轴范围由 setup_chart_formatting 显式设置。
+        """
+        ax = self.app.ax
+        self.nav_line, = ax.plot([], [], color=self.config.colors["chart_line"], linestyle='-', linewidth=1.0)
+
+        marker_style = dict(marker='o', markersize=6, markerfacecolor='none', markeredgewidth=1.5,
+                            linestyle='', zorder=10)
+        self.max_marker, = ax.plot([], [], markeredgecolor=self.config.colors["max_color"], **marker_style)
+        self.min_marker, = ax.plot([], [], markeredgecolor=self.config.colors["min_color"], **marker_style)
+
+        self.max_min_text_obj = [
+            ax.text(
+                0, 0, "",
+                transform=ax.transAxes,
+                fontsize=8,
+                color=self.config.colors[color_key],
+                bbox=dict(
+                    boxstyle="round,pad=0.3",  # 减小内边距
+                    fc="white",
+                    ec="none",
+                    lw=0,
+                    alpha=self.config.get("textbox_alpha")
+                ),
+                zorder=10,
+                visible=False
+            )
+            for color_key in ("max_color", "min_color")
+        ]
+
+        line_style = dict(color=self.config.colors["chart_hover"], linestyle='--', linewidth=1,
+                          alpha=0.5, zorder=5, visible=False)
+        self.hover_date_marker_x = ax.add_artist(Line2D([0, 0], [0, 1], transform=ax.get_xaxis_transform(), **line_style))
+        self.hover_date_marker_y = ax.add_artist(Line2D([0, 1], [0, 0], transform=ax.get_yaxis_transform(), **line_style))
+        self.hover_date_marker = ax.add_artist(Line2D(
+            [], [],
+            marker='o',
+            markersize=5,
+            markerfacecolor='none',
+            markeredgecolor=self.config.colors["chart_hover"],
+            markeredgewidth=1.5,
+            linestyle='',
+            zorder=10,
+            visible=False
+        ))
+
+    def update_chart(self, df_plot, max_idx, min_idx):
+        """把当前区间的数据写入常驻对象并更新坐标轴范围和刻度，最后只请求一次重绘
+
+        需先调用 set_plot_data。返回抽稀后绘制的位置数组，未抽稀时返回 None。
+        """
+        self.hide_hover()
+
+        # 数据点远多于像素时按显示宽度抽稀，最高点、最低点始终保留
+        decimated = self.decimate(df_plot)
+        if decimated is None:
+            self.lod_indices, self._lod_xy = None, None
+            self.nav_line.set_data(self.plot_x, df_plot.navs)
+        else:
+            self.lod_indices, self._lod_xy = decimated[0], decimated[1:]
+            self.nav_line.set_data(*self._lod_xy)
+
+        self.max_marker.set_data([self.plot_x[max_idx]], [df_plot.navs[max_idx]])
+        self.min_marker.set_data([self.plot_x[min_idx]], [df_plot.navs[min_idx]])
+        self.update_max_min_text()
+
+        self.setup_chart_formatting(df_plot)
+        self.app.canvas.draw_idle()
+        return self.lod_indices
+
+    def update_max_min_text(self):
+        """按当前配置更新 Max/Min 文本框的内容、位置和透明度"""
+        max_text_obj, min_text_obj = self.max_min_text_obj
+        # 检查是否显示文本框
+        if not self.config.get("show_textbox", True) or self.app.max_value is None:
+            max_text_obj.set_visible(False)
+            min_text_obj.set_visible(False)
+            return
+
+        # 根据配置设置Max/Min文本框位置，避免重叠
+        max_pos, min_pos = MAX_MIN_TEXT_POSITIONS.get(
+            self.config.get("max_min_position"), MAX_MIN_TEXT_POSITIONS["top-left"])
+        # 修正：统一文本格式以保证框体大小一致，保持左对齐
+        texts = (
+            f'Max: {self.app.max_value: >8.4f} ({self.app.max_date_str})',
+            f'Min: {self.app.min_value: >8.4f} ({self.app.min_date_str})'
+        )
+        for text_obj, (x, y, ha, va), text in zip(self.max_min_text_obj, (max_pos, min_pos), texts):
+            text_obj.set_position((x, y))
+            text_obj.set_horizontalalignment(ha)
+            text_obj.set_verticalalignment(va)
+            text_obj.get_bbox_patch().set_alpha(self.config.get("textbox_alpha"))
+            text_obj.set_text(text)
+            text_obj.set_visible(True)
+
     def setup_chart_formatting(self, df_plot):
-        """设置图表格式"""
-        date_range = df_plot['日期'].max() - df_plot['日期'].min()
-        days = date_range.days
+        """按当前区间设置日期刻度和坐标轴范围；不随区间变化的样式在 initialize_chart 中设置一次"""
+        days = int(df_plot.days[-1] - df_plot.days[0])
 
         if days <= 30:
             date_format = '%m-%d'
@@ -106,192 +214,261 @@ class ChartUtils:
         self.app.ax.xaxis.set_major_locator(locator)
         self.app.ax.xaxis.set_major_formatter(mdates.DateFormatter(date_format))
 
-        min_nav = df_plot['单位净值'].min()
-        max_nav = df_plot['单位净值'].max()
+        # 坐标轴范围不再由 autoscale 计算，按与其相同的留白显式设置
+        x_margin, y_margin = self.app.ax.margins()
+        x_min, x_max = locator.nonsingular(self.plot_x[0], self.plot_x[-1])
+        x_buffer = (x_max - x_min) * x_margin
+        self.app.ax.set_xlim(x_min - x_buffer, x_max + x_buffer)
+
+        min_nav = df_plot.navs.min()
+        max_nav = df_plot.navs.max()
         nav_range = max_nav - min_nav
 
         if nav_range > 0:
             buffer = nav_range * 0.05
             self.app.ax.set_ylim(min_nav - buffer, max_nav + buffer)
+        else:
+            y_min, y_max = self.app.ax.yaxis.get_major_locator().nonsingular(min_nav, max_nav)
+            y_buffer = (y_max - y_min) * y_margin
+            self.app.ax.set_ylim(y_min - y_buffer, y_max + y_buffer)
 
-        self.app.ax.yaxis.set_major_locator(MaxNLocator(prune='both', nbins=5))
+        plt.setp(self.app.ax.get_xticklabels(), rotation=30, ha='right', fontsize=4)
 
-        self.app.ax.grid(True,
-                    linestyle='--',
-                    alpha=0.6,
-                    color=self.config.colors["chart_grid"])
+        if self._layout_pending:
+            self._layout_pending = False
+            self.app.figure.subplots_adjust(left=0.10, right=0.95, top=0.92, bottom=0.35)
+            self.app.figure.tight_layout(pad=1.5)
 
-        self.app.ax.tick_params(axis='x',
-                           which='major',
-                           labelsize=4,
-                           colors=self.config.colors["text"])
-        self.app.ax.tick_params(axis='y',
-                           which='major',
-                           labelsize=5,
-                           colors=self.config.colors["text"])
-        self.app.ax.yaxis.set_major_formatter(StrMethodFormatter('{x:,.4f}'))
+    def set_plot_data(self, df_plot):
+        """记录当前显示的数据及各数据点的 matplotlib 日期数值
 
-        self.app.ax.spines['top'].set_visible(False)
-        self.app.ax.spines['right'].set_visible(False)
-        self.app.ax.spines['left'].set_color(self.config.colors["text_light"])
-        self.app.ax.spines['bottom'].set_color(self.config.colors["text_light"])  
+        整个会话的日期数值按数据指纹计算一次并放入会话的结果缓存，区间视图直接切片。
+        """
+        self.app.current_plot_data = df_plot
+        session = self.app.session
+        if session is None or len(df_plot) == 0:
+            self.plot_x = mdates.date2num(df_plot.dates)
+        else:
+            full_x = session.result_cache.get_or_compute(
+                (session.fingerprint, 'plot_x'), lambda: mdates.date2num(session.series.dates))
+            lo = self._session_offset(df_plot)
+            self.plot_x = full_x[lo:lo + len(df_plot)]
+        self._hover_index = None
+
+    def _session_offset(self, df_plot):
+        """df_plot 是会话序列的连续视图，返回它在会话中的起始位置"""
+        return int(np.searchsorted(self.app.session.days, df_plot.days[0]))
+
+    def decimate(self, df_plot):
+        """按坐标轴像素宽度抽稀绘图数据，返回 (位置数组, 横坐标, 净值)；无需抽稀时返回 None
+
+        使用会话的最小/最大值金字塔，每个像素列保留区间内的最低点和最高点，
+        真实的最高点、最低点和两个端点始终保留，切换区间时直接选用合适的层级。
+        结果按 (数据指纹, 区间, 点数上限) 缓存，回到同一视图时不再查询金字塔。需先调用 set_plot_data。
+        """
+        session = self.app.session
+        if not self.config.get("chart_lod_enabled", True) or session is None or len(df_plot) == 0:
+            return None
+        width = max(int(self.app.ax.get_window_extent().width), 1)
+        max_points = LOD_POINTS_PER_PIXEL * width
+        if len(df_plot) <= max_points:
+            return None
+        lo = self._session_offset(df_plot)
+        hi = lo + len(df_plot)
+        plot_x = self.plot_x
+
+        def compute():
+            indices = session.lod().query(lo, hi, max_points) - lo
+            return indices, plot_x[indices], df_plot.navs[indices]
+        return session.result_cache.get_or_compute((session.fingerprint, 'lod', lo, hi, max_points), compute)
+
+    @contextmanager
+    def full_resolution(self):
+        """临时以全部数据点绘制净值曲线（如高分辨率导出），退出时恢复抽稀数据"""
+        if self.nav_line is None or self.lod_indices is None:
+            yield
+            return
+        df_plot = self.app.current_plot_data
+        self.nav_line.set_data(self.plot_x, df_plot.navs)
+        try:
+            yield
+        finally:
+            self.nav_line.set_data(*self._lod_xy)
 
-        plt.setp(self.app.ax.get_xticklabels(), rotation=30, ha='right', fontsize=4)
+    def nearest_plot_index(self, x):
+        """当前图表中距离横坐标 x（matplotlib 日期数值）最近的数据点位置，与数据长度无关"""
+        return nearest_sorted(self.plot_x, x)
 
-        self.app.figure.subplots_adjust(left=0.10, right=0.95, top=0.92, bottom=0.35)
-        self.app.figure.tight_layout(pad=1.5)
+    # ---- 鼠标悬停（十字线、空心圆和 Hover 文本框） ----
+
+    def use_blit(self):
+        """是否以位图缓存方式（blitting）绘制悬停对象"""
+        return self.config.get("hover_blit", True) and getattr(self.app.canvas, "supports_blit", False)
+
+    def create_hover_artists(self):
+        """创建常驻的悬停对象，图表清空（ax.clear）后需重新创建
+
+        对象初始隐藏，悬停时只更新位置和文本。blitting 模式下设为 animated，
+        不参与整幅图的绘制，由 blit_hover 单独绘制到缓存的背景上。
+        """
+        for artist in (self.hover_line_x, self.hover_line_y, self.hover_marker, self.hover_text_obj):
+            if artist is not None:
+                try:
+                    artist.remove()
+                except (ValueError, NotImplementedError):
+                    pass
+        self._background = None
+        self._hover_index = None
+
+        ax = self.app.ax
+        animated = self.use_blit()
+        line_style = dict(color=self.config.colors["chart_hover"], linestyle='--', linewidth=1,
+                          alpha=0.5, zorder=5, visible=False, animated=animated)
+        # 使用 add_artist 添加，十字线不参与坐标轴范围的自动计算
+        self.hover_line_x = ax.add_artist(Line2D([0, 0], [0, 1], transform=ax.get_xaxis_transform(), **line_style))
+        self.hover_line_y = ax.add_artist(Line2D([0, 1], [0, 0], transform=ax.get_yaxis_transform(), **line_style))
+        self.hover_marker = ax.add_artist(Line2D(
+            [], [],
+            marker='o',
+            markersize=5,
+            markerfacecolor='none',
+            markeredgecolor=self.config.colors["chart_hover"],
+            markeredgewidth=1.5,
+            linestyle='',
+            zorder=10,
+            visible=False,
+            animated=animated
+        ))
+        self.hover_text_obj = ax.text(
+            0, 0, "",
+            transform=ax.transAxes,
+            fontsize=8,
+            color=self.config.colors["chart_hover"],
+            bbox=dict(
+                boxstyle="round,pad=0.3",  # 减小内边距
+                fc="white",
+                ec="none",
+                lw=0,
+                alpha=self.config.get("textbox_alpha")
+            ),
+            zorder=10,
+            visible=False,
+            animated=animated
+        )
+
+    def on_draw(self, event):
+        """整幅图绘制完成后缓存背景（不含 animated 对象），并补画可见的悬停对象"""
+        if not self.use_blit() or self.hover_line_x is None:
+            return
+        # 导出图表（savefig）同样触发 draw_event，但画面的 DPI 和尺寸与屏幕不同，不能作为背景
+        if event.canvas is not self.app.canvas or event.canvas.is_saving():
+            return
+        self._background = self.app.canvas.copy_from_bbox(self.app.figure.bbox)
+        if self.hover_line_x.get_visible():
+            self._draw_hover_artists()
+
+    def _draw_hover_artists(self):
+        for artist in (self.hover_line_x, self.hover_line_y, self.hover_marker, self.hover_text_obj):
+            if artist.get_visible():
+                self.app.ax.draw_artist(artist)
+
+    def blit_hover(self):
+        """刷新悬停对象：blitting 模式下恢复背景、重绘悬停对象并 blit，否则整幅图延迟重绘"""
+        if not self.use_blit():
+            self.app.canvas.draw_idle()
+            return
+        if self._background is None:
+            # 尚未完成首次绘制，绘制后 on_draw 会缓存背景
+            self.app.canvas.draw_idle()
+            return
+        self.app.canvas.restore_region(self._background)
+        self._draw_hover_artists()
+        self.app.canvas.blit(self.app.figure.bbox)
 
     def on_hover(self, event):
-        """处理鼠标悬停事件，显示日期和净值，并绘制十字虚线"""
+        """处理鼠标移动事件：只记录最新位置，由 _process_hover 按最高帧率合并处理"""
         # 如果有设置的悬停日期，则不显示鼠标悬停数据
         if self.config.get("show_hover_data") and self.config.get("hover_date"):
             return
             
         # 使用当前显示的图表数据而不是完整数据集
-        if self.app.current_plot_data is None or event.inaxes != self.app.ax:
+        if self.plot_x is None or event.inaxes != self.app.ax or self.hover_line_x is None:
             self.on_leave(event)
             return
 
-        try:
-            # 移除旧的悬停标注和标记
-            if self.hover_text_obj:
-                self.hover_text_obj.remove()
-                self.hover_text_obj = None
-            if self.hover_line_x:
-                self.hover_line_x.remove()
-                self.hover_line_x = None
-            if self.hover_line_y:
-                self.hover_line_y.remove()
-                self.hover_line_y = None
-            if self.hover_marker:
-                self.hover_marker.remove()
-                self.hover_marker = None
-
-            xdata_date = mdates.num2date(event.xdata).replace(tzinfo=None)
-
-            # 找到最近的日期数据点 - 使用当前显示的图表数据
-            closest_idx = self.app.current_plot_data['日期'].sub(xdata_date).abs().idxmin()
-
-            closest_row = self.app.current_plot_data.loc[closest_idx]
-            nav = closest_row['单位净值']
-            date = closest_row['日期']
-
-            # 绘制新的十字虚线 (透明度设为0.5)
-            self.hover_line_x = self.app.ax.axvline(
-                x=date,
-                color=self.config.colors["chart_hover"],
-                linestyle='--',
-                linewidth=1,
-                alpha=0.5,
-                zorder=5
-            )
+        self._pending_x = event.xdata
+        if self._hover_after_id is None:
+            interval = max(int(1000 / max(self.config.get("hover_max_fps", 60), 1)), 1)
+            self._hover_after_id = self.app.root.after(interval, self._process_hover)
 
-            self.hover_line_y = self.app.ax.axhline(
-                y=nav,
-                color=self.config.colors["chart_hover"],
-                linestyle='--',
-                linewidth=1,
-                alpha=0.5,
-                zorder=5
-            )
+    def _process_hover(self):
+        """显示最近一次鼠标位置对应的日期和净值，并绘制十字虚线；数据点未变化时跳过"""
+        self._hover_after_id = None
+        x, self._pending_x = self._pending_x, None
+        if x is None or self.plot_x is None or self.hover_line_x is None:
+            return
 
-            # 绘制新的空心圆
-            self.hover_marker, = self.app.ax.plot(
-                date,
-                nav,
-                marker='o',
-                markersize=5,
-                markerfacecolor='none',
-                markeredgecolor=self.config.colors["chart_hover"],
-                markeredgewidth=1.5,
-                linestyle='',
-                zorder=10
-            )
+        try:
+            # 找到最近的日期数据点 - 在当前图表数据的预计算横坐标上二分查找
+            closest_idx = self.nearest_plot_index(x)
+            if closest_idx == self._hover_index and self.hover_line_x.get_visible():
+                return
+            self._hover_index = closest_idx
+
+            nav = self.app.current_plot_data.navs[closest_idx]
+            date = self.app.current_plot_data.date_at(closest_idx)
+            x = self.plot_x[closest_idx]
+
+            # 只更新常驻对象的位置，不重新创建
+            self.hover_line_x.set_xdata([x, x])
+            self.hover_line_y.set_ydata([nav, nav])
+            self.hover_marker.set_data([x], [nav])
+            for artist in (self.hover_line_x, self.hover_line_y, self.hover_marker):
+                artist.set_visible(True)
 
             # 检查是否显示文本框
             if self.config.get("show_textbox", True):
-                # 根据Max/Min位置确定Hover文本位置
-                position = self.config.get("max_min_position")
-                alpha = self.config.get("textbox_alpha")
-
-                # 动态计算文本位置，避免重叠
-                if position == "top-left":
-                    hover_x, hover_y = 0.02, 0.75  # 调整Y位置，避免与Max/Min重叠
-                    hover_ha, hover_va = 'left', 'top'
-                elif position == "top-right":
-                    hover_x, hover_y = 0.98, 0.75  # 调整Y位置，避免与Max/Min重叠
-                    hover_ha, hover_va = 'right', 'top'
-                elif position == "bottom-left":
-                    hover_x, hover_y = 0.02, 0.25  # 调整Y位置，避免与Max/Min重叠
-                    hover_ha, hover_va = 'left', 'bottom'
-                elif position == "bottom-right":
-                    hover_x, hover_y = 0.98, 0.25  # 调整Y位置，避免与Max/Min重叠
-                    hover_ha, hover_va = 'right', 'bottom'
-
-                # 更新左上角的标注文本
-                hover_data_text = f'Hover: {nav:.4f} ({date.strftime("%y/%m/%d")})'
-
-                # 修正: 统一Hover文本颜色为橙色
-                self.hover_text_obj = self.app.ax.text(
-                    hover_x, hover_y,
-                    hover_data_text,
-                    transform=self.app.ax.transAxes,
-                    fontsize=8,
-                    color=self.config.colors["chart_hover"],
-                    bbox=dict(
-                        boxstyle="round,pad=0.3",  # 减小内边距
-                        fc="white",
-                        ec="none",
-                        lw=0,
-                        alpha=alpha
-                    ),
-                    ha=hover_ha,
-                    va=hover_va,
-                    zorder=10
-                )
-
-            self.app.canvas.draw_idle()
+                # 根据Max/Min位置确定Hover文本位置，避免重叠
+                hover_x, hover_y, hover_ha, hover_va = HOVER_TEXT_POSITIONS.get(
+                    self.config.get("max_min_position"), HOVER_TEXT_POSITIONS["top-left"])
+                self.hover_text_obj.set_position((hover_x, hover_y))
+                self.hover_text_obj.set_horizontalalignment(hover_ha)
+                self.hover_text_obj.set_verticalalignment(hover_va)
+                self.hover_text_obj.get_bbox_patch().set_alpha(self.config.get("textbox_alpha"))
+                self.hover_text_obj.set_text(f'Hover: {nav:.4f} ({date.strftime("%y/%m/%d")})')
+                self.hover_text_obj.set_visible(True)
+            else:
+                self.hover_text_obj.set_visible(False)
+
+            self.blit_hover()
 
         except Exception as e:
-            self.on_leave(event)
+            self.on_leave(None)
             return
 
     def on_leave(self, event):
-        """处理鼠标离开事件，移除标注和标记"""
+        """处理鼠标离开事件，取消待处理的悬停并隐藏悬停对象"""
         # 如果有设置的悬停日期，则不处理鼠标离开事件
         if self.config.get("show_hover_data") and self.config.get("hover_date"):
             return
-            
-        # 只移除悬停时创建的临时对象
-        if self.hover_line_x:
-            try:
-                self.hover_line_x.remove()
-            except:
-                pass
-            self.hover_line_x = None
-
-        if self.hover_line_y:
-            try:
-                self.hover_line_y.remove()
-            except:
-                pass
-            self.hover_line_y = None
-
-        if self.hover_marker:
-            try:
-                self.hover_marker.remove()
-            except:
-                pass
-            self.hover_marker = None
-
-        if self.hover_text_obj:
-            try:
-                self.hover_text_obj.remove()
-            except:
-                pass
-            self.hover_text_obj = None
 
-        self.app.canvas.draw_idle()
+        visible = self.hover_line_x is not None and self.hover_line_x.get_visible()
+        self.hide_hover()
+        if visible:
+            self.blit_hover()
+
+    def hide_hover(self):
+        """取消待处理的悬停并隐藏悬停对象，不单独刷新画布"""
+        self._pending_x = None
+        self._hover_index = None
+        if self._hover_after_id is not None:
+            self.app.root.after_cancel(self._hover_after_id)
+            self._hover_after_id = None
+
+        if self.hover_line_x is None:
+            return
+        for artist in (self.hover_line_x, self.hover_line_y, self.hover_marker, self.hover_text_obj):
+            artist.set_visible(False)
 
     def update_chart_with_hover_date(self):
         """更新图表，显示悬停日期的交叉线"""
@@ -300,73 +477,47 @@ class ChartUtils:
 
         try:
             hover_date = datetime.strptime(self.config.get("hover_date"), "%Y-%m-%d")
-            if self.app.current_plot_data is not None:
-                # 找到最接近的日期
-                closest_idx = self.app.current_plot_data['日期'].sub(hover_date).abs().idxmin()
-                closest_row = self.app.current_plot_data.loc[closest_idx]
-                nav = closest_row['单位净值']
-                date = closest_row['日期']
-
-                # 清除之前的悬停标记
-                self.remove_hover_date_marker()
-
-                # 添加悬停十字线
-                self.hover_date_marker_x = self.app.ax.axvline(
-                    x=date,
-                    color=self.config.colors["chart_hover"],
-                    linestyle='--',
-                    linewidth=1,
-                    alpha=0.5,
-                    zorder=5
-                )
-
-                self.hover_date_marker_y = self.app.ax.axhline(
-                    y=nav,
-                    color=self.config.colors["chart_hover"],
-                    linestyle='--',
-                    linewidth=1,
-                    alpha=0.5,
-                    zorder=5
-                )
-
-                # 添加空心圆标记
-                self.hover_date_marker, = self.app.ax.plot(
-                    date,
-                    nav,
-                    marker='o',
-                    markersize=5,
-                    markerfacecolor='none',
-                    markeredgecolor=self.config.colors["chart_hover"],
-                    markeredgewidth=1.5,
-                    linestyle='',
-                    zorder=10
-                )
-
+            if self.show_hover_date_marker(hover_date):
                 self.app.canvas.draw_idle()
         except ValueError:
             self.app.log("悬停日期格式无效", "error")
 
+    def show_hover_date_marker(self, hover_date):
+        """把常驻的悬停日期十字线和空心圆移到最接近 hover_date 的数据点并显示，无数据时返回 False"""
+        if self.plot_x is None or self.hover_date_marker is None:
+            return False
+        # 找到最接近的日期
+        closest_idx = self.nearest_plot_index(mdates.date2num(hover_date))
+        x = self.plot_x[closest_idx]
+        nav = self.app.current_plot_data.navs[closest_idx]
+
+        self.hover_date_marker_x.set_xdata([x, x])
+        self.hover_date_marker_y.set_ydata([nav, nav])
+        self.hover_date_marker.set_data([x], [nav])
+        for artist in (self.hover_date_marker_x, self.hover_date_marker_y, self.hover_date_marker):
+            artist.set_visible(True)
+        return True
+
+    @contextmanager
+    def hover_date_markers_shown(self, hover_date):
+        """临时显示悬停日期标记（如导出图表），退出时恢复原来的位置和显示状态；hover_date 为 None 时不做处理"""
+        if hover_date is None or self.hover_date_marker is None:
+            yield
+            return
+        artists = (self.hover_date_marker_x, self.hover_date_marker_y, self.hover_date_marker)
+        saved = [(artist.get_visible(), artist.get_xdata(), artist.get_ydata()) for artist in artists]
+        self.show_hover_date_marker(hover_date)
+        try:
+            yield
+        finally:
+            for artist, (visible, xdata, ydata) in zip(artists, saved):
+                artist.set_data(xdata, ydata)
+                artist.set_visible(visible)
+
     def remove_hover_date_marker(self):
-        """清除悬停日期标记"""
-        if hasattr(self, 'hover_date_marker_x') and self.hover_date_marker_x:
-            try:
-                self.hover_date_marker_x.remove()
-            except:
-                pass
-            self.hover_date_marker_x = None
-
-        if hasattr(self, 'hover_date_marker_y') and self.hover_date_marker_y:
-            try:
-                self.hover_date_marker_y.remove()
-            except:
-                pass
-            self.hover_date_marker_y = None
-
-        if hasattr(self, 'hover_date_marker') and self.hover_date_marker:
-            try:
-                self.hover_date_marker.remove()
-            except:
-                pass
-            self.hover_date_marker = None
-
-        self.app.canvas.draw_idle()
\ No newline at end of file
+        """隐藏悬停日期标记"""
+        for artist in (self.hover_date_marker_x, self.hover_date_marker_y, self.hover_date_marker):
+            if artist is not None:
+                artist.set_visible(False)
+
+        self.app.canvas.draw_idle()
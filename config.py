@@ -43,7 +43,19 @@ class Config:
             "show_log_window": False,  # 修改为默认关闭日志窗口
             "show_textbox": False,  # 添加默认关闭提示框
             "max_min_position": "top-left",  # top-left, top-right, bottom-left, bottom-right
-            "textbox_alpha": 0.5  # 提示框透明度
+            "textbox_alpha": 0.5,  # 提示框透明度
+            "hover_blit": True,  # 鼠标悬停时只重绘十字线等动态对象（blitting）
+            "hover_max_fps": 60,  # 鼠标悬停每秒最多处理的次数，多余的移动事件合并
+            "chart_lod_enabled": True,  # 数据点多于像素时按显示宽度抽稀绘图数据
+            "result_cache_size": 64,  # 分析结果缓存条目上限
+            "parse_cache_enabled": True,  # 是否启用解析结果磁盘缓存
+            "parse_cache_max_mb": 256,  # 解析结果磁盘缓存容量上限（MB）
+            "watch_enabled": False,  # 是否监视数据文件夹
+            "watch_directory": "",  # 监视的文件夹
+            "watch_interval_ms": 2000,  # 轮询监视间隔（毫秒），使用 inotify 时为等待超时
+            "chunked_import_threshold_mb": 200,  # CSV 超过该大小时分块导入到内存映射数组（MB）
+            "import_memory_limit_mb": 256,  # 分块导入的峰值内存上限（MB）
+            "nav_store_directory": ""  # 本地净值库目录，留空时位于配置文件旁边
         }
         
         # 配置文件路径
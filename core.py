@@ -1,22 +1,71 @@
 # core.py
 import pandas as pd
-from datetime import datetime, timedelta
 import numpy as np
-import warnings
-import re
-from dateutil.parser import parse as dateutil_parse
-from utils import log_message, parse_dates, clean_numeric_string
+from utils import log_message, parse_dates, clean_numeric_series
+from drawdown_index import DrawdownIndex
+from lod import LodPyramid
+from result_cache import ResultCache, dataset_fingerprint, extend_fingerprint
+from nav_series import NavSeries, GrowableArray, to_day_number, from_day_number
+
+# 固定周期及其近似天数（按月和年划分）
+FIXED_PERIODS = {
+    "近1周": 7,
+    "近2周": 14,
+    "近3周": 21,
+    "近1月": 30,
+    "近2月": 60,
+    "近3月": 90,
+    "近6月": 180,
+    "近1年": 365,
+}
+
+def calculate_annual_return(nav_start, nav_end, days):
+    """计算年化收益率"""
+    if days == 0:
+        return 0.0
+    
+    total_return = (nav_end - nav_start) / nav_start
+    if total_return <= -1.0:
+        # 避免 log(0) 或 log(负数)
+        return -1.0  
+    annual_return = (1 + total_return) ** (365.0 / days) - 1
+    return annual_return
+
+def format_fixed_freq_row(row):
+    """把 (周期, 天数, 年化收益, 最大回撤) 数值结果格式化为界面显示的文本，数据不足的周期显示 '/'"""
+    name, days, annual_return, max_drawdown = row
+    if np.isnan(annual_return):
+        return (name, '/', '/', '/')
+    return (name, days, f"{annual_return:.2%}", f"-{max_drawdown:.2%}")
 
 class PerformanceAnalysis:
     def __init__(self, df, log_callback=None):
         self.df = df
         self.log = log_callback if log_callback else log_message
+        # 按需构建的净值序列和分析会话
+        self._series = None
+        self._session = None
+
+    @classmethod
+    def from_series(cls, series, log_callback=None):
+        """直接基于已清洗的 NavSeries（如净值库中内存映射的数组）构建，不需要 DataFrame"""
+        analyzer = cls(None, log_callback)
+        analyzer._series = series
+        return analyzer
+
+    @classmethod
+    def from_store(cls, store, fund_id, log_callback=None):
+        """以内存映射方式打开净值库中的一只基金"""
+        return cls.from_series(store.open(fund_id), log_callback)
 
     def prepare_data(self):
         """清洗和准备数据，包括日期和净值列的转换，并处理多样的列名"""
         if self.df is None or self.df.empty:
             self.log("数据为空，无法进行分析。", "warning")
             return self.df
+
+        self._series = None
+        self._session = None
         
         # 定义可能的列名映射
         column_map = {
@@ -53,9 +102,8 @@ class PerformanceAnalysis:
             return None
         
         self.log("开始解析日期列...", "info")
-        self.df['日期'] = self.df['日期'].astype(str)
         
-        # 使用更强大的日期解析函数
+        # 按抽样识别的格式向量化解析；保留原始类型，以便识别日期类型和 Excel 序列日期
         self.df['日期'] = parse_dates(self.df['日期'], self.log)
         
         invalid_mask = self.df['日期'].isna()
@@ -78,8 +126,8 @@ class PerformanceAnalysis:
         
         self.log("开始处理单位净值列...", "info")
         
-        # 使用 apply 方法并行处理，并清理非数值字符
-        self.df['单位净值'] = self.df['单位净值'].apply(clean_numeric_string)
+        # 向量化清理非数值字符，已是数值类型的列直接跳过
+        self.df['单位净值'] = clean_numeric_series(self.df['单位净值'])
         
         # 批量转换为 float 类型，使用 errors='coerce' 将无法转换的值设为 NaN
         self.df['单位净值'] = pd.to_numeric(self.df['单位净值'], errors='coerce')
@@ -98,144 +146,245 @@ class PerformanceAnalysis:
             
         return self.df
 
-    def calculate_annual_return(self, nav_start, nav_end, days):
-        """计算年化收益率"""
-        if days == 0:
-            return 0.0
-        
-        total_return = (nav_end - nav_start) / nav_start
-        if total_return <= -1.0:
-            # 避免 log(0) 或 log(负数)
-            return -1.0  
-        annual_return = (1 + total_return) ** (365.0 / days) - 1
-        return annual_return
-        
-    def calculate_max_drawdown(self, nav_series):
-        """计算最大回撤"""
-        if nav_series.empty:
-            return 0.0
-        
-        # 使用 cummax() 计算截至当前日期的历史最高净值
-        rolling_max = nav_series.cummax()
-        # 计算回撤
-        drawdown = (rolling_max - nav_series) / rolling_max
-        # 找到最大回撤
-        max_drawdown = drawdown.max()
-        return max_drawdown
+    def get_series(self):
+        """按需将清洗后的 DataFrame 转换为紧凑的 NavSeries"""
+        if self._series is None:
+            self._series = NavSeries.from_frame(self.df)
+        return self._series
+
+    def get_session(self, result_cache=None):
+        """按需构建分析会话，同一份数据只构建一次"""
+        if self._session is None:
+            self._session = AnalysisSession(self.get_series(), self.log, result_cache)
+        return self._session
 
     def calculate_fixed_freq(self):
         """计算固定周期的业绩指标"""
-        if self.df is None or len(self.df) == 0:
+        if self._series is None and (self.df is None or len(self.df) == 0):
             self.log("数据为空，无法进行固定周期回测", "warning")
             return []
-        
-        first_date = self.df['日期'].iloc[0]
-        last_date = self.df['日期'].iloc[-1]
-        
+        return self.get_session().calculate_fixed_freq()
+
+    def calculate_custom_range(self, start_date, end_date):
+        """计算自定义日期区间的业绩指标"""
+        return self.get_session().calculate_custom_range(start_date, end_date)
+
+    def prepare_chart_data(self, start_date=None, end_date=None):
+        """为图表准备数据和标题"""
+        return self.get_session().prepare_chart_data(start_date, end_date)
+
+
+# 内存映射数组的区间回撤索引每块包含的数据点数
+MEMMAP_INDEX_BLOCK_SIZE = 256
+# 分段计算滚动指标时每段的数据点数
+RUNNING_CHUNK_SIZE = 1 << 20
+
+def running_peak_and_drawdown(navs, peak=-np.inf, max_drawdown=0.0):
+    """从已有的 (历史最高净值, 最大回撤) 继续，分段计算追加 navs 后的新值"""
+    for start in range(0, len(navs), RUNNING_CHUNK_SIZE):
+        chunk = np.asarray(navs[start:start + RUNNING_CHUNK_SIZE], dtype=np.float64)
+        cummax = np.maximum.accumulate(np.maximum(chunk, peak))
+        max_drawdown = max(max_drawdown, float(((cummax - chunk) / cummax).max()))
+        peak = float(cummax[-1])
+    return peak, max_drawdown
+
+class AnalysisSession:
+    """导入数据后长期持有的分析会话
+
+    保存按日期排序的净值序列、滚动的历史最高净值与最大回撤、固定周期起始索引以及
+    区间回撤索引，界面上的各项操作和导出都直接查询它，而不是重新构建分析对象。
+    """
+
+    def __init__(self, series, log_callback=None, result_cache=None):
+        self.log = log_callback if log_callback else log_message
+        days, navs = series.days, series.navs
+        # 底层使用可扩容缓冲区（初始不复制），追加新数据时不必复制或重算已有部分
+        self._buffers = [GrowableArray(days), GrowableArray(navs)]
+        self._sync_views()
+        # 历史最高净值和成立以来最大回撤只保留滚动值，追加数据时从这里继续
+        self.peak, self.max_drawdown = running_peak_and_drawdown(navs)
+        # 内存映射的大数组使用分块索引，树只保存块摘要
+        block_size = MEMMAP_INDEX_BLOCK_SIZE if isinstance(navs, np.memmap) else 1
+        self.range_index = DrawdownIndex(navs, block_size=block_size)
+        self.period_indexes = self._resolve_period_indexes()
+        # 结果缓存按数据指纹区分，可在多次导入之间共享
+        self.fingerprint = dataset_fingerprint(days, navs)
+        self.result_cache = result_cache if result_cache is not None else ResultCache()
+        # 绘图抽稀用的最小/最大值金字塔，首次绘图时构建
+        self._lod = None
+
+    @classmethod
+    def from_frame(cls, df, log_callback=None, result_cache=None):
+        """从 prepare_data 之后的 DataFrame 构建会话"""
+        return cls(NavSeries.from_frame(df), log_callback, result_cache)
+
+    def _sync_views(self):
+        self.days, self.navs = (b.view for b in self._buffers)
+        self.series = NavSeries(self.days, self.navs)
+
+    def extend(self, new_series):
+        """追加晚于当前最后一天的新数据点，返回实际追加的点数
+
+        历史最高净值和最大回撤只计算新增部分，区间回撤索引增量更新，固定周期起始索引
+        重新定位（O(周期数 × log n)）。数据指纹在旧指纹基础上链式更新，旧结果不会被误用。
+        """
+        days, navs = new_series.days, new_series.navs
+        if len(self.days):
+            keep = days > self.days[-1]
+            days, navs = days[keep], navs[keep]
+        if len(days) == 0:
+            return 0
+
+        self.peak, self.max_drawdown = running_peak_and_drawdown(navs, self.peak, self.max_drawdown)
+        for buffer, values in zip(self._buffers, (days, navs)):
+            buffer.extend(values)
+        self._sync_views()
+
+        self.range_index.append(navs, self.navs)
+        self.period_indexes = self._resolve_period_indexes()
+        self.fingerprint = extend_fingerprint(self.fingerprint, days, navs)
+        self._lod = None
+        return len(days)
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def first_date(self):
+        return self.series.first_date
+
+    @property
+    def last_date(self):
+        return self.series.last_date
+
+    def lod(self):
+        """净值的最小/最大值金字塔（按需构建，追加数据后重建）"""
+        if self._lod is None:
+            self._lod = LodPyramid(self.navs)
+        return self._lod
+
+    def _resolve_period_indexes(self):
+        """一次 searchsorted 解析全部固定周期的起始索引"""
+        n = len(self.days)
+        if n == 0:
+            return np.zeros(len(FIXED_PERIODS), dtype=np.int64)
+
+        periods = np.fromiter(FIXED_PERIODS.values(), dtype=np.int64)
+        targets = self.days[-1] - periods
+        start_idx = np.searchsorted(self.days, targets)
+
+        # 确保找到的索引有效，并取距离目标日期更近的一侧
+        start_idx = np.minimum(start_idx, n - 1)
+        prev_idx = np.maximum(start_idx - 1, 0)
+        closer_prev = (start_idx > 0) & ((self.days[start_idx] - targets) > (targets - self.days[prev_idx]))
+        return np.where(closer_prev, prev_idx, start_idx)
+
+    def calculate_fixed_freq(self):
+        """计算固定周期的业绩指标（界面显示的文本），结果按数据指纹缓存"""
+        return [format_fixed_freq_row(row) for row in self.fixed_freq_values()]
+
+    def fixed_freq_values(self):
+        """固定周期业绩的数值结果 [(周期, 天数, 年化收益, 最大回撤)]，回撤为正数，
+
+        数据不足的周期三项均为 NaN；结果按数据指纹缓存。
+        """
+        key = (self.fingerprint, 'fixed_freq')
+        return list(self.result_cache.get_or_compute(key, self._compute_fixed_freq))
+
+    def _compute_fixed_freq(self):
+        days, navs = self.days, self.navs
+        n = len(days)
+        if n == 0:
+            self.log("数据为空，无法进行固定周期回测", "warning")
+            return []
+
+        last_day = days[-1]
         results = []
-        
+
         # 新增：直接计算总天数，避免重复计算
-        total_days = (last_date - first_date).days
-        
-        # 更新为按月和年划分的固定周期
-        # 使用近似天数
-        frequencies = {
-            "近1周": 7,
-            "近2周": 14,
-            "近3周": 21,
-            "近1月": 30,
-            "近2月": 60,
-            "近3月": 90,
-            "近6月": 180,
-            "近1年": 365,
-        }
+        total_days = int(last_day - days[0])
 
-        for freq_name, days_ago in frequencies.items():
-            start_date_target = last_date - timedelta(days=days_ago)
-            
-            # 使用 searchsorted 查找最接近起始日期的索引
-            start_idx = self.df['日期'].searchsorted(start_date_target)
-            
-            # 确保找到的索引有效
-            if start_idx >= len(self.df):
-                start_idx = len(self.df) - 1
-            if start_idx > 0 and (self.df['日期'].iloc[start_idx] - start_date_target).days > (start_date_target - self.df['日期'].iloc[start_idx-1]).days:
-                start_idx -= 1
-            
-            sub_df = self.df.iloc[start_idx:].copy()
-            
+        for (freq_name, days_ago), idx in zip(FIXED_PERIODS.items(), self.period_indexes):
             # 方案二：基于数据点数量而不是天数来判断
-            if len(sub_df) >= 2:
-                days_actual = (sub_df['日期'].iloc[-1] - sub_df['日期'].iloc[0]).days
-                
+            if n - idx >= 2:
+                days_actual = int(last_day - days[idx])
+
                 # 检查实际天数是否达到指标天数的90%
                 if days_actual < days_ago * 0.9:
                     # 不足90%，显示为占位符
-                    results.append((freq_name, '/', '/', '/'))
+                    results.append((freq_name, np.nan, np.nan, np.nan))
                     self.log(f"数据不足{freq_name}的90%，跳过计算。实际天数: {days_actual}, 要求天数: {days_ago}", "warning")
                 else:
-                    nav_start = sub_df['单位净值'].iloc[0]
-                    nav_end = sub_df['单位净值'].iloc[-1]
-                    
-                    annual_return = self.calculate_annual_return(nav_start, nav_end, days_actual)
-                    max_drawdown = self.calculate_max_drawdown(sub_df['单位净值'])
-                    
-                    results.append((freq_name, days_actual, f"{annual_return:.2%}", f"-{max_drawdown:.2%}"))
+                    annual_return = calculate_annual_return(navs[idx], navs[-1], days_actual)
+                    max_drawdown = self.range_index.max_drawdown(int(idx), n - 1)
+
+                    results.append((freq_name, days_actual, annual_return, max_drawdown))
                     self.log(f"{freq_name}: 天数={days_actual}, 年化={annual_return:.2%}, 回撤={max_drawdown:.2%}", "info")
             else:
-                self.log(f"数据不足{freq_name}，跳过计算。实际数据点数: {len(sub_df)}", "warning")
-                # 即使数据不足，也显示该周期，并用斜杠填充数据
-                results.append((freq_name, '/', '/', '/'))
+                self.log(f"数据不足{freq_name}，跳过计算。实际数据点数: {n - idx}", "warning")
+                # 即使数据不足，也显示该周期，界面中用斜杠填充数据
+                results.append((freq_name, np.nan, np.nan, np.nan))
 
         # 计算成立以来
-        if total_days > 0 and len(self.df) > 1:
-            nav_start = self.df['单位净值'].iloc[0]
-            nav_end = self.df['单位净值'].iloc[-1]
-            annual_return = self.calculate_annual_return(nav_start, nav_end, total_days)
-            max_drawdown = self.calculate_max_drawdown(self.df['单位净值'])
-            
-            results.append(("成立以来", total_days, f"{annual_return:.2%}", f"-{max_drawdown:.2%}"))
+        if total_days > 0 and n > 1:
+            annual_return = calculate_annual_return(navs[0], navs[-1], total_days)
+            max_drawdown = self.max_drawdown
+
+            results.append(("成立以来", total_days, annual_return, max_drawdown))
         else:
             self.log("数据不足，无法计算成立以来业绩", "warning")
-            results.append(("成立以来", '/', '/', '/'))
-        
+            results.append(("成立以来", np.nan, np.nan, np.nan))
+
         return results
 
     def calculate_custom_range(self, start_date, end_date):
-        """计算自定义日期区间的业绩指标"""
-        df_sorted = self.df.sort_values('日期').reset_index(drop=True)
-        
-        start_idx = df_sorted['日期'].searchsorted(start_date, side='left')
-        end_idx = df_sorted['日期'].searchsorted(end_date, side='right') - 1
+        """计算自定义日期区间的业绩指标，结果按 (数据指纹, 区间) 缓存"""
+        start_day = int(to_day_number(start_date))
+        end_day = int(to_day_number(end_date))
+        key = (self.fingerprint, 'custom_range', start_day, end_day)
+        result = self.result_cache.get(key)
+        if result is None:
+            # 无效区间不写入缓存，保证每次都能给出提示
+            result = self._compute_custom_range(start_day, end_day)
+            if result is None:
+                return None
+            self.result_cache.put(key, result)
+        return dict(result, start_date=start_date, end_date=end_date)
+
+    def _compute_custom_range(self, start_day, end_day):
+        days, navs = self.days, self.navs
+
+        start_idx = int(np.searchsorted(days, start_day, side='left'))
+        end_idx = int(np.searchsorted(days, end_day, side='right')) - 1
         
-        if start_idx >= len(df_sorted) or start_idx > end_idx:
+        if start_idx >= len(days) or start_idx > end_idx:
             self.log("指定日期范围超出数据范围", "warning")
             return None
             
         if end_idx < 0:
-            end_idx = len(df_sorted) - 1
+            end_idx = len(days) - 1
             
-        actual_start_date = df_sorted['日期'].iloc[start_idx]
-        actual_end_date = df_sorted['日期'].iloc[end_idx]
+        actual_start_date = from_day_number(days[start_idx])
+        actual_end_date = from_day_number(days[end_idx])
         
-        days = (actual_end_date - actual_start_date).days
+        days_count = int(days[end_idx] - days[start_idx])
         
-        if days <= 1:
+        if days_count <= 1:
             self.log("指定日期范围内天数不足，无法计算", "warning")
             return None
         
-        nav_start = df_sorted['单位净值'].iloc[start_idx]
-        nav_end = df_sorted['单位净值'].iloc[end_idx]
+        nav_start = navs[start_idx]
+        nav_end = navs[end_idx]
         
-        annual_return = self.calculate_annual_return(nav_start, nav_end, days)
+        annual_return = calculate_annual_return(nav_start, nav_end, days_count)
         
-        nav_series = df_sorted.loc[start_idx:end_idx, '单位净值'].reset_index(drop=True)
-        max_drawdown = self.calculate_max_drawdown(nav_series)
+        # 通过区间索引 O(log n) 查询最大回撤，无需切片重算
+        max_drawdown = self.range_index.max_drawdown(start_idx, end_idx)
         
         return {
-            'start_date': start_date,
-            'end_date': end_date,
-            'days': days,
+            'start_date': from_day_number(start_day),
+            'end_date': from_day_number(end_day),
+            'days': days_count,
             'nav_start': nav_start,
             'nav_end': nav_end,
             'annual_return': annual_return,
@@ -245,24 +394,30 @@ class PerformanceAnalysis:
         }
 
     def prepare_chart_data(self, start_date=None, end_date=None):
-        """为图表准备数据和标题"""
-        df_plot = self.df.copy()
-        
+        """为图表准备数据和标题，结果按 (数据指纹, 区间) 缓存"""
+        if start_date and end_date:
+            key = (self.fingerprint, 'chart', int(to_day_number(start_date)), int(to_day_number(end_date)))
+        else:
+            key = (self.fingerprint, 'chart', None, None)
+        return self.result_cache.get_or_compute(key, lambda: self._compute_chart_data(start_date, end_date))
+
+    def _compute_chart_data(self, start_date, end_date):
         if start_date and end_date:
-            mask = (df_plot['日期'] >= start_date) & (df_plot['日期'] <= end_date)
-            df_plot = df_plot.loc[mask]
+            view = self.series.range(start_date, end_date)
             start_str = start_date.strftime("%Y/%m/%d")
             end_str = end_date.strftime("%Y/%m/%d")
             chart_title = f"{start_str}~{end_str}趋势图"
             current_start_date = start_date
             current_end_date = end_date
         else:
-            start_date = df_plot['日期'].min()
-            end_date = df_plot['日期'].max()
+            view = self.series
+            start_date = self.first_date
+            end_date = self.last_date
             start_str = start_date.strftime("%Y/%m/%d")
             end_str = end_date.strftime("%Y/%m/%d")
             chart_title = f"{start_str}~{end_str}净值趋势图"
             current_start_date = start_date
             current_end_date = end_date
-        
-        return df_plot, chart_title, current_start_date, current_end_date
\ No newline at end of file
+
+        # 返回零拷贝的区间视图，而不是复制一份 DataFrame
+        return view, chart_title, current_start_date, current_end_date
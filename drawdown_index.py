@@ -0,0 +1,195 @@
+# drawdown_index.py
+import numpy as np
+
+# 分块计算块摘要时每次处理的数据点数，限制临时数组的内存
+SUMMARY_CHUNK_SIZE = 1 << 20
+
+def range_summary(navs):
+    """直接计算一段净值的 (最高净值, 最低净值, 最大回撤)"""
+    cummax = np.maximum.accumulate(navs)
+    return float(cummax[-1]), float(navs.min()), float(((cummax - navs) / cummax).max())
+
+def block_summaries(navs, block_size):
+    """按 block_size 个点一块计算每块的 (最高, 最低, 最大回撤) 数组，分段读取以限制内存"""
+    n = len(navs)
+    n_blocks = -(-n // block_size)
+    block_max = np.empty(n_blocks, dtype=np.float64)
+    block_min = np.empty(n_blocks, dtype=np.float64)
+    block_dd = np.empty(n_blocks, dtype=np.float64)
+
+    full = n // block_size
+    step = max(SUMMARY_CHUNK_SIZE // block_size, 1)
+    for first in range(0, full, step):
+        last = min(first + step, full)
+        x = np.asarray(navs[first * block_size:last * block_size], dtype=np.float64).reshape(-1, block_size)
+        cummax = np.maximum.accumulate(x, axis=1)
+        block_max[first:last] = cummax[:, -1]
+        block_min[first:last] = x.min(axis=1)
+        block_dd[first:last] = ((cummax - x) / cummax).max(axis=1)
+    if full < n_blocks:
+        block_max[full], block_min[full], block_dd[full] = range_summary(
+            np.asarray(navs[full * block_size:], dtype=np.float64))
+    return block_max, block_min, block_dd
+
+class DrawdownIndex:
+    """区间最大回撤索引（线段树），每个节点保存区间最高净值、最低净值和最大回撤
+
+    构建一次 O(n)，任意 [start, end] 区间的最大回撤查询为 O(log n)；
+    追加 k 个数据点只更新 O(k log n) 个节点。
+    block_size > 1 时叶子为每块的摘要，树的内存降为原来的 1/block_size，
+    查询两端不完整的块直接在原数组上计算（O(block_size)），适合内存映射的大数组。
+    """
+
+    def __init__(self, navs, capacity=None, block_size=1):
+        self.block_size = block_size
+        self.n = len(navs)
+        if block_size == 1:
+            navs = np.asarray(navs, dtype=np.float64)
+            self.navs = None
+            self._build(navs, navs, np.zeros(self.n), capacity)
+        else:
+            self.navs = navs
+            capacity = -(-capacity // block_size) if capacity else None
+            self._build(*block_summaries(navs, block_size), capacity)
+
+    def _build(self, leaf_max, leaf_min, leaf_dd, capacity=None):
+        self.leaves = len(leaf_max)
+        size = 1
+        while size < max(self.leaves, capacity or 0, 1):
+            size *= 2
+        self.size = size
+
+        self.max = np.empty(2 * size, dtype=np.float64)
+        self.min = np.empty(2 * size, dtype=np.float64)
+        self.dd = np.zeros(2 * size, dtype=np.float64)
+
+        # 叶子节点从 size 开始，不足部分用末尾叶子填充（查询不会覆盖填充节点）
+        for tree, values, empty in ((self.max, leaf_max, 1.0), (self.min, leaf_min, 1.0), (self.dd, leaf_dd, 0.0)):
+            tree[size:size + self.leaves] = values
+            tree[size + self.leaves:] = values[-1] if self.leaves else empty
+
+        # 自底向上逐层合并，每层一次向量化运算
+        lo = size // 2
+        while lo >= 1:
+            self._merge(np.arange(lo, 2 * lo))
+            lo //= 2
+
+    def _merge(self, nodes):
+        """由子节点重新计算一组同层节点"""
+        left = 2 * nodes
+        right = left + 1
+        self.max[nodes] = np.maximum(self.max[left], self.max[right])
+        self.min[nodes] = np.minimum(self.min[left], self.min[right])
+        cross = 1 - self.min[right] / self.max[left]
+        self.dd[nodes] = np.maximum(np.maximum(self.dd[left], self.dd[right]), cross)
+
+    def _set_leaves(self, first, leaf_max, leaf_min, leaf_dd):
+        """从第 first 个叶子开始写入叶子摘要：容量足够时只更新祖先节点，否则按两倍容量重建"""
+        new_leaves = first + len(leaf_max)
+        if new_leaves > self.size:
+            old = slice(self.size, self.size + first)
+            self._build(np.concatenate((self.max[old], leaf_max)),
+                        np.concatenate((self.min[old], leaf_min)),
+                        np.concatenate((self.dd[old], leaf_dd)),
+                        capacity=2 * new_leaves)
+            return
+
+        leaves = np.arange(first, new_leaves) + self.size
+        self.max[leaves] = leaf_max
+        self.min[leaves] = leaf_min
+        self.dd[leaves] = leaf_dd
+        self.leaves = max(self.leaves, new_leaves)
+
+        nodes = np.unique(leaves // 2)
+        while nodes[0] >= 1:
+            self._merge(nodes)
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def append(self, navs, all_navs=None):
+        """追加新数据点；分块模式需要同时传入追加后的完整净值数组 all_navs"""
+        navs = np.asarray(navs, dtype=np.float64)
+        if len(navs) == 0:
+            return
+        if self.block_size == 1:
+            self._set_leaves(self.n, navs, navs, np.zeros(len(navs)))
+            self.n += len(navs)
+            return
+
+        self.navs = all_navs
+        block = self.block_size
+        first_leaf = self.n // block
+        head = min((-self.n) % block, len(navs))
+        if len(navs) > head:
+            leaf_max, leaf_min, leaf_dd = block_summaries(navs[head:], block)
+        else:
+            leaf_max = leaf_min = leaf_dd = np.empty(0)
+        if head:
+            # 末尾不完整的块与新数据合并
+            pos = self.size + first_leaf
+            merged = self.combine((self.max[pos], self.min[pos], self.dd[pos]), range_summary(navs[:head]))
+            leaf_max = np.concatenate(([merged[0]], leaf_max))
+            leaf_min = np.concatenate(([merged[1]], leaf_min))
+            leaf_dd = np.concatenate(([merged[2]], leaf_dd))
+        self._set_leaves(first_leaf, leaf_max, leaf_min, leaf_dd)
+        self.n += len(navs)
+
+    @staticmethod
+    def combine(left, right):
+        """合并相邻的两个区间摘要 (最高, 最低, 最大回撤)，left 在时间上位于 right 之前"""
+        if left is None:
+            return right
+        if right is None:
+            return left
+        l_max, l_min, l_dd = left
+        r_max, r_min, r_dd = right
+        return (
+            max(l_max, r_max),
+            min(l_min, r_min),
+            max(l_dd, r_dd, 1 - r_min / l_max)
+        )
+
+    def _query_leaves(self, start, end):
+        """查询闭区间 [start, end] 内叶子的合并摘要"""
+        left_acc = None
+        right_parts = []
+        lo = start + self.size
+        hi = end + self.size + 1
+        while lo < hi:
+            if lo & 1:
+                left_acc = self.combine(left_acc, (self.max[lo], self.min[lo], self.dd[lo]))
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right_parts.append((self.max[hi], self.min[hi], self.dd[hi]))
+            lo //= 2
+            hi //= 2
+
+        # 右侧节点按从右到左收集，需要逆序合并以保持时间顺序
+        for part in reversed(right_parts):
+            left_acc = self.combine(left_acc, part)
+        return left_acc
+
+    def query(self, start, end):
+        """查询闭区间 [start, end] 的 (最高净值, 最低净值, 最大回撤)"""
+        if start < 0 or end >= self.n or start > end:
+            raise IndexError(f"区间索引无效: [{start}, {end}]")
+        if self.block_size == 1:
+            return self._query_leaves(start, end)
+
+        block = self.block_size
+        first_block, last_block = start // block, end // block
+        if first_block == last_block:
+            return range_summary(np.asarray(self.navs[start:end + 1], dtype=np.float64))
+
+        # 两端不完整的块直接计算，中间完整的块查树
+        result = range_summary(np.asarray(self.navs[start:(first_block + 1) * block], dtype=np.float64))
+        if last_block - first_block > 1:
+            result = self.combine(result, self._query_leaves(first_block + 1, last_block - 1))
+        tail = np.asarray(self.navs[last_block * block:end + 1], dtype=np.float64)
+        return self.combine(result, range_summary(tail))
+
+    def max_drawdown(self, start, end):
+        """查询闭区间 [start, end] 的最大回撤"""
+        return float(self.query(start, end)[2])
@@ -1,99 +1,300 @@
 # file_operations.py
 import os
+import queue
+import threading
+import traceback
 import tkinter as tk
 import pandas as pd
-from tkinter import filedialog, messagebox
-from core import PerformanceAnalysis
-from utils import detect_file_type, read_csv_file, read_excel_file
+from tkinter import ttk, filedialog
+from import_pipeline import load_nav_file, refresh_nav_file, ImportCancelled, ImportFailed, MEMMAP_DIRNAME
+from nav_series import to_day_number
+from folder_watcher import FolderWatcher
+
+# 后台导入队列的轮询间隔（毫秒）
+IMPORT_POLL_INTERVAL_MS = 50
 
 class FileOperations:
     def __init__(self, app):
         self.app = app
         self.config = app.config
+        self._import_thread = None
+        self._import_queue = None
+        self._cancel_event = None
+        self._progress_window = None
+        self._watcher = None
+        self._refresh_pending = False
 
     def import_data(self):
-        """导入数据文件"""
+        """导入数据文件：读取与计算在后台线程进行，界面线程只负责进度显示和最终刷新"""
         # 移除激活状态检查，允许未激活状态下导入文件
+        if self._import_thread is not None and self._import_thread.is_alive():
+            self.app.log("已有文件正在导入，请稍候", "warning")
+            return
+
+        file_path = filedialog.askopenfilename(
+            title="选择数据文件",
+            filetypes=[
+                ("CSV文件", "*.csv"),
+                ("Excel文件", "*.xlsx;*.xls"),
+                ("所有文件", "*.*")
+            ]
+        )
+        if not file_path:
+             self.app.log("导入取消", "info")
+             return
+
+        self.app.log(f"开始导入文件: {os.path.basename(file_path)}", "info")
+        self._start_worker(self._import_worker, (file_path,), os.path.basename(file_path))
+
+    def refresh_data(self, show_progress=True):
+        """重新读取当前文件：CSV 只在末尾追加了新行时只解析新增部分，否则完整导入"""
+        if self._import_thread is not None and self._import_thread.is_alive():
+            self.app.log("已有文件正在导入，请稍候", "warning")
+            return
+        if self.app.session is None or not self.app.current_file:
+            self.app.log("请先导入数据文件", "warning")
+            return
+
+        file_path = self.app.current_file
+        self.app.log(f"刷新数据: {os.path.basename(file_path)}", "info")
+        if self.app.import_state is None:
+            self._start_worker(self._import_worker, (file_path,), os.path.basename(file_path), show_progress)
+        else:
+            self._start_worker(self._refresh_worker, (self.app.import_state, self.app.session),
+                               os.path.basename(file_path), show_progress)
+
+    def start_watching(self):
+        """按配置启动文件夹监视；当前数据文件被更新时自动增量刷新"""
+        self.stop_watching()
+        directory = self.config.get("watch_directory", "")
+        if not self.config.get("watch_enabled", False) or not directory:
+            return
+        self._watcher = FolderWatcher(
+            self.app.root, directory, self._on_watched_file_changed,
+            self.config.get("watch_interval_ms", 2000), self.app.log
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _on_watched_file_changed(self, path):
+        """界面线程：监视目录中的文件发生变化"""
+        current = self.app.current_file
+        if not current or os.path.abspath(current) != os.path.abspath(path):
+            self.app.log(f"检测到文件更新: {os.path.basename(path)}", "info")
+            return
+        if self._import_thread is not None and self._import_thread.is_alive():
+            # 正在导入或刷新，结束后再处理一次
+            self._refresh_pending = True
+            return
+        self.refresh_data(show_progress=False)
+
+    def _start_worker(self, target, args, display_name, show_progress=True):
+        self._import_queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        if show_progress:
+            self._show_progress_window(display_name)
+
+        self._import_thread = threading.Thread(
+            target=target,
+            args=args + (self._import_queue, self._cancel_event),
+            daemon=True
+        )
+        self._import_thread.start()
+        self.app.root.after(IMPORT_POLL_INTERVAL_MS, self._poll_import_queue)
+
+    def _import_worker(self, file_path, messages, cancel_event):
+        """后台线程：不直接访问任何 Tk 控件，日志、进度和结果都通过队列交回界面线程"""
+        def log(message, type="info"):
+            messages.put(("log", message, type))
+
+        def progress(stage_text, fraction):
+            messages.put(("progress", stage_text, fraction))
+
         try:
-            file_path = filedialog.askopenfilename(
-                title="选择数据文件",
-                filetypes=[
-                    ("CSV文件", "*.csv"),
-                    ("Excel文件", "*.xlsx;*.xls"),
-                    ("所有文件", "*.*")
-                ]
+            nav_series, session, state = load_nav_file(
+                file_path, log, progress, cancel_event,
+                self.app.result_cache, self.app.parse_cache,
+                memmap_dir=os.path.join(os.path.dirname(self.config.config_file), MEMMAP_DIRNAME),
+                chunked_threshold=self.config.get("chunked_import_threshold_mb", 200) * 1024 * 1024,
+                memory_limit=self.config.get("import_memory_limit_mb", 256) * 1024 * 1024
             )
-            if not file_path:
-                 self.app.log("导入取消", "info")
-                 return
+            if cancel_event.is_set():
+                raise ImportCancelled()
+            messages.put(("done", file_path, nav_series, session, state))
+        except ImportCancelled:
+            messages.put(("cancelled",))
+        except ImportFailed as e:
+            messages.put(("failed", e))
+        except Exception as e:
+            traceback.print_exc()
+            messages.put(("error", e))
 
-            self.app.log(f"开始导入文件: {os.path.basename(file_path)}", "info")
+    def _refresh_worker(self, state, session, messages, cancel_event):
+        """后台线程：只解析新增的尾部；前缀有变化时改为完整导入"""
+        def log(message, type="info"):
+            messages.put(("log", message, type))
 
-            file_type = detect_file_type(file_path, self.app.log)
-            self.app.log(f"检测到文件类型: {file_type}", "info")
+        try:
+            result = refresh_nav_file(state, log, self.app.parse_cache)
+        except Exception as e:
+            traceback.print_exc()
+            log(f"增量读取失败，改为完整导入: {str(e)}", "warning")
+            result = None
 
-            if file_type == 'excel':
-                self.app.df = read_excel_file(file_path, self.app.log)
+        if result is None:
+            self._import_worker(state.path, messages, cancel_event)
+        elif cancel_event.is_set():
+            messages.put(("cancelled",))
+        else:
+            messages.put(("appended", session) + result)
+
+    def _poll_import_queue(self):
+        """界面线程定时读取后台导入队列"""
+        while True:
+            try:
+                message = self._import_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            kind = message[0]
+            if kind == "log":
+                self.app.log(message[1], message[2])
+            elif kind == "progress":
+                self._update_progress(message[1], message[2])
             else:
-                self.app.df = read_csv_file(file_path, self.app.log)
+                self._close_progress_window()
+                self._import_thread = None
+                if kind == "done":
+                    self._finish_import(*message[1:])
+                elif kind == "appended":
+                    self._finish_refresh(*message[1:])
+                elif kind == "cancelled":
+                    self.app.log("导入已取消，保留当前数据", "info")
+                elif kind == "failed":
+                    error = message[1]
+                    self.show_custom_message("警告" if error.level == "warning" else "错误", str(error))
+                    self.app.log(f"导入失败: {error}", error.level)
+                else:
+                    error = message[1]
+                    self.show_custom_message("错误", f"导入文件时出错:\n{str(error)}")
+                    self.app.log(f"导入失败: {str(error)}", "error")
 
-            if self.app.df is None or self.app.df.empty:
-                self.show_custom_message("警告", "导入的数据为空")
-                self.app.log("导入失败: 数据为空", "warning")
+                if self._refresh_pending:
+                    self._refresh_pending = False
+                    self.refresh_data(show_progress=False)
                 return
 
-            self.app.log(f"原始列名: {self.app.df.columns.tolist()}", "info")
-
-            # 增强列名匹配逻辑
-            date_col = None
-            nav_col = None
-            date_keywords = ['日期', '净值日期', 'date', '交易日期', '时间', 'time', '净值时间', '净值日期']
-            nav_keywords = ['单位净值', 'net', 'nav', '净值', '单位价值', '单位份额净值', '份额净值']
-
-            for col in self.app.df.columns:
-                col_str = str(col).lower().replace(" ", "").replace("_", "")
-                if date_col is None:
-                    for keyword in date_keywords:
-                        if keyword.lower() in col_str:
-                            date_col = col
-                            self.app.log(f"找到日期列: '{col}'", "info")
-                            break
-                if nav_col is None:
-                    for keyword in nav_keywords:
-                        if keyword.lower() in col_str:
-                            nav_col = col
-                            self.app.log(f"找到单位净值列: '{col}'", "info")
-                            break
-                if date_col and nav_col:
-                    break
-
-            if date_col is None or nav_col is None:
-                if len(self.app.df.columns) >= 2:
-                    self.app.log("未找到标准列名，尝试使用前两列作为日期和单位净值", "warning")
-                    date_col = self.app.df.columns[0]
-                    nav_col = self.app.df.columns[1]
-                else:
-                    self.show_custom_message("错误", "文件列数不足，至少需要两列数据")
-                    self.app.log("导入失败: 文件列数不足", "error")
-                    return
+        self.app.root.after(IMPORT_POLL_INTERVAL_MS, self._poll_import_queue)
+
+    def _show_progress_window(self, filename):
+        """显示导入进度窗口，带取消按钮"""
+        window = tk.Toplevel(self.app.root)
+        window.title("导入数据")
+        window.geometry("260x130")
+        window.resizable(False, False)
+        window.transient(self.app.root)
+        window.grab_set()
+        window.configure(bg=self.config.colors["background"])
+        window.protocol("WM_DELETE_WINDOW", self.cancel_import)
+
+        # 居中显示于父窗口
+        self.app.center_window_relative(window, self.app.root)
+
+        main_frame = ttk.Frame(window, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
 
-            self.app.df = self.app.df[[date_col, nav_col]].copy()
-            self.app.df.columns = ['日期', '单位净值']
-            self.app.log(f"重命名后的列名: {self.app.df.columns.tolist()}", "info")
+        if len(filename) > 20:
+            filename = filename[:10] + "..." + filename[-10:]
+        self._progress_label = ttk.Label(main_frame, text=f"正在导入: {filename}")
+        self._progress_label.pack(pady=(0, 5))
 
-            # 导入核心处理逻辑
-            performance_analyzer = PerformanceAnalysis(self.app.df, self.app.log)
-            self.app.df = performance_analyzer.prepare_data()
+        self._progress_bar = ttk.Progressbar(main_frame, mode="determinate", maximum=100, length=220)
+        self._progress_bar.pack(pady=5)
 
-            if self.app.df is None or self.app.df.empty:
-                self.show_custom_message("错误", "处理后的数据为空")
-                self.app.log("导入失败: 处理后的数据为空", "error")
-                return
+        ttk.Button(main_frame, text="取消", command=self.cancel_import, width=10).pack(pady=5)
+        self._progress_window = window
+
+    def _update_progress(self, stage_text, fraction):
+        if self._progress_window is None:
+            return
+        self._progress_label.config(text=f"{stage_text}...")
+        self._progress_bar["value"] = fraction * 100
+
+    def _close_progress_window(self):
+        if self._progress_window is not None:
+            self._progress_window.grab_release()
+            self._progress_window.destroy()
+            self._progress_window = None
+
+    def cancel_import(self):
+        """请求取消后台导入；当前阶段结束后生效"""
+        if self._cancel_event is not None and not self._cancel_event.is_set():
+            self._cancel_event.set()
+            self.app.log("正在取消导入...", "info")
+            if self._progress_window is not None:
+                self._progress_label.config(text="正在取消...")
+
+    def _finish_refresh(self, session, tail, state):
+        """界面线程：把新增数据追加到当前会话，只在可见区间受影响时重画图表"""
+        if session is not self.app.session:
+            # 刷新期间数据已被重置或替换
+            return
+        session.log = self.app.log
+        old_last_day = int(session.days[-1])
+        added = session.extend(tail)
+        self.app.import_state = state
+        if added == 0:
+            self.app.log("没有新增数据", "info")
+            return
+
+        self.app.nav_series = session.series
+        last_date = session.last_date
+        self.app.log(f"新增 {added} 行数据，最新日期: {last_date.strftime('%Y-%m-%d')}", "success")
+        self.app.calculate_fixed_freq()
+
+        start_date = self.app.current_start_date
+        end_date = self.app.current_end_date
+        if end_date is None or int(to_day_number(end_date)) == old_last_day:
+            # 当前显示到数据末尾（通常是全览），扩展到新的最后日期
+            self._set_entry_date("end_entry", last_date)
+            if start_date is not None and int(to_day_number(start_date)) == int(session.days[0]):
+                self.app.analyze_performance()
+            else:
+                self.app.analyze_performance(start_date, last_date)
+        elif int(to_day_number(end_date)) > old_last_day:
+            # 区间终点在原数据之后，新数据落在可见范围内
+            self.app.analyze_performance(start_date, end_date)
+
+    def _set_entry_date(self, name, date):
+        """更新日期输入框内容，保持其原有的启用/禁用状态"""
+        entry = self.app.components[name]
+        state = entry.cget("state")
+        entry.config(state='normal')
+        entry.delete(0, tk.END)
+        entry.insert(0, date.strftime("%Y-%m-%d"))
+        entry.config(state=state)
+
+    def _finish_import(self, file_path, nav_series, session, state=None):
+        """界面线程：安装导入结果并刷新控件和图表"""
+        try:
+            # 界面各处共享这一份紧凑序列和分析会话，固定周期结果已在后台算好并写入缓存
+            self.app.nav_series = nav_series
+            # 会话在后台线程中以队列日志构建，导入完成后队列不再被读取，改为直接写入界面日志
+            session.log = self.app.log
+            self.app.session = session
+            self.app.current_file = file_path
+            self.app.import_state = state
 
             # 更新菜单状态 - 根据激活状态决定是否启用功能
             menu = self.app.root.nametowidget(".!menu")
             file_menu = menu.winfo_children()[0]  # 文件菜单是第一个
             
+            file_menu.entryconfig("刷新数据", state=tk.NORMAL)
+
             # 根据激活状态决定是否启用导出图表
             if self.app.is_activated:
                 file_menu.entryconfig("导出图表", state=tk.NORMAL)
@@ -110,8 +311,8 @@ class FileOperations:
                 
             self.app.components["btn_reset_app"].config(state=tk.NORMAL)
 
-            min_date = self.app.df['日期'].min()
-            max_date = self.app.df['日期'].max()
+            min_date = self.app.nav_series.first_date
+            max_date = self.app.nav_series.last_date
 
             if not pd.isna(min_date) and not pd.isna(max_date):
                 min_date = min_date.date()
@@ -143,7 +344,6 @@ class FileOperations:
             else:
                 self.app.log("警告: 数据中没有有效的日期", "warning")
 
-            self.app.full_view_data = self.app.df.copy()
             self.app.calculate_fixed_freq()
             self.app.analyze_performance()
 
@@ -160,21 +360,20 @@ class FileOperations:
                 display_name = filename
 
             self.app.log(f"成功导入数据: {display_name}", "success")
-            self.app.log(f"数据记录数: {len(self.app.df)}", "info")
+            self.app.log(f"数据记录数: {len(self.app.nav_series)}", "info")
 
             if not pd.isna(min_date) and not pd.isna(max_date):
                 min_date_str = min_date.strftime("%Y-%m-%d")
                 max_date_str = max_date.strftime("%Y-%m-%d")
                 self.app.log(f"数据日期范围: {min_date_str} 至 {max_date_str}", "info")
-                self.app.log(f"最早净值: {self.app.df['单位净值'].iloc[0]:.4f} (日期: {min_date_str})", "info")
-                self.app.log(f"最新净值: {self.app.df['单位净值'].iloc[-1]:.4f} (日期: {max_date_str})", "info")
+                self.app.log(f"最早净值: {self.app.nav_series.navs[0]:.4f} (日期: {min_date_str})", "info")
+                self.app.log(f"最新净值: {self.app.nav_series.navs[-1]:.4f} (日期: {max_date_str})", "info")
             else:
                 self.app.log("警告: 无法确定日期范围", "warning")
 
         except Exception as e:
             self.show_custom_message("错误", f"导入文件时出错:\n{str(e)}")
             self.app.log(f"导入失败: {str(e)}", "error")
-            import traceback
             traceback.print_exc()
     
     def show_custom_message(self, title, message):
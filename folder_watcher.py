@@ -0,0 +1,126 @@
+# folder_watcher.py
+import os
+import queue
+import threading
+from utils import log_message
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # 非 Linux 或未安装时退回轮询
+    INotify = None
+
+WATCH_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+# 界面线程读取变化队列的间隔（毫秒）
+DISPATCH_INTERVAL_MS = 500
+
+def scan_directory(directory):
+    """返回目录下数据文件的 {绝对路径: (大小, 修改时间)} 快照"""
+    snapshot = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(WATCH_EXTENSIONS):
+                st = entry.stat()
+                snapshot[os.path.abspath(entry.path)] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+class FolderWatcher:
+    """在后台线程监视目录中数据文件的新增和修改，并在界面线程回调 on_change(path)
+
+    安装了 inotify_simple 时使用 inotify 的写入完成/移入事件；否则按间隔轮询目录快照，
+    文件大小和修改时间连续两次扫描不变（写入已完成）才报告，避免读到写了一半的文件。
+    """
+
+    def __init__(self, root, directory, on_change, interval_ms=2000, log_callback=None):
+        self.root = root
+        self.directory = os.path.abspath(directory)
+        self.on_change = on_change
+        self.interval_ms = interval_ms
+        self.log = log_callback if log_callback else log_message
+        self._changes = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._after_id = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return
+        if not os.path.isdir(self.directory):
+            self.log(f"监视目录不存在: {self.directory}", "error")
+            return
+        # 每次启动使用新的停止标志，已停止但尚未退出的旧线程不会被重新激活
+        self._stop_event = threading.Event()
+        target = self._watch_inotify if INotify is not None else self._watch_polling
+        self._thread = threading.Thread(target=target, args=(self._stop_event,), daemon=True)
+        self._thread.start()
+        self._after_id = self.root.after(DISPATCH_INTERVAL_MS, self._dispatch)
+        mode = "inotify" if INotify is not None else f"轮询, 间隔 {self.interval_ms}ms"
+        self.log(f"开始监视目录: {self.directory} ({mode})", "info")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._thread = None
+        self.log(f"停止监视目录: {self.directory}", "info")
+
+    def _watch_polling(self, stop_event):
+        """后台线程：定时扫描目录快照"""
+        try:
+            previous = scan_directory(self.directory)
+        except OSError as e:
+            self._changes.put(("error", str(e)))
+            return
+        reported = dict(previous)
+
+        while not stop_event.wait(self.interval_ms / 1000):
+            try:
+                current = scan_directory(self.directory)
+            except OSError as e:
+                self._changes.put(("error", str(e)))
+                continue
+            for path, stat in current.items():
+                # 两次扫描之间不再变化且与上次报告不同，说明写入已完成
+                if stat == previous.get(path) and stat != reported.get(path):
+                    reported[path] = stat
+                    self._changes.put(("changed", path))
+            previous = current
+
+    def _watch_inotify(self, stop_event):
+        """后台线程：等待 inotify 写入完成和移入事件"""
+        inotify = INotify()
+        try:
+            inotify.add_watch(self.directory, inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO)
+            while not stop_event.is_set():
+                for event in inotify.read(timeout=self.interval_ms):
+                    if event.name.lower().endswith(WATCH_EXTENSIONS):
+                        self._changes.put(("changed", os.path.join(self.directory, event.name)))
+        except OSError as e:
+            self._changes.put(("error", str(e)))
+        finally:
+            inotify.close()
+
+    def _dispatch(self):
+        """界面线程：把后台检测到的变化交给 on_change，同一文件的多次变化只处理一次"""
+        changed = []
+        while True:
+            try:
+                kind, value = self._changes.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "error":
+                self.log(f"监视目录出错: {value}", "error")
+            elif value not in changed:
+                changed.append(value)
+
+        for path in changed:
+            self.on_change(path)
+
+        if not self._stop_event.is_set():
+            self._after_id = self.root.after(DISPATCH_INTERVAL_MS, self._dispatch)
@@ -12,7 +12,9 @@ def create_menu_bar(app):
     file_menu = tk.Menu(menubar, tearoff=0)
     menubar.add_cascade(label="文件", menu=file_menu)
     file_menu.add_command(label="导入文件", command=app.import_data)
+    file_menu.add_command(label="刷新数据", command=app.refresh_data, state=tk.DISABLED)
     file_menu.add_command(label="导出图表", command=app.export_chart, state=tk.DISABLED)
+    file_menu.add_command(label="基金筛选", command=app.show_screening)
     file_menu.add_separator()
     file_menu.add_command(label="退出", command=lambda: app.root.quit())
 
@@ -43,6 +45,11 @@ def create_menu_bar(app):
         command=app.set_log_window
     )
 
+    settings_menu.add_command(
+        label="文件夹监视设置",
+        command=app.set_watch_settings
+    )
+
     # 关于菜单
     about_menu = tk.Menu(menubar, tearoff=0)
     menubar.add_cascade(label="关于", menu=about_menu)
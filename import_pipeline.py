@@ -0,0 +1,426 @@
+# import_pipeline.py
+"""不依赖 Tkinter 的数据导入流水线，可在后台线程、子进程或命令行中复用"""
+import io
+import os
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+from core import PerformanceAnalysis, AnalysisSession
+from nav_series import NavSeries
+from utils import (log_message, detect_file_type, detect_encoding, read_csv_file, read_excel_file, match_columns,
+                   resolve_columns, parse_dates, clean_numeric_series)
+
+# 导入阶段及其在进度条上的完成比例
+IMPORT_STAGES = {
+    "read": ("读取文件", 0.1),
+    "columns": ("识别列名", 0.4),
+    "prepare": ("清洗数据", 0.5),
+    "session": ("构建分析会话", 0.8),
+    "fixed_freq": ("计算固定周期业绩", 0.9),
+}
+
+# 查找最后一个换行符时从文件末尾读取的字节数
+TAIL_PROBE_SIZE = 64 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+# 分块导入时每行在 pandas 中的内存占用约为文件中字节数的倍数（估算值，偏保守）
+CHUNK_MEMORY_FACTOR = 24
+MIN_CHUNK_ROWS = 10000
+# 内存映射文件目录名，位于配置文件所在目录
+MEMMAP_DIRNAME = ".performance_tool_mmap"
+
+class ImportCancelled(Exception):
+    """导入被用户取消"""
+
+class ImportFailed(Exception):
+    """导入失败，message 可直接展示给用户；level 为 'warning' 或 'error'"""
+    def __init__(self, message, level="error"):
+        super().__init__(message)
+        self.level = level
+
+class CsvImportState:
+    """CSV 增量导入状态
+
+    记录已解析的完整行截止位置 offset（最后一个换行符之后）、当时的文件大小和修改时间、
+    文件前 size 个字节的哈希、最后一个日期及其净值，以及读取时实际使用的编码。
+    刷新时先校验已读过的全部字节未被修改（哈希远快于解析），再只解析 offset 之后的新行。
+    """
+    __slots__ = ('path', 'encoding', 'offset', 'size', 'mtime_ns', 'content_hash', 'last_day', 'last_nav')
+
+    def __init__(self, path, encoding, offset, size, mtime_ns, content_hash, last_day, last_nav):
+        self.path = path
+        self.encoding = encoding
+        self.offset = offset
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.content_hash = content_hash
+        self.last_day = last_day
+        self.last_nav = last_nav
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        # 旧版本缓存中的状态字段不同，视为没有状态
+        if not data or any(name not in data for name in cls.__slots__):
+            return None
+        return cls(**{name: data[name] for name in cls.__slots__})
+
+def _hash_bytes(f, length, h=None):
+    """从当前位置开始哈希 length 个字节，返回 hashlib 对象以便继续追加"""
+    h = h if h is not None else hashlib.blake2b(digest_size=16)
+    remaining = length
+    while remaining > 0:
+        chunk = f.read(min(HASH_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        h.update(chunk)
+        remaining -= len(chunk)
+    return h
+
+def capture_csv_state(file_path, encoding, last_day, last_nav):
+    """完整导入 CSV 后记录增量状态；encoding 为读取时实际使用的编码。找不到完整数据行时返回 None"""
+    st = os.stat(file_path)
+    with open(file_path, 'rb') as f:
+        probe_start = max(0, st.st_size - TAIL_PROBE_SIZE)
+        f.seek(probe_start)
+        pos = f.read().rfind(b'\n')
+        if pos < 0:
+            return None
+        offset = probe_start + pos + 1
+        f.seek(0)
+        content_hash = _hash_bytes(f, st.st_size).hexdigest()
+    return CsvImportState(os.path.abspath(file_path), encoding, offset, st.st_size, st.st_mtime_ns,
+                          content_hash, int(last_day), float(last_nav))
+
+def read_csv_tail(state, log_callback=None):
+    """按增量状态只解析新追加的完整行，返回 (新增 NavSeries, 新状态)
+
+    文件变短、已读过的部分被修改或新行日期早于已有数据时返回 None，由调用方改为完整导入。
+    大小和修改时间都未变时直接返回空结果；否则整体校验已读过的字节，只解析新增的行。
+    """
+    log = log_callback if log_callback else log_message
+    empty = NavSeries(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+    st = os.stat(state.path)
+    if st.st_size == state.size and st.st_mtime_ns == state.mtime_ns:
+        return empty, state
+    if st.st_size < state.size:
+        log("文件长度小于上次导入时，改为完整导入", "warning")
+        return None
+
+    with open(state.path, 'rb') as f:
+        header = f.readline()
+        f.seek(0)
+        h = _hash_bytes(f, state.size)
+        if h.hexdigest() != state.content_hash:
+            log("文件已导入部分发生变化，改为完整导入", "warning")
+            return None
+        f.seek(state.offset)
+        tail = f.read(st.st_size - state.offset)
+
+    # 只处理完整的行，写了一半的最后一行留到下次
+    cut = tail.rfind(b'\n') + 1
+    body = tail[:cut]
+    h.update(tail[state.size - state.offset:])
+    new_state = CsvImportState(state.path, state.encoding, state.offset + cut, st.st_size, st.st_mtime_ns,
+                               h.hexdigest(), state.last_day, state.last_nav)
+    if not body.strip():
+        return empty, new_state
+
+    text = (header + body).decode(state.encoding)
+    columns = pd.read_csv(io.StringIO(text), nrows=0).columns
+    df = pd.read_csv(io.StringIO(text), usecols=resolve_columns(columns))
+    df = normalize_columns(df, log)
+    df = PerformanceAnalysis(df, log).prepare_data()
+    if df is None or df.empty:
+        return empty, new_state
+
+    tail_series = NavSeries.from_frame(df)
+    if (tail_series.days < state.last_day).any():
+        log("新增行的日期早于已导入数据，改为完整导入", "warning")
+        return None
+
+    # 与最后一天相同的行是上次已解析过的不完整末行，跳过；末行补全后净值不同时改为完整导入
+    same_day = tail_series.days == state.last_day
+    if (same_day & (tail_series.navs != state.last_nav)).any():
+        log("上次导入的不完整末行已被修改，改为完整导入", "warning")
+        return None
+    keep = tail_series.days > state.last_day
+    tail_series = NavSeries(tail_series.days[keep], tail_series.navs[keep])
+    if len(tail_series):
+        new_state.last_day = int(tail_series.days[-1])
+        new_state.last_nav = float(tail_series.navs[-1])
+    return tail_series, new_state
+
+def pick_columns(columns, log_callback=None):
+    """识别日期列和单位净值列的列名，找不到时使用前两列"""
+    log = log_callback if log_callback else log_message
+
+    # 增强列名匹配逻辑（规则与读取文件时的列裁剪一致）
+    date_pos, nav_pos = match_columns(columns, log)
+    date_col = columns[date_pos] if date_pos is not None else None
+    nav_col = columns[nav_pos] if nav_pos is not None else None
+
+    if date_col is None or nav_col is None:
+        if len(columns) >= 2:
+            log("未找到标准列名，尝试使用前两列作为日期和单位净值", "warning")
+            date_col = columns[0]
+            nav_col = columns[1]
+        else:
+            raise ImportFailed("文件列数不足，至少需要两列数据")
+    return date_col, nav_col
+
+def normalize_columns(df, log_callback=None):
+    """识别日期列和单位净值列，返回只含 '日期'、'单位净值' 两列的 DataFrame"""
+    date_col, nav_col = pick_columns(df.columns, log_callback)
+    df = df[[date_col, nav_col]].copy()
+    df.columns = ['日期', '单位净值']
+    return df
+
+def _quiet(message, message_type="info"):
+    """分块导入时逐块的日志过多，只在结束时汇总"""
+
+def _clean_chunk(dates, navs):
+    """清洗一块数据，返回按文件顺序排列的 (日序号, 净值, 无效日期行数, 无效净值行数)"""
+    dates = parse_dates(dates, _quiet)
+    navs = pd.to_numeric(clean_numeric_series(navs), errors='coerce')
+    valid_date = dates.notna().to_numpy()
+    valid_nav = navs.notna().to_numpy()
+    valid = valid_date & valid_nav
+    days = dates.to_numpy(dtype='datetime64[D]')[valid].astype(np.int64)
+    return days, navs.to_numpy(dtype=np.float64)[valid], int((~valid_date).sum()), int((valid_date & ~valid_nav).sum())
+
+def _reverse_in_place(values, block):
+    """分块原地反转（内存映射）数组，每次只载入两端各 block 个元素"""
+    i, j = 0, len(values)
+    while j - i >= 2 * block:
+        head = np.array(values[i:i + block])
+        tail = np.array(values[j - block:j])
+        values[i:i + block] = tail[::-1]
+        values[j - block:j] = head[::-1]
+        i += block
+        j -= block
+    values[i:j] = np.array(values[i:j])[::-1]
+
+def _remove_stale_memmaps(memmap_dir):
+    """删除旧的内存映射文件；仍被映射的文件在 Windows 上无法删除，直接跳过"""
+    for name in os.listdir(memmap_dir):
+        try:
+            os.remove(os.path.join(memmap_dir, name))
+        except OSError:
+            pass
+
+def read_csv_chunked(file_path, memmap_dir, memory_limit, log_callback=None, progress_callback=None, cancel_event=None):
+    """分块流式读取大 CSV：每块解析、清洗后追加写入磁盘，最终以内存映射数组返回 NavSeries
+
+    每块行数按 memory_limit 和样本平均行长估算，峰值内存与文件大小无关。
+    日期整体倒序的文件分块原地反转；顺序混乱时才整体排序（需要额外内存）。
+    """
+    log = log_callback if log_callback else log_message
+    file_size = os.path.getsize(file_path)
+    encoding = detect_encoding(file_path)
+    header = pd.read_csv(file_path, encoding=encoding, nrows=0).columns
+    usecols = resolve_columns(header)
+    if usecols is None:
+        raise ImportFailed("文件列数不足，至少需要两列数据")
+    date_col, nav_col = pick_columns(header[usecols], log)
+
+    with open(file_path, 'rb') as f:
+        sample = f.read(TAIL_PROBE_SIZE)
+    bytes_per_row = max(len(sample) / max(sample.count(b'\n'), 1), 8)
+    chunk_rows = max(MIN_CHUNK_ROWS, int(memory_limit / (bytes_per_row * CHUNK_MEMORY_FACTOR)))
+    log(f"分块导入: 每块 {chunk_rows} 行 (使用编码: {encoding})", "info")
+
+    os.makedirs(memmap_dir, exist_ok=True)
+    _remove_stale_memmaps(memmap_dir)
+    stem = os.path.join(memmap_dir, f"{os.getpid()}_{time.time_ns()}")
+    days_path, navs_path = stem + ".days", stem + ".navs"
+
+    n = rows = bad_dates = bad_navs = 0
+    ascending = descending = True
+    first_day = last_day = None
+    with open(days_path, 'wb') as days_file, open(navs_path, 'wb') as navs_file:
+        reader = pd.read_csv(file_path, encoding=encoding, usecols=usecols, chunksize=chunk_rows)
+        for chunk in reader:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ImportCancelled()
+            days, navs, chunk_bad_dates, chunk_bad_navs = _clean_chunk(chunk[date_col], chunk[nav_col])
+            rows += len(chunk)
+            bad_dates += chunk_bad_dates
+            bad_navs += chunk_bad_navs
+            if len(days):
+                steps = np.diff(days)
+                ascending &= bool((steps >= 0).all()) and (last_day is None or days[0] >= last_day)
+                descending &= bool((steps <= 0).all()) and (last_day is None or days[0] <= last_day)
+                if first_day is None:
+                    first_day = days[0]
+                last_day = days[-1]
+                days_file.write(days.tobytes())
+                navs_file.write(navs.tobytes())
+                n += len(days)
+            if progress_callback is not None:
+                progress_callback(f"分块读取 {rows} 行", min(0.1 + 0.7 * rows * bytes_per_row / file_size, 0.8))
+
+    if bad_dates:
+        log(f"已删除 {bad_dates} 行无效日期数据", "warning")
+    if bad_navs:
+        log(f"已删除 {bad_navs} 行无效单位净值数据", "warning")
+    if n == 0:
+        raise ImportFailed("处理后的数据为空")
+
+    days = np.memmap(days_path, dtype=np.int64, mode='r+', shape=(n,))
+    navs = np.memmap(navs_path, dtype=np.float64, mode='r+', shape=(n,))
+    if first_day > last_day:
+        log("日期顺序不正确，正在反转数据...", "warning")
+        _reverse_in_place(days, chunk_rows)
+        _reverse_in_place(navs, chunk_rows)
+        in_order = descending
+    else:
+        in_order = ascending
+    if not in_order:
+        log("数据未按日期排序，正在整体排序（需要额外内存）", "warning")
+        order = np.argsort(days, kind='stable')
+        days[:] = days[order]
+        navs[:] = navs[order]
+        del order
+    days.flush()
+    navs.flush()
+    del days, navs
+
+    log(f"成功分块读取CSV文件: {n}行 (共 {rows} 行)", "success")
+    return NavSeries(np.memmap(days_path, dtype=np.int64, mode='r', shape=(n,)),
+                     np.memmap(navs_path, dtype=np.float64, mode='r', shape=(n,)))
+
+def parse_nav_file(file_path, log_callback=None, stage=None):
+    """读取、识别列名并清洗净值文件，返回 (按日期排序的 NavSeries, 文件类型)"""
+    series, file_type, _ = _parse_nav_file(file_path, log_callback, stage)
+    return series, file_type
+
+def _parse_nav_file(file_path, log_callback=None, stage=None):
+    """同 parse_nav_file，另外返回 CSV 实际使用的编码（Excel 为 None）"""
+    log = log_callback if log_callback else log_message
+    stage = stage if stage else (lambda name: None)
+
+    file_type = detect_file_type(file_path, log)
+    log(f"检测到文件类型: {file_type}", "info")
+
+    if file_type == 'excel':
+        df = read_excel_file(file_path, log)
+    else:
+        df = read_csv_file(file_path, log)
+
+    if df is None or df.empty:
+        raise ImportFailed("导入的数据为空", "warning")
+    encoding = df.attrs.get('encoding')
+
+    stage("columns")
+    log(f"原始列名: {df.columns.tolist()}", "info")
+    df = normalize_columns(df, log)
+    log(f"重命名后的列名: {df.columns.tolist()}", "info")
+
+    stage("prepare")
+    performance_analyzer = PerformanceAnalysis(df, log)
+    df = performance_analyzer.prepare_data()
+
+    if df is None or df.empty:
+        raise ImportFailed("处理后的数据为空")
+
+    # 转换为紧凑的 NavSeries
+    return performance_analyzer.get_series(), file_type, encoding
+
+def load_nav_file(file_path, log_callback=None, progress_callback=None, cancel_event=None,
+                  result_cache=None, parse_cache=None, memmap_dir=None, chunked_threshold=None,
+                  memory_limit=256 * 1024 * 1024):
+    """读取并清洗净值文件，返回 (NavSeries, AnalysisSession, CsvImportState 或 None)
+
+    progress_callback(stage_text, fraction) 在每个阶段开始时调用；cancel_event 为
+    threading.Event，阶段之间检查，被设置时抛出 ImportCancelled。
+    提供 parse_cache 时先查磁盘缓存：文件未变直接命中；同一 CSV 只在末尾追加了新行时
+    只解析新增部分；否则完整解析并写入缓存。
+    提供 memmap_dir 且 CSV 大于 chunked_threshold 字节时改用分块导入，数据保存在内存映射数组中，
+    峰值内存约为 memory_limit；这类数据不写入解析缓存，也不做增量刷新。
+    """
+    log = log_callback if log_callback else log_message
+
+    def stage(name):
+        if cancel_event is not None and cancel_event.is_set():
+            raise ImportCancelled()
+        if progress_callback is not None:
+            text, fraction = IMPORT_STAGES[name]
+            progress_callback(text, fraction)
+
+    def finish(session):
+        # 预先计算固定周期业绩，结果写入缓存，界面线程只需查表
+        stage("fixed_freq")
+        session.calculate_fixed_freq()
+        return session
+
+    stage("read")
+    if (memmap_dir is not None and chunked_threshold is not None
+            and os.path.getsize(file_path) > chunked_threshold
+            and detect_file_type(file_path, log) == 'csv'):
+        series = read_csv_chunked(file_path, memmap_dir, memory_limit, log, progress_callback, cancel_event)
+        stage("session")
+        session = finish(AnalysisSession(series, log, result_cache))
+        return session.series, session, None
+
+    content_hash = None
+    if parse_cache is not None:
+        cached, cached_state = parse_cache.stale_entry(file_path, log)
+        state = CsvImportState.from_dict(cached_state)
+        if cached is not None and state is not None:
+            incremental = read_csv_tail(state, log)
+            if incremental is not None:
+                tail, state = incremental
+                log(f"增量导入: 沿用缓存 {len(cached)}行，新增 {len(tail)}行", "info")
+                stage("session")
+                session = AnalysisSession(cached, log, result_cache)
+                session.extend(tail)
+                parse_cache.append(file_path, tail, state.to_dict(), log)
+                return session.series, finish(session), state
+
+        series, content_hash, cached_state = parse_cache.lookup(file_path, log)
+        if series is not None and len(series):
+            log(f"命中解析缓存，跳过文件解析: {len(series)}行", "info")
+            state = CsvImportState.from_dict(cached_state)
+            if state is not None:
+                state.path = os.path.abspath(file_path)
+            stage("session")
+            session = finish(AnalysisSession(series, log, result_cache))
+            return session.series, session, state
+
+    series, file_type, encoding = _parse_nav_file(file_path, log, stage)
+
+    # 构建长期持有的分析会话，之后不再保留 DataFrame
+    stage("session")
+    session = finish(AnalysisSession(series, log, result_cache))
+
+    # 只有 CSV 支持按追加的尾部增量导入
+    state = None
+    if file_type != 'excel' and encoding is not None:
+        try:
+            state = capture_csv_state(file_path, encoding, session.days[-1], session.navs[-1])
+        except OSError as e:
+            log(f"记录增量导入状态失败: {str(e)}", "warning")
+
+    if parse_cache is not None:
+        parse_cache.store(file_path, session.series, content_hash, log, state.to_dict() if state else None)
+
+    return session.series, session, state
+
+def refresh_nav_file(state, log_callback=None, parse_cache=None):
+    """按增量状态读取文件新增的尾部，返回 (新增 NavSeries, 新状态)；需要完整导入时返回 None
+
+    不修改会话，调用方在界面线程上用 session.extend() 追加，避免与界面读取并发。
+    解析缓存只追加新增的尾部分片，不重写已有数组。
+    """
+    log = log_callback if log_callback else log_message
+    incremental = read_csv_tail(state, log)
+    if incremental is None:
+        return None
+
+    tail, new_state = incremental
+    if parse_cache is not None and new_state is not state:
+        parse_cache.append(state.path, tail, new_state.to_dict(), log)
+    return tail, new_state
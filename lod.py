@@ -0,0 +1,87 @@
+# lod.py
+import numpy as np
+
+# 最细一层每个桶包含的数据点数，之后每层桶大小翻倍
+LOD_BASE_BUCKET = 4
+# 构建最细一层时每次读取的数据点数，限制内存映射数组的临时内存
+LOD_CHUNK_SIZE = 1 << 20
+
+class LodPyramid:
+    """净值序列的最小/最大值金字塔，用于按显示宽度抽稀绘图数据
+
+    第 k 层把序列按 LOD_BASE_BUCKET × 2^k 个点分桶，保存每桶最小值和最大值所在的位置。
+    查询任意区间时选择桶数不超过目标的最细一层，取区间内完整桶的最小/最大点，两端不完整
+    的部分直接在原数组上计算，因此区间真实的最高点、最低点和两个端点一定保留。
+    构建 O(n)，查询 O(目标点数 + 桶大小)，与区间长度基本无关。
+    """
+
+    def __init__(self, navs, base_bucket=LOD_BASE_BUCKET):
+        self.navs = navs
+        self.n = len(navs)
+        self.base_bucket = base_bucket
+        # [(桶大小, 最小值位置, 最大值位置, 最小值, 最大值)]
+        self.levels = []
+
+        buckets = self.n // base_bucket
+        if buckets == 0:
+            return
+        argmin = np.empty(buckets, dtype=np.int64)
+        argmax = np.empty(buckets, dtype=np.int64)
+        step = max(LOD_CHUNK_SIZE // base_bucket, 1)
+        for first in range(0, buckets, step):
+            last = min(first + step, buckets)
+            x = np.asarray(navs[first * base_bucket:last * base_bucket], dtype=np.float64).reshape(-1, base_bucket)
+            starts = np.arange(first, last, dtype=np.int64) * base_bucket
+            argmin[first:last] = starts + x.argmin(axis=1)
+            argmax[first:last] = starts + x.argmax(axis=1)
+        min_vals = np.asarray(navs[argmin], dtype=np.float64)
+        max_vals = np.asarray(navs[argmax], dtype=np.float64)
+        self.levels.append((base_bucket, argmin, argmax, min_vals, max_vals))
+
+        # 相邻两个桶合并为上一层的一个桶
+        while len(argmin) >= 2:
+            m = len(argmin) // 2 * 2
+            pick_min = np.arange(0, m, 2) + (min_vals[1:m:2] < min_vals[0:m:2])
+            pick_max = np.arange(0, m, 2) + (max_vals[1:m:2] > max_vals[0:m:2])
+            argmin, min_vals = argmin[pick_min], min_vals[pick_min]
+            argmax, max_vals = argmax[pick_max], max_vals[pick_max]
+            self.levels.append((self.levels[-1][0] * 2, argmin, argmax, min_vals, max_vals))
+
+    def _edge(self, start, stop):
+        """不完整桶：直接在原数组上取最小/最大点"""
+        if stop <= start:
+            return []
+        x = np.asarray(self.navs[start:stop], dtype=np.float64)
+        return [start + int(x.argmin()), start + int(x.argmax())]
+
+    def query(self, lo, hi, max_points):
+        """返回位置区间 [lo, hi) 抽稀后的升序位置数组，点数约不超过 max_points
+
+        区间本身不超过 max_points 个点时返回全部位置。
+        """
+        count = hi - lo
+        if count <= max_points or not self.levels:
+            return np.arange(lo, hi)
+
+        # 每个桶贡献最小、最大两个点
+        wanted = max(max_points // 2, 1)
+        level = self.levels[-1]
+        for candidate in self.levels:
+            if count / candidate[0] <= wanted:
+                level = candidate
+                break
+        bucket, argmin, argmax = level[0], level[1], level[2]
+
+        first_full = -(-lo // bucket)
+        last_full = min(hi // bucket, len(argmin))
+        if first_full >= last_full:
+            parts = [self._edge(lo, hi)]
+        else:
+            parts = [
+                self._edge(lo, first_full * bucket),
+                argmin[first_full:last_full],
+                argmax[first_full:last_full],
+                self._edge(last_full * bucket, hi)
+            ]
+        parts.append([lo, hi - 1])
+        return np.unique(np.concatenate([np.asarray(part, dtype=np.int64) for part in parts]))
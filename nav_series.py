@@ -0,0 +1,136 @@
+# nav_series.py
+import numpy as np
+import pandas as pd
+
+_EPOCH = pd.Timestamp("1970-01-01")
+_ONE_DAY = pd.Timedelta(days=1)
+
+def to_day_number(date):
+    """将日期转换为自 1970-01-01 起的 int64 日序号"""
+    return np.datetime64(pd.Timestamp(date), 'D').astype(np.int64)
+
+def to_day_float(date):
+    """将日期转换为自 1970-01-01 起的浮点日数，保留日内时间"""
+    return (pd.Timestamp(date) - _EPOCH) / _ONE_DAY
+
+def from_day_number(day):
+    """将 int64 日序号转换回 pandas Timestamp"""
+    return pd.Timestamp(np.datetime64(int(day), 'D'))
+
+def nearest_sorted(values, x):
+    """在升序数组中查找距离 x 最近的位置，二分查找 O(log n)；距离相同时取较早的一个"""
+    n = len(values)
+    i = int(np.searchsorted(values, x))
+    if i >= n:
+        return n - 1
+    if i > 0 and x - values[i - 1] <= values[i] - x:
+        return i - 1
+    return i
+
+class GrowableArray:
+    """按倍数扩容的一维数组缓冲区，逐条追加的均摊成本为 O(1)
+
+    view 返回已写入部分的零拷贝视图；扩容前取得的视图仍然有效（数据不会被改写）。
+    未指定更大容量时直接沿用传入的数组（包括内存映射数组），第一次追加时才复制。
+    """
+    __slots__ = ('_buffer', '_size')
+
+    def __init__(self, values, capacity=None):
+        values = np.asarray(values) if not isinstance(values, np.ndarray) else values
+        self._size = len(values)
+        if capacity is None or capacity <= self._size:
+            self._buffer = values
+        else:
+            self._buffer = np.empty(capacity, dtype=values.dtype)
+            self._buffer[:self._size] = values
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def view(self):
+        return self._buffer[:self._size]
+
+    def extend(self, values):
+        """追加一段数据，容量不足时按两倍扩容"""
+        values = np.asarray(values, dtype=self._buffer.dtype)
+        new_size = self._size + len(values)
+        if new_size > len(self._buffer):
+            buffer = np.empty(max(new_size, 2 * len(self._buffer)), dtype=self._buffer.dtype)
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+        self._buffer[self._size:new_size] = values
+        self._size = new_size
+        return self.view
+
+class NavSeries:
+    """紧凑的净值序列：int64 日序号数组 + float64 净值数组，每行约 16 字节
+
+    区间视图直接切片底层数组，不复制数据；整个应用共享同一个实例。
+    """
+    __slots__ = ('days', 'navs')
+
+    def __init__(self, days, navs):
+        self.days = days
+        self.navs = navs
+
+    @classmethod
+    def from_frame(cls, df):
+        """从包含 '日期' 和 '单位净值' 列的 DataFrame 构建按日期排序的序列"""
+        days = df['日期'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        navs = df['单位净值'].to_numpy(dtype=np.float64)
+        if len(days) > 1 and (np.diff(days) < 0).any():
+            order = np.argsort(days, kind='stable')
+            days = days[order]
+            navs = navs[order]
+        return cls(days, navs)
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def dates(self):
+        """datetime64[D] 形式的日期数组（零拷贝视图）"""
+        return self.days.view('datetime64[D]')
+
+    @property
+    def nbytes(self):
+        return self.days.nbytes + self.navs.nbytes
+
+    @property
+    def first_date(self):
+        return from_day_number(self.days[0])
+
+    @property
+    def last_date(self):
+        return from_day_number(self.days[-1])
+
+    def date_at(self, i):
+        """第 i 个数据点的日期"""
+        return from_day_number(self.days[i])
+
+    def slice(self, start, stop):
+        """按位置返回零拷贝视图"""
+        return NavSeries(self.days[start:stop], self.navs[start:stop])
+
+    def index_range(self, start_date, end_date):
+        """返回闭区间 [start_date, end_date] 对应的位置范围 (lo, hi)"""
+        lo = int(np.searchsorted(self.days, to_day_number(start_date), side='left'))
+        hi = int(np.searchsorted(self.days, to_day_number(end_date), side='right'))
+        return lo, hi
+
+    def range(self, start_date, end_date):
+        """按日期返回闭区间 [start_date, end_date] 的零拷贝视图"""
+        lo, hi = self.index_range(start_date, end_date)
+        return self.slice(lo, hi)
+
+    def nearest_index(self, date):
+        """返回距离指定日期最近的数据点位置"""
+        return nearest_sorted(self.days, to_day_float(date))
+
+    def to_frame(self):
+        """转换为包含 '日期' 和 '单位净值' 列的 DataFrame（会复制数据）"""
+        return pd.DataFrame({
+            '日期': self.dates.astype('datetime64[ns]'),
+            '单位净值': self.navs
+        })
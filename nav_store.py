@@ -0,0 +1,150 @@
+# nav_store.py
+import os
+import re
+import json
+import hashlib
+import numpy as np
+from nav_series import NavSeries, from_day_number
+from import_pipeline import parse_nav_file
+from utils import log_message
+
+# 净值库目录名，位于配置文件所在目录
+NAV_STORE_DIRNAME = ".performance_tool_store"
+INDEX_FILENAME = "index.json"
+
+def _file_stem(fund_id):
+    """由基金 ID 生成文件名：保留安全字符并附加短哈希，避免不同 ID 映射到同一文件"""
+    safe = re.sub(r'[^0-9A-Za-z_.-]', '_', str(fund_id))[:64]
+    digest = hashlib.blake2b(str(fund_id).encode("utf-8"), digest_size=4).hexdigest()
+    return f"{safe}-{digest}"
+
+def _save_npy(path, values):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+class NavStore:
+    """本地净值库：每只基金一对 .npy 文件（日序号、净值），index.json 记录基金 ID、日期范围和行数
+
+    open() 以只读内存映射方式打开数组，不读入数据，打开几乎是即时的；
+    切片为零拷贝视图，多个进程打开同一基金时共享操作系统页缓存。
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.index_path = os.path.join(store_dir, INDEX_FILENAME)
+        self._index = None
+
+    @classmethod
+    def from_config(cls, config):
+        """根据 Config 创建净值库，未配置目录时位于配置文件旁边"""
+        store_dir = config.get("nav_store_directory", "") or os.path.join(
+            os.path.dirname(config.config_file), NAV_STORE_DIRNAME)
+        return cls(store_dir)
+
+    # ---- 索引读写 ----
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (IOError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    def _paths(self, entry):
+        stem = os.path.join(self.store_dir, entry["file"])
+        return stem + ".days.npy", stem + ".navs.npy"
+
+    # ---- 对外接口 ----
+
+    def __contains__(self, fund_id):
+        return str(fund_id) in self._load_index()
+
+    def __len__(self):
+        return len(self._load_index())
+
+    def fund_ids(self):
+        return list(self._load_index())
+
+    def info(self, fund_id):
+        """返回基金的索引信息：起止日期、行数；不存在时返回 None"""
+        entry = self._load_index().get(str(fund_id))
+        if entry is None:
+            return None
+        return {
+            'fund_id': str(fund_id),
+            'start_date': from_day_number(entry["start"]) if entry["rows"] else None,
+            'end_date': from_day_number(entry["end"]) if entry["rows"] else None,
+            'rows': entry["rows"]
+        }
+
+    def write_series(self, fund_id, series):
+        """只写入一只基金的数组文件，返回其索引条目，不修改 index.json
+
+        每只基金的文件名不同，多个进程可以并行写入不同基金，再由一个进程调用 add_entries 登记。
+        """
+        entry = {
+            "file": _file_stem(fund_id),
+            "start": int(series.days[0]) if len(series) else None,
+            "end": int(series.days[-1]) if len(series) else None,
+            "rows": len(series)
+        }
+        os.makedirs(self.store_dir, exist_ok=True)
+        days_path, navs_path = self._paths(entry)
+        _save_npy(days_path, np.ascontiguousarray(series.days, dtype=np.int64))
+        _save_npy(navs_path, np.ascontiguousarray(series.navs, dtype=np.float64))
+        return entry
+
+    def add_entries(self, entries):
+        """把 write_series 返回的 {基金 ID: 索引条目} 登记到索引，只写一次 index.json"""
+        if not entries:
+            return
+        # 重新读取索引，合并其他进程在此期间登记的基金
+        self._index = None
+        index = self._load_index()
+        for fund_id, entry in entries.items():
+            index[str(fund_id)] = entry
+        self._save_index()
+
+    def put(self, fund_id, series):
+        """写入（或覆盖）一只基金的已清洗序列"""
+        entry = self.write_series(fund_id, series)
+        self.add_entries({fund_id: entry})
+        return entry
+
+    def open(self, fund_id):
+        """以只读内存映射方式打开一只基金，返回 NavSeries；基金不存在时抛出 KeyError"""
+        entry = self._load_index().get(str(fund_id))
+        if entry is None:
+            raise KeyError(f"净值库中没有基金: {fund_id}")
+        days_path, navs_path = self._paths(entry)
+        return NavSeries(np.load(days_path, mmap_mode='r'), np.load(navs_path, mmap_mode='r'))
+
+    def remove(self, fund_id):
+        entry = self._load_index().pop(str(fund_id), None)
+        if entry is None:
+            return
+        for path in self._paths(entry):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._save_index()
+
+    def import_file(self, fund_id, file_path, log_callback=None):
+        """解析一个净值文件并写入净值库，返回写入的行数"""
+        log = log_callback if log_callback else log_message
+        series, _ = parse_nav_file(file_path, log)
+        self.put(fund_id, series)
+        log(f"已写入净值库: {fund_id} ({len(series)} 行)", "info")
+        return len(series)
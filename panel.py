@@ -0,0 +1,232 @@
+# panel.py
+import numpy as np
+import pandas as pd
+from core import FIXED_PERIODS
+from nav_series import to_day_number
+from utils import log_message
+
+# 计算区间回撤时每次处理的基金列数，限制临时矩阵的内存
+PANEL_COLUMN_BLOCK = 512
+PANEL_METRICS = ('days', 'annual_return', 'max_drawdown')
+
+def annual_returns(nav_start, nav_end, days):
+    """calculate_annual_return 的向量化版本"""
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        total_return = nav_end / nav_start - 1
+        result = np.power(1 + total_return, 365.0 / days) - 1
+    result = np.where(total_return <= -1.0, -1.0, result)
+    return np.where(days == 0, 0.0, result)
+
+class NavPanel:
+    """多只基金对齐到同一日期轴的面板：日期 × 基金 的净值矩阵，缺失处为 NaN
+
+    另外按基金顺序保存各基金自身数据点的扁平数组（CSR 形式），起始点定位对全部基金、
+    全部周期只做一次 searchsorted，规则与 AnalysisSession 相同（各基金以自己的最后
+    一天为基准，取距离目标日期最近的数据点，距离相同取较晚的一天）。
+    区间最大回撤在矩阵上按列 cummax 计算，窗口外的行用 NaN 屏蔽。
+    """
+
+    # 面板的全部数据数组，可由 from_arrays 重新组装（如多进程共享内存）
+    ARRAY_FIELDS = ('days', 'navs', 'offsets', 'flat_days', 'flat_navs', 'rows')
+
+    def __init__(self, fund_ids, series_list, log_callback=None):
+        lengths = np.array([len(series) for series in series_list], dtype=np.int64)
+        if len(fund_ids) != len(lengths):
+            raise ValueError("基金 ID 与序列数量不一致")
+
+        # 扁平数组：第 j 只基金的数据点位于 offsets[j]:offsets[j + 1]
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        flat_days = np.concatenate([np.asarray(s.days, dtype=np.int64) for s in series_list]) \
+            if series_list else np.empty(0, dtype=np.int64)
+        flat_navs = np.concatenate([np.asarray(s.navs, dtype=np.float64) for s in series_list]) \
+            if series_list else np.empty(0)
+
+        # 公共日期轴与矩阵
+        days = np.unique(flat_days)
+        rows = np.searchsorted(days, flat_days)
+        navs = np.full((len(days), len(lengths)), np.nan)
+        navs[rows, np.repeat(np.arange(len(lengths)), lengths)] = flat_navs
+        self._set_arrays(fund_ids, days, navs, offsets, flat_days, flat_navs, rows, log_callback)
+
+    def _set_arrays(self, fund_ids, days, navs, offsets, flat_days, flat_navs, rows, log_callback=None):
+        self.log = log_callback if log_callback else log_message
+        self.fund_ids = [str(fund_id) for fund_id in fund_ids]
+        self.days, self.navs = days, navs
+        self.offsets, self.flat_days, self.flat_navs, self.rows = offsets, flat_days, flat_navs, rows
+        self.lengths = np.diff(offsets)
+
+        # 在各基金内部有序的复合键：基金序号 × 步长 + 日期偏移
+        if len(days):
+            self._day_base = int(days[0]) - 1
+            self._stride = int(days[-1]) - self._day_base + 2
+        else:
+            self._day_base, self._stride = 0, 1
+        columns = np.repeat(np.arange(len(self.lengths)), self.lengths)
+        self._keys = columns * self._stride + (flat_days - self._day_base)
+        self._fixed_freq = None
+
+    @classmethod
+    def from_arrays(cls, fund_ids, days, navs, offsets, flat_days, flat_navs, rows, log_callback=None):
+        """由已对齐的数组直接组装面板，不复制数据"""
+        panel = cls.__new__(cls)
+        panel._set_arrays(fund_ids, days, navs, offsets, flat_days, flat_navs, rows, log_callback)
+        return panel
+
+    def column_block(self, start, stop):
+        """第 start 到 stop - 1 只基金组成的子面板，矩阵和扁平数组均为视图"""
+        first, last = int(self.offsets[start]), int(self.offsets[stop])
+        return self.from_arrays(self.fund_ids[start:stop], self.days, self.navs[:, start:stop],
+                                self.offsets[start:stop + 1] - first, self.flat_days[first:last],
+                                self.flat_navs[first:last], self.rows[first:last], self.log)
+
+    @classmethod
+    def from_series(cls, series_by_fund, log_callback=None):
+        """由 {基金 ID: NavSeries} 构建面板"""
+        return cls(list(series_by_fund), list(series_by_fund.values()), log_callback)
+
+    @classmethod
+    def from_store(cls, store, fund_ids=None, log_callback=None):
+        """从净值库读取基金（默认全部）构建面板"""
+        fund_ids = store.fund_ids() if fund_ids is None else [str(f) for f in fund_ids]
+        return cls(fund_ids, [store.open(fund_id) for fund_id in fund_ids], log_callback)
+
+    def __len__(self):
+        return len(self.fund_ids)
+
+    @property
+    def dates(self):
+        return pd.DatetimeIndex(self.days.astype('datetime64[D]'))
+
+    def to_frame(self):
+        """日期 × 基金 的净值 DataFrame"""
+        return pd.DataFrame(self.navs, index=self.dates, columns=self.fund_ids)
+
+    # ---- 区间定位 ----
+
+    def _search(self, target_days, side='left'):
+        """在各基金自身的数据点中查找目标日期，target_days 形状为 (基金数, k)，返回扁平索引"""
+        funds = np.arange(len(self.fund_ids))[:, None]
+        # 目标日期裁剪到日期轴两侧之外一天，不改变各基金内部的查找结果
+        offsets = np.clip(target_days, self._day_base, self._day_base + self._stride - 1) - self._day_base
+        return np.searchsorted(self._keys, funds * self._stride + offsets, side=side)
+
+    def _nearest(self, target_days):
+        """各基金距离目标日期最近的数据点（距离相同取较晚的一天），返回扁平索引"""
+        # 没有数据的基金指向任意有效位置，由调用方按 lengths 屏蔽
+        first = np.minimum(self.offsets[:-1, None], max(len(self.flat_days) - 1, 0))
+        last = np.maximum(self.offsets[1:, None] - 1, first)
+        idx = np.minimum(self._search(target_days), last)
+        prev = np.maximum(idx - 1, first)
+        if len(self.flat_days) == 0:
+            return idx
+        closer_prev = (idx > first) & ((self.flat_days[idx] - target_days) > (target_days - self.flat_days[prev]))
+        return np.where(closer_prev, prev, idx)
+
+    def _max_drawdowns(self, start_rows, end_rows):
+        """各基金在矩阵行区间 [start_rows[j], end_rows[j]] 内的最大回撤，区间无效的基金为 NaN"""
+        n_funds = len(self.fund_ids)
+        result = np.full(n_funds, np.nan)
+        for first in range(0, n_funds, PANEL_COLUMN_BLOCK):
+            cols = slice(first, min(first + PANEL_COLUMN_BLOCK, n_funds))
+            lo_rows, hi_rows = start_rows[cols], end_rows[cols]
+            valid = hi_rows >= lo_rows
+            if not valid.any():
+                continue
+            lo, hi = int(lo_rows[valid].min()), int(hi_rows[valid].max())
+            block = self.navs[lo:hi + 1, cols].copy()
+            t = np.arange(lo, hi + 1)[:, None]
+            block[(t < lo_rows) | (t > hi_rows)] = np.nan
+            # fmax 忽略 NaN：缺失日期不影响运行高点，全部缺失的列结果为 NaN
+            cummax = np.fmax.accumulate(block, axis=0)
+            dd = np.fmax.reduce((cummax - block) / cummax, axis=0)
+            result[cols] = np.where(valid, dd, np.nan)
+        return result
+
+    def _window_metrics(self, start_idx, end_idx):
+        """由扁平起止索引计算 (实际天数, 年化收益, 最大回撤)，均为长度为基金数的数组"""
+        days_actual = self.flat_days[end_idx] - self.flat_days[start_idx]
+        annual_return = annual_returns(self.flat_navs[start_idx], self.flat_navs[end_idx], days_actual)
+        max_drawdown = self._max_drawdowns(self.rows[start_idx], self.rows[end_idx])
+        return days_actual, annual_return, max_drawdown
+
+    # ---- 业绩指标 ----
+
+    def fixed_freq_metrics(self):
+        """全部基金的固定周期与成立以来指标
+
+        返回以基金 ID 为索引、列为 (周期, 指标) 的 DataFrame，指标为 days / annual_return /
+        max_drawdown（数值，回撤为正数）；与单只基金的 calculate_fixed_freq 显示 '/' 的情况
+        对应的位置为 NaN。
+        """
+        if self._fixed_freq is not None:
+            return self._fixed_freq
+
+        has_data = self.lengths > 0
+        last_idx = np.maximum(self.offsets[1:] - 1, 0)
+        first_idx = np.minimum(self.offsets[:-1], max(len(self.flat_days) - 1, 0))
+        if len(self.flat_days) == 0:
+            columns = pd.MultiIndex.from_product([list(FIXED_PERIODS) + ["成立以来"], PANEL_METRICS])
+            self._fixed_freq = pd.DataFrame(np.nan, index=self.fund_ids, columns=columns)
+            return self._fixed_freq
+
+        periods = np.fromiter(FIXED_PERIODS.values(), dtype=np.int64)
+        targets = self.flat_days[last_idx][:, None] - periods[None, :]
+        start_idx = self._nearest(targets)
+
+        data = {}
+        for k, (name, period) in enumerate(FIXED_PERIODS.items()):
+            days_actual, annual_return, max_drawdown = self._window_metrics(start_idx[:, k], last_idx)
+            ok = has_data & (last_idx - start_idx[:, k] >= 1) & (days_actual >= period * 0.9)
+            data[(name, 'days')] = np.where(ok, days_actual, np.nan)
+            data[(name, 'annual_return')] = np.where(ok, annual_return, np.nan)
+            data[(name, 'max_drawdown')] = np.where(ok, max_drawdown, np.nan)
+
+        days_actual, annual_return, max_drawdown = self._window_metrics(first_idx, last_idx)
+        ok = has_data & (days_actual > 0) & (self.lengths > 1)
+        data[("成立以来", 'days')] = np.where(ok, days_actual, np.nan)
+        data[("成立以来", 'annual_return')] = np.where(ok, annual_return, np.nan)
+        data[("成立以来", 'max_drawdown')] = np.where(ok, max_drawdown, np.nan)
+
+        self._fixed_freq = pd.DataFrame(data, index=self.fund_ids)
+        self._fixed_freq.columns = pd.MultiIndex.from_tuples(self._fixed_freq.columns)
+        return self._fixed_freq
+
+    def custom_range_metrics(self, start_date, end_date):
+        """全部基金在 [start_date, end_date] 内的指标，区间内天数不足的基金为 NaN
+
+        返回以基金 ID 为索引的 DataFrame，列为 actual_start_date / actual_end_date / days /
+        annual_return / max_drawdown。
+        """
+        columns = ['actual_start_date', 'actual_end_date'] + list(PANEL_METRICS)
+        if len(self.flat_days) == 0:
+            return pd.DataFrame(np.nan, index=self.fund_ids, columns=columns)
+
+        n_funds = len(self.fund_ids)
+        start_idx = self._search(np.full((n_funds, 1), int(to_day_number(start_date))), 'left')[:, 0]
+        end_idx = self._search(np.full((n_funds, 1), int(to_day_number(end_date))), 'right')[:, 0] - 1
+        ok = (start_idx < self.offsets[1:]) & (end_idx >= start_idx)
+        # 无效区间先指向第一个数据点，结果最后统一置为 NaN
+        start_idx = np.where(ok, start_idx, 0)
+        end_idx = np.where(ok, end_idx, 0)
+
+        days_actual, annual_return, max_drawdown = self._window_metrics(start_idx, end_idx)
+        ok &= days_actual > 1
+        return pd.DataFrame({
+            'actual_start_date': pd.DatetimeIndex(self.flat_days[start_idx].astype('datetime64[D]')).where(ok),
+            'actual_end_date': pd.DatetimeIndex(self.flat_days[end_idx].astype('datetime64[D]')).where(ok),
+            'days': np.where(ok, days_actual, np.nan),
+            'annual_return': np.where(ok, annual_return, np.nan),
+            'max_drawdown': np.where(ok, max_drawdown, np.nan)
+        }, index=self.fund_ids, columns=columns)
+
+    def fixed_freq_results(self, fund_id):
+        """某只基金与 AnalysisSession.calculate_fixed_freq 格式相同的结果列表"""
+        row = self.fixed_freq_metrics().loc[str(fund_id)]
+        results = []
+        for name in list(FIXED_PERIODS) + ["成立以来"]:
+            if np.isnan(row[(name, 'days')]):
+                results.append((name, '/', '/', '/'))
+            else:
+                results.append((name, int(row[(name, 'days')]), f"{row[(name, 'annual_return')]:.2%}",
+                                f"-{row[(name, 'max_drawdown')]:.2%}"))
+        return results
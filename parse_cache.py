@@ -0,0 +1,247 @@
+# parse_cache.py
+import os
+import json
+import time
+import hashlib
+import numpy as np
+from nav_series import NavSeries
+from utils import log_message
+
+# 缓存目录名，位于配置文件所在目录
+PARSE_CACHE_DIRNAME = ".performance_tool_cache"
+INDEX_FILENAME = "index.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+# 增量追加的尾部分片超过该数量时合并为一个文件
+MAX_APPEND_PARTS = 32
+
+def file_content_hash(path):
+    """按块计算文件内容的 blake2b 哈希"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class ParseCache:
+    """已清洗日期/净值数组的磁盘缓存
+
+    每个源文件对应一个 .npz（days、navs 两个数组），index.json 记录
+    路径、大小、修改时间、内容哈希、最近使用时间以及 CSV 增量导入状态。路径+大小+修改时间一致时直接命中，
+    不读源文件；否则计算内容哈希，内容相同（如复制、重新保存）的文件也能命中。
+    CSV 追加新行后由 append() 只写入新增部分的分片文件，读取时与主文件拼接。
+    总大小超过上限时按最近使用时间淘汰。缓存出错只记录日志，不影响正常导入。
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, INDEX_FILENAME)
+        self._index = None
+
+    @classmethod
+    def from_config(cls, config):
+        """根据 Config 创建缓存，目录位于配置文件旁边"""
+        cache_dir = os.path.join(os.path.dirname(config.config_file), PARSE_CACHE_DIRNAME)
+        max_mb = config.get("parse_cache_max_mb", 256)
+        return cls(cache_dir, int(max_mb * 1024 * 1024))
+
+    # ---- 索引读写 ----
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (IOError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _stat_key(path):
+        st = os.stat(path)
+        return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+    def _find(self, path):
+        """查找缓存条目，返回 (条目ID, 条目, 内容哈希)；未命中时条目为 None"""
+        index = self._load_index()
+        abs_path, size, mtime_ns = self._stat_key(path)
+
+        for entry_id, entry in index.items():
+            if entry["path"] == abs_path and entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+                return entry_id, entry, entry["hash"]
+
+        content_hash = file_content_hash(path)
+        for entry_id, entry in index.items():
+            if entry["hash"] == content_hash and entry["size"] == size:
+                return entry_id, entry, content_hash
+        return None, None, content_hash
+
+    # ---- 对外接口 ----
+
+    @staticmethod
+    def _entry_files(entry):
+        return [entry["file"]] + entry.get("parts", [])
+
+    def _load_series(self, entry):
+        days, navs = [], []
+        for filename in self._entry_files(entry):
+            with np.load(os.path.join(self.cache_dir, filename)) as data:
+                days.append(data["days"])
+                navs.append(data["navs"])
+        if len(days) == 1:
+            return NavSeries(days[0], navs[0])
+        return NavSeries(np.concatenate(days), np.concatenate(navs))
+
+    def _write_arrays(self, filename, days, navs):
+        """原子地写入一个 .npz，返回文件大小"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, filename)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, days=days, navs=navs)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def lookup(self, path, log_callback=None):
+        """返回 (NavSeries 或 None, 内容哈希, CSV 增量状态字典或 None)
+
+        内容哈希可在未命中时传给 store() 复用。
+        """
+        log = log_callback if log_callback else log_message
+        try:
+            entry_id, entry, content_hash = self._find(path)
+            if entry is None:
+                return None, content_hash, None
+
+            series = self._load_series(entry)
+            abs_path, size, mtime_ns = self._stat_key(path)
+            entry.update(path=abs_path, size=size, mtime_ns=mtime_ns, last_used=time.time())
+            self._save_index()
+            return series, content_hash, entry.get("csv_state")
+        except (OSError, ValueError, KeyError) as e:
+            log(f"读取解析缓存失败，将重新解析: {str(e)}", "warning")
+            return None, None, None
+
+    def stale_entry(self, path, log_callback=None):
+        """同一路径的文件已变化（大小或修改时间不同）时，返回旧的 (NavSeries, CSV 增量状态字典)
+
+        供增量导入使用：旧数组加上新增尾部即为新数据。没有这样的条目时返回 (None, None)。
+        """
+        log = log_callback if log_callback else log_message
+        try:
+            abs_path, size, mtime_ns = self._stat_key(path)
+            for entry in self._load_index().values():
+                if entry["path"] != abs_path:
+                    continue
+                if entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+                    break
+                if entry.get("csv_state"):
+                    return self._load_series(entry), entry["csv_state"]
+            return None, None
+        except (OSError, ValueError, KeyError) as e:
+            log(f"读取解析缓存失败，将重新解析: {str(e)}", "warning")
+            return None, None
+
+    def store(self, path, series, content_hash=None, log_callback=None, csv_state=None):
+        """写入某个源文件的解析结果（可附带 CSV 增量导入状态），并按容量淘汰旧条目"""
+        log = log_callback if log_callback else log_message
+        try:
+            if content_hash is None:
+                content_hash = file_content_hash(path)
+            abs_path, size, mtime_ns = self._stat_key(path)
+            index = self._load_index()
+
+            # 同一路径只保留最新一份
+            for entry_id in [k for k, v in index.items() if v["path"] == abs_path]:
+                self._remove(entry_id)
+
+            filename = f"{content_hash}.npz"
+            index[content_hash] = {
+                "path": abs_path,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "hash": content_hash,
+                "file": filename,
+                "bytes": self._write_arrays(filename, series.days, series.navs),
+                "last_used": time.time(),
+                "csv_state": csv_state
+            }
+            self._evict()
+            self._save_index()
+        except (OSError, ValueError) as e:
+            log(f"写入解析缓存失败: {str(e)}", "warning")
+
+    def append(self, path, tail, csv_state, log_callback=None):
+        """CSV 追加新行后更新同一路径的缓存条目，返回是否成功；没有该路径的条目时返回 False
+
+        只把新增的 tail 写为分片文件并更新索引中的大小、修改时间和增量状态，不重写已有数组，
+        也不计算整个源文件的哈希；分片超过 MAX_APPEND_PARTS 个时合并一次。
+        """
+        log = log_callback if log_callback else log_message
+        try:
+            abs_path, size, mtime_ns = self._stat_key(path)
+            index = self._load_index()
+            entry = next((v for v in index.values() if v["path"] == abs_path), None)
+            if entry is None:
+                return False
+
+            base = os.path.splitext(entry["file"])[0].split("-")[0]
+            parts = entry.setdefault("parts", [])
+            if len(tail):
+                filename = f"{base}-{time.time_ns()}.npz"
+                entry["bytes"] += self._write_arrays(filename, tail.days, tail.navs)
+                parts.append(filename)
+
+            if len(parts) > MAX_APPEND_PARTS:
+                series = self._load_series(entry)
+                old_files = self._entry_files(entry)
+                filename = f"{base}-{time.time_ns()}.npz"
+                entry["bytes"] = self._write_arrays(filename, series.days, series.navs)
+                entry["file"], entry["parts"] = filename, []
+                for old in old_files:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, old))
+                    except OSError:
+                        pass
+
+            # 内容已变化，不再参与按内容哈希的匹配
+            entry.update(size=size, mtime_ns=mtime_ns, hash=None, last_used=time.time(), csv_state=csv_state)
+            self._evict()
+            self._save_index()
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            log(f"写入解析缓存失败: {str(e)}", "warning")
+            return False
+
+    def _remove(self, entry_id):
+        entry = self._index.pop(entry_id)
+        for filename in self._entry_files(entry):
+            try:
+                os.remove(os.path.join(self.cache_dir, filename))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """总大小超过上限时，从最久未使用的条目开始删除"""
+        total = sum(entry["bytes"] for entry in self._index.values())
+        for entry_id, entry in sorted(self._index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["bytes"]
+            self._remove(entry_id)
+
+    def clear(self):
+        """删除全部缓存文件"""
+        for entry_id in list(self._load_index()):
+            self._remove(entry_id)
+        try:
+            self._save_index()
+        except OSError:
+            pass
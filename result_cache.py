@@ -0,0 +1,74 @@
+# result_cache.py
+from collections import OrderedDict
+import hashlib
+import threading
+import numpy as np
+
+def dataset_fingerprint(days, navs):
+    """根据日序号和净值数组内容计算数据集指纹（直接读取数组缓冲区，内存映射数组不会整体载入）"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(days))
+    h.update(np.ascontiguousarray(navs))
+    return h.hexdigest()
+
+def extend_fingerprint(fingerprint, days, navs):
+    """在已有指纹基础上链式加入追加的数据，代价只与新增部分成正比"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(fingerprint.encode())
+    h.update(days.tobytes())
+    h.update(navs.tobytes())
+    return h.hexdigest()
+
+class ResultCache:
+    """按 (数据集指纹, 结果类型, 区间) 缓存分析结果，超出容量时淘汰最久未使用的条目
+
+    后台导入线程会预先写入结果，读写均加锁；compute() 在锁外执行。
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """读取缓存，命中时将条目移到最近使用的位置"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """写入缓存，并淘汰超出容量的最旧条目"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """命中时直接返回缓存结果，否则调用 compute() 计算并写入缓存"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, fingerprint):
+        """删除某个数据集的全部缓存条目"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == fingerprint]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_MISSING = object()
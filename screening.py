@@ -0,0 +1,104 @@
+# screening.py
+import numpy as np
+from core import FIXED_PERIODS
+
+# 可用于排序和筛选的指标名称
+METRIC_LABELS = {
+    'annual_return': '年化收益',
+    'max_drawdown': '最大回撤',
+    'days': '天数'
+}
+FILTER_OPERATORS = ('>=', '<=')
+# 缓存的筛选条件掩码数量
+MASK_CACHE_SIZE = 64
+
+class FundScreener:
+    """基于预先计算的指标向量对大量基金进行筛选和排序
+
+    构建时把面板指标表的每一列取出为独立的 float64 向量，之后的筛选、排序都只在这些
+    向量上进行，不再重算指标：单个条件的布尔掩码按 (指标, 运算符, 阈值) 缓存，
+    前 K 名用 np.argpartition 选出后只对这 K 个排序；需要完整排序时按指标缓存排序结果，
+    条件变化后只需按掩码过滤。指标值为 NaN（数据不足）的基金不参与排序。
+    """
+
+    def __init__(self, fund_ids, metrics):
+        self.fund_ids = list(fund_ids)
+        # {(周期, 指标): 向量}
+        self.metrics = {key: np.asarray(values, dtype=np.float64) for key, values in metrics.items()}
+        self._masks = {}
+        self._orders = {}
+
+    @classmethod
+    def from_panel(cls, panel):
+        """由 NavPanel 的固定周期指标表构建"""
+        table = panel.fixed_freq_metrics()
+        return cls(table.index, {key: table[key].to_numpy() for key in table.columns})
+
+    def __len__(self):
+        return len(self.fund_ids)
+
+    def metric_keys(self):
+        """按周期顺序列出可用的 (周期, 指标)"""
+        order = {name: i for i, name in enumerate(list(FIXED_PERIODS) + ["成立以来"])}
+        return sorted(self.metrics, key=lambda key: (order.get(key[0], len(order)), key[1]))
+
+    def _condition_mask(self, key, operator, threshold):
+        cache_key = (key, operator, float(threshold))
+        mask = self._masks.get(cache_key)
+        if mask is None:
+            values = self.metrics[key]
+            if operator == '>=':
+                mask = values >= threshold
+            elif operator == '<=':
+                mask = values <= threshold
+            else:
+                raise ValueError(f"不支持的筛选条件: {operator}")
+            if len(self._masks) >= MASK_CACHE_SIZE:
+                self._masks.pop(next(iter(self._masks)))
+            self._masks[cache_key] = mask
+        return mask
+
+    def filter_mask(self, filters=()):
+        """多个 (指标, 运算符, 阈值) 条件同时满足的掩码；NaN 不满足任何条件"""
+        mask = np.ones(len(self.fund_ids), dtype=bool)
+        for key, operator, threshold in filters:
+            mask &= self._condition_mask(key, operator, threshold)
+        return mask
+
+    def _full_order(self, key, descending):
+        """按某个指标排序的全部基金索引（NaN 排在最后），按 (指标, 方向) 缓存"""
+        cache_key = (key, descending)
+        order = self._orders.get(cache_key)
+        if order is None:
+            values = self.metrics[key]
+            order = np.argsort(-values if descending else values, kind='stable')
+            self._orders[cache_key] = order
+        return order
+
+    def rank(self, key, descending=True, top_k=None, filters=()):
+        """返回满足条件、按指标排序的基金索引数组；top_k 为 None 时返回全部"""
+        values = self.metrics[key]
+        mask = self.filter_mask(filters) & ~np.isnan(values)
+
+        order = self._orders.get((key, descending))
+        if order is not None or top_k is None:
+            # 已有完整排序时只按掩码过滤，O(n) 不再排序
+            order = self._full_order(key, descending)
+            selected = order[mask[order]]
+            return selected if top_k is None else selected[:top_k]
+
+        candidates = np.flatnonzero(mask)
+        scores = -values[candidates] if descending else values[candidates]
+        if top_k < len(candidates):
+            part = np.argpartition(scores, top_k - 1)[:top_k]
+            candidates, scores = candidates[part], scores[part]
+        return candidates[np.argsort(scores, kind='stable')]
+
+    def count(self, key, filters=()):
+        """满足条件且该指标有值的基金数"""
+        return int(np.count_nonzero(self.filter_mask(filters) & ~np.isnan(self.metrics[key])))
+
+    def rows(self, indices, keys):
+        """取出若干基金的 (基金 ID, 各指标值...) 行，供列表显示"""
+        columns = [self.metrics[key][indices] for key in keys]
+        return [(self.fund_ids[i], *values) for i, values in zip(indices.tolist(), zip(*columns))]
@@ -0,0 +1,350 @@
+# screening_window.py
+import os
+import queue
+import threading
+import numpy as np
+import tkinter as tk
+from tkinter import ttk, filedialog
+from import_pipeline import parse_nav_file
+from folder_watcher import WATCH_EXTENSIONS
+from nav_store import NavStore
+from panel import NavPanel
+from screening import FundScreener, METRIC_LABELS, FILTER_OPERATORS
+
+# 列表一次显示的行数，只为这些行创建 Treeview 项目
+VISIBLE_ROWS = 18
+# 后台加载队列的轮询间隔（毫秒）
+LOAD_POLL_INTERVAL_MS = 100
+# 结果列表中固定显示的指标
+DISPLAY_KEYS = [("近1年", "annual_return"), ("成立以来", "annual_return"), ("成立以来", "max_drawdown")]
+
+def metric_label(key):
+    return f"{key[0]} {METRIC_LABELS.get(key[1], key[1])}"
+
+def format_metric(key, value):
+    if np.isnan(value):
+        return '/'
+    if key[1] == 'days':
+        return str(int(value))
+    if key[1] == 'max_drawdown':
+        return f"-{value:.2%}"
+    return f"{value:.2%}"
+
+class ScreeningWindow:
+    """基金筛选窗口：从净值库或目录批量加载基金，按指标排序、按阈值筛选并显示前 K 名
+
+    指标在加载时一次性计算（NavPanel），之后排序和筛选都由 FundScreener 在缓存的指标
+    向量上完成。结果列表是虚拟化的：Treeview 只保留 VISIBLE_ROWS 个项目，滚动时改写
+    它们的内容，结果再多也不会创建大量控件。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.config = app.config
+        self.window = None
+        self.screener = None
+        self.results = np.empty(0, dtype=np.int64)
+        self.offset = 0
+        self._keys = []
+        self._sort_key = None
+        self._filters = []
+        self._load_thread = None
+        self._load_queue = queue.Queue()
+        self._update_id = None
+
+    def show(self):
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        window = tk.Toplevel(self.app.root)
+        self.window = window
+        window.title("基金筛选")
+        window.geometry("620x600")
+        window.resizable(False, True)
+        window.transient(self.app.root)
+        window.configure(bg=self.config.colors["background"])
+        self.app.center_window_relative(window, self.app.root)
+        window.protocol("WM_DELETE_WINDOW", self.close)
+
+        main_frame = ttk.Frame(window, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # 数据来源
+        source_frame = ttk.LabelFrame(main_frame, text="基金数据", padding=5)
+        source_frame.pack(fill=tk.X)
+        ttk.Button(source_frame, text="从净值库加载", command=self.load_from_store, width=12).pack(side=tk.LEFT)
+        ttk.Button(source_frame, text="从目录加载", command=self.load_from_directory, width=12).pack(side=tk.LEFT, padx=5)
+        self.status_var = tk.StringVar(value="未加载数据")
+        ttk.Label(source_frame, textvariable=self.status_var).pack(side=tk.LEFT, padx=5)
+
+        # 排序
+        sort_frame = ttk.LabelFrame(main_frame, text="排序", padding=5)
+        sort_frame.pack(fill=tk.X, pady=(5, 0))
+        self.sort_var = tk.StringVar()
+        self.sort_combo = ttk.Combobox(sort_frame, textvariable=self.sort_var, state="readonly", width=18)
+        self.sort_combo.pack(side=tk.LEFT)
+        self.order_var = tk.StringVar(value="降序")
+        ttk.Combobox(sort_frame, textvariable=self.order_var, values=["降序", "升序"],
+                     state="readonly", width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Label(sort_frame, text="前").pack(side=tk.LEFT, padx=(10, 0))
+        self.top_k_var = tk.StringVar(value="100")
+        ttk.Spinbox(sort_frame, from_=1, to=100000, textvariable=self.top_k_var, width=7).pack(side=tk.LEFT, padx=2)
+        ttk.Label(sort_frame, text="名").pack(side=tk.LEFT)
+        ttk.Button(sort_frame, text="添加条件", command=self.add_filter, width=10).pack(side=tk.RIGHT)
+
+        # 筛选条件
+        self.filter_frame = ttk.LabelFrame(main_frame, text="筛选条件（收益和回撤单位为 %）", padding=5)
+        self.filter_frame.pack(fill=tk.X, pady=(5, 0))
+
+        # 结果列表
+        result_frame = ttk.Frame(main_frame)
+        result_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True, pady=(5, 0))
+        self.count_var = tk.StringVar(value="")
+        ttk.Label(result_frame, textvariable=self.count_var).pack(anchor=tk.W)
+
+        columns = ["rank", "fund", "sort"] + [f"m{i}" for i in range(len(DISPLAY_KEYS))]
+        self.tree = ttk.Treeview(result_frame, columns=columns, show="headings", height=VISIBLE_ROWS, selectmode="browse")
+        self.tree.heading("rank", text="排名")
+        self.tree.heading("fund", text="基金")
+        self.tree.heading("sort", text="排序指标")
+        self.tree.column("rank", width=45, anchor=tk.CENTER)
+        self.tree.column("fund", width=160, anchor=tk.W)
+        self.tree.column("sort", width=90, anchor=tk.CENTER)
+        for i, key in enumerate(DISPLAY_KEYS):
+            self.tree.heading(f"m{i}", text=metric_label(key))
+            self.tree.column(f"m{i}", width=95, anchor=tk.CENTER)
+
+        self.scrollbar = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+        # 预先创建固定数量的项目，滚动时只改写内容
+        self._items = [self.tree.insert("", tk.END, values=()) for _ in range(VISIBLE_ROWS)]
+
+        for var in (self.sort_var, self.order_var, self.top_k_var):
+            var.trace_add("write", lambda *args: self.schedule_update())
+
+        if self.screener is not None:
+            self._set_screener(self.screener)
+
+    def close(self):
+        if self._update_id is not None:
+            self.window.after_cancel(self._update_id)
+            self._update_id = None
+        self.window.destroy()
+        self.window = None
+        self._filters = []
+
+    # ---- 加载 ----
+
+    def load_from_store(self):
+        store = NavStore.from_config(self.config)
+        if len(store) == 0:
+            self.app.window_utils.show_custom_message("提示", "净值库中没有基金")
+            return
+        self._start_load(self._load_store_worker, (store,))
+
+    def load_from_directory(self):
+        directory = filedialog.askdirectory(parent=self.window, title="选择基金数据目录")
+        if not directory:
+            return
+        files = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                       if name.lower().endswith(WATCH_EXTENSIONS))
+        if not files:
+            self.app.window_utils.show_custom_message("提示", "目录中没有数据文件")
+            return
+        self._start_load(self._load_files_worker, (files,))
+
+    def _start_load(self, target, args):
+        if self._load_thread is not None and self._load_thread.is_alive():
+            self.app.log("基金数据正在加载，请稍候", "warning")
+            return
+        self.status_var.set("正在加载...")
+        self._load_thread = threading.Thread(target=target, args=args, daemon=True)
+        self._load_thread.start()
+        self.app.root.after(LOAD_POLL_INTERVAL_MS, self._poll_load_queue)
+
+    def _load_store_worker(self, store):
+        """后台线程：以内存映射方式打开净值库中的全部基金并计算指标"""
+        try:
+            panel = NavPanel.from_store(store)
+            self._load_queue.put(("done", FundScreener.from_panel(panel), []))
+        except Exception as e:
+            self._load_queue.put(("error", str(e), None))
+
+    def _load_files_worker(self, files):
+        """后台线程：逐个解析目录中的文件并计算指标，解析失败的文件跳过
+
+        解析成功的基金同时写入净值库，之后可直接"从净值库加载"。无论成功与否最后都会发送
+        "done" 或 "error" 消息，界面才会停止轮询。
+        """
+        try:
+            series_by_fund, failures = {}, []
+            store = NavStore.from_config(self.config)
+            store_entries = {}
+            quiet = lambda message, message_type="info": None
+            for i, path in enumerate(files, 1):
+                name = os.path.splitext(os.path.basename(path))[0]
+                try:
+                    series, _ = parse_nav_file(path, quiet)
+                    series_by_fund[name] = series
+                    store_entries[name] = store.write_series(name, series)
+                except Exception as e:
+                    # 单个文件的任何异常都只跳过该文件
+                    failures.append(f"{os.path.basename(path)}: {e}")
+                self._load_queue.put(("progress", f"正在解析 {i}/{len(files)}", None))
+            try:
+                store.add_entries(store_entries)
+            except Exception as e:
+                self._load_queue.put(("warning", f"写入净值库失败: {e}", None))
+
+            panel = NavPanel.from_series(series_by_fund)
+            self._load_queue.put(("done", FundScreener.from_panel(panel), failures))
+        except Exception as e:
+            self._load_queue.put(("error", str(e), None))
+
+    def _poll_load_queue(self):
+        while True:
+            try:
+                kind, value, extra = self._load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                if self.window is not None:
+                    self.status_var.set(value)
+            elif kind == "warning":
+                self.app.log(value, "warning")
+            elif kind == "error":
+                self.app.log(f"加载基金数据失败: {value}", "error")
+                if self.window is not None:
+                    self.status_var.set("加载失败")
+                return
+            else:
+                for message in extra:
+                    self.app.log(f"跳过文件 {message}", "warning")
+                self.app.log(f"已加载 {len(value)} 只基金用于筛选", "success")
+                if self.window is not None:
+                    self._set_screener(value)
+                else:
+                    self.screener = value
+                return
+        self.app.root.after(LOAD_POLL_INTERVAL_MS, self._poll_load_queue)
+
+    def _set_screener(self, screener):
+        self.screener = screener
+        self._keys = screener.metric_keys()
+        self.status_var.set(f"共 {len(screener)} 只基金")
+        labels = [metric_label(key) for key in self._keys]
+        self.sort_combo.config(values=labels)
+        for row in self._filters:
+            row[1].config(values=labels)
+        default = metric_label(("近1年", "annual_return"))
+        self.sort_var.set(default if default in labels else labels[0])
+        self.schedule_update()
+
+    # ---- 筛选条件 ----
+
+    def add_filter(self):
+        row_frame = ttk.Frame(self.filter_frame)
+        row_frame.pack(fill=tk.X, pady=1)
+        metric_var = tk.StringVar()
+        operator_var = tk.StringVar(value=FILTER_OPERATORS[0])
+        value_var = tk.StringVar()
+        labels = [metric_label(key) for key in self._keys]
+        metric_combo = ttk.Combobox(row_frame, textvariable=metric_var, values=labels, state="readonly", width=18)
+        metric_combo.pack(side=tk.LEFT)
+        ttk.Combobox(row_frame, textvariable=operator_var, values=FILTER_OPERATORS,
+                     state="readonly", width=4).pack(side=tk.LEFT, padx=5)
+        ttk.Entry(row_frame, textvariable=value_var, width=10).pack(side=tk.LEFT)
+        row = (row_frame, metric_combo, metric_var, operator_var, value_var)
+        ttk.Button(row_frame, text="删除", width=6, command=lambda: self.remove_filter(row)).pack(side=tk.RIGHT)
+        self._filters.append(row)
+        for var in (metric_var, operator_var, value_var):
+            var.trace_add("write", lambda *args: self.schedule_update())
+
+    def remove_filter(self, row):
+        row[0].destroy()
+        self._filters.remove(row)
+        self.schedule_update()
+
+    def _current_filters(self):
+        """把界面上填写完整的条件转换为 (指标, 运算符, 阈值)，百分比换算为小数"""
+        keys = {metric_label(key): key for key in self._keys}
+        filters = []
+        for _, _, metric_var, operator_var, value_var in self._filters:
+            key = keys.get(metric_var.get())
+            try:
+                threshold = float(value_var.get())
+            except ValueError:
+                continue
+            if key is None:
+                continue
+            if key[1] != 'days':
+                threshold /= 100
+            filters.append((key, operator_var.get(), threshold))
+        return filters
+
+    # ---- 结果列表 ----
+
+    def schedule_update(self):
+        """合并连续的输入变化，在空闲时更新一次结果"""
+        if self.window is None or self._update_id is not None:
+            return
+        self._update_id = self.window.after_idle(self.update_results)
+
+    def update_results(self):
+        self._update_id = None
+        if self.screener is None:
+            return
+        key = {metric_label(k): k for k in self._keys}.get(self.sort_var.get())
+        if key is None:
+            return
+        try:
+            top_k = max(int(self.top_k_var.get()), 1)
+        except ValueError:
+            return
+        filters = self._current_filters()
+        self._sort_key = key
+        self.results = self.screener.rank(key, self.order_var.get() == "降序", top_k, filters)
+        total = self.screener.count(key, filters)
+        self.count_var.set(f"符合条件 {total} 只，显示前 {len(self.results)} 名")
+        self.scroll_to(0)
+
+    def scroll_to(self, offset):
+        max_offset = max(len(self.results) - VISIBLE_ROWS, 0)
+        self.offset = min(max(int(offset), 0), max_offset)
+        self._render()
+
+    def on_scroll(self, action, value, unit=None):
+        """滚动条回调：拖动 (moveto) 或按行/页滚动 (scroll)"""
+        if action == "moveto":
+            self.scroll_to(float(value) * len(self.results))
+        elif action == "scroll":
+            step = VISIBLE_ROWS if unit == "pages" else 1
+            self.scroll_to(self.offset + int(value) * step)
+
+    def on_mousewheel(self, event):
+        self.scroll_to(self.offset - int(event.delta / 120) * 3)
+        return "break"
+
+    def _render(self):
+        """只改写可见的 VISIBLE_ROWS 行"""
+        visible = self.results[self.offset:self.offset + VISIBLE_ROWS]
+        keys = [self._sort_key] + DISPLAY_KEYS
+        rows = self.screener.rows(visible, keys) if len(visible) else []
+        for i, item in enumerate(self._items):
+            if i < len(rows):
+                fund_id, *values = rows[i]
+                formatted = [format_metric(key, value) for key, value in zip(keys, values)]
+                self.tree.item(item, values=(self.offset + i + 1, fund_id, *formatted))
+            else:
+                self.tree.item(item, values=())
+
+        total = len(self.results)
+        if total > VISIBLE_ROWS:
+            self.scrollbar.set(self.offset / total, (self.offset + VISIBLE_ROWS) / total)
+        else:
+            self.scrollbar.set(0, 1)
@@ -0,0 +1,137 @@
+# shared_panel.py
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from panel import NavPanel
+
+# 每个任务处理的基金数
+DEFAULT_BLOCK_FUNDS = 256
+
+# 工作进程中已附加的共享面板：(SharedMemory 列表, NavPanel)
+_worker_state = None
+
+def _attach(descriptor):
+    """按描述附加共享内存，返回 (SharedMemory 列表, 数组字典)，数组直接映射共享内存，不复制"""
+    blocks, arrays = [], {}
+    for field, (name, shape, dtype) in descriptor.items():
+        if name is None:
+            arrays[field] = np.empty(shape, dtype=dtype)
+            continue
+        # 进程池的工作进程与主进程共用 resource_tracker，由主进程在 close() 中统一释放
+        shm = shared_memory.SharedMemory(name=name)
+        blocks.append(shm)
+        arrays[field] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return blocks, arrays
+
+def _init_worker(fund_ids, descriptor):
+    """进程池初始化：每个工作进程只附加一次"""
+    global _worker_state
+    blocks, arrays = _attach(descriptor)
+    _worker_state = (blocks, NavPanel.from_arrays(fund_ids, **arrays))
+
+def _run_job(panel, job, args):
+    """在（子）面板上执行任务，只返回小的结果数组"""
+    if job == 'fixed_freq':
+        return panel.fixed_freq_metrics().to_numpy()
+    if job == 'custom_range':
+        results = np.empty((len(args), 2, len(panel)))
+        for i, (start_date, end_date) in enumerate(args):
+            table = panel.custom_range_metrics(start_date, end_date)
+            results[i, 0] = table['annual_return'].to_numpy()
+            results[i, 1] = table['max_drawdown'].to_numpy()
+        return results
+    raise ValueError(f"未知的面板任务: {job}")
+
+def _shared_task(start, stop, job, args):
+    """共享内存模式的任务：只传入列范围"""
+    return _run_job(_worker_state[1].column_block(start, stop), job, args)
+
+def _pickled_task(fund_ids, arrays, job, args):
+    """序列化模式的任务：子面板的数组随任务一起序列化传给工作进程"""
+    return _run_job(NavPanel.from_arrays(fund_ids, **arrays), job, args)
+
+class SharedPanelExecutor:
+    """在多个进程中按基金分块计算面板指标
+
+    shared=True（默认）时把面板的矩阵和扁平数组放入 multiprocessing.shared_memory，
+    工作进程在初始化时附加一次，任务只传递列范围，返回小的结果数组；
+    shared=False 时每个任务序列化对应子面板的数组，用于对比。
+    须在 with 语句中使用，退出时释放共享内存。
+    """
+
+    def __init__(self, panel, max_workers=None, block_funds=DEFAULT_BLOCK_FUNDS, shared=True):
+        self.panel = panel
+        self.max_workers = max_workers or os.cpu_count()
+        self.block_funds = block_funds
+        self.shared = shared
+        self._blocks = []
+        self._executor = None
+
+    def __enter__(self):
+        if self.shared:
+            descriptor = self._share_arrays()
+            self._executor = ProcessPoolExecutor(self.max_workers, initializer=_init_worker,
+                                                 initargs=(self.panel.fund_ids, descriptor))
+        else:
+            self._executor = ProcessPoolExecutor(self.max_workers)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _share_arrays(self):
+        """把面板数组复制到共享内存，返回 {字段: (名称, 形状, 类型)}"""
+        descriptor = {}
+        for field in NavPanel.ARRAY_FIELDS:
+            values = np.asarray(getattr(self.panel, field))
+            if values.nbytes == 0:
+                # 大小为 0 的共享内存无法创建
+                descriptor[field] = (None, values.shape, values.dtype.str)
+                continue
+            shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+            self._blocks.append(shm)
+            np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[...] = values
+            descriptor[field] = (shm.name, values.shape, values.dtype.str)
+        return descriptor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def _submit_blocks(self, job, args):
+        n_funds = len(self.panel)
+        futures = []
+        for start in range(0, n_funds, self.block_funds):
+            stop = min(start + self.block_funds, n_funds)
+            if self.shared:
+                futures.append(self._executor.submit(_shared_task, start, stop, job, args))
+            else:
+                block = self.panel.column_block(start, stop)
+                arrays = {field: np.ascontiguousarray(getattr(block, field)) for field in NavPanel.ARRAY_FIELDS}
+                futures.append(self._executor.submit(_pickled_task, block.fund_ids, arrays, job, args))
+        return [future.result() for future in futures]
+
+    def fixed_freq_metrics(self):
+        """与 NavPanel.fixed_freq_metrics 相同的结果，各块并行计算"""
+        template = self.panel.column_block(0, 0).fixed_freq_metrics()
+        parts = self._submit_blocks('fixed_freq', None)
+        values = np.concatenate(parts) if parts else np.empty((0, len(template.columns)))
+        return pd.DataFrame(values, index=self.panel.fund_ids, columns=template.columns)
+
+    def custom_range_sweep(self, windows):
+        """一组 (起始日期, 结束日期) 区间上全部基金的年化收益和最大回撤
+
+        返回 (年化收益, 最大回撤) 两个 DataFrame，行为区间序号，列为基金 ID。
+        """
+        windows = [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in windows]
+        parts = self._submit_blocks('custom_range', windows)
+        values = np.concatenate(parts, axis=2) if parts else np.empty((len(windows), 2, 0))
+        return (pd.DataFrame(values[:, 0], columns=self.panel.fund_ids),
+                pd.DataFrame(values[:, 1], columns=self.panel.fund_ids))
@@ -0,0 +1,211 @@
+# streaming.py
+import numpy as np
+from core import FIXED_PERIODS, calculate_annual_return
+from drawdown_index import DrawdownIndex
+from nav_series import to_day_number, from_day_number
+
+class _DrawdownQueue:
+    """按时间顺序入队、从最早一端出队的区间摘要队列（双栈实现）
+
+    push/pop 均摊 O(1)，整体 (最高, 最低, 最大回撤) 查询 O(1)。
+    入栈 _in 按时间顺序保存数据点及其累计摘要；出栈 _out 栈顶为最早的点，
+    每个元素保存从它到出栈底部（更晚的点）的摘要。
+    """
+    __slots__ = ('_in', '_in_summary', '_out')
+
+    def __init__(self):
+        self._in = []
+        self._in_summary = None
+        self._out = []
+
+    def __len__(self):
+        return len(self._in) + len(self._out)
+
+    def push(self, day, nav):
+        self._in.append((day, nav))
+        self._in_summary = DrawdownIndex.combine(self._in_summary, (nav, nav, 0.0))
+
+    def pop(self):
+        if not self._out:
+            summary = None
+            while self._in:
+                day, nav = self._in.pop()
+                summary = DrawdownIndex.combine((nav, nav, 0.0), summary)
+                self._out.append((day, nav, summary))
+            self._in_summary = None
+        day, nav, _ = self._out.pop()
+        return day, nav
+
+    def peek(self, i):
+        """返回第 i 个（0 为最早）数据点 (日序号, 净值)，i 只取 0 或 1"""
+        if i < len(self._out):
+            day, nav, _ = self._out[-1 - i]
+            return day, nav
+        return self._in[i - len(self._out)]
+
+    def summary(self):
+        out_summary = self._out[-1][2] if self._out else None
+        return DrawdownIndex.combine(out_summary, self._in_summary)
+
+class StreamingMetrics:
+    """逐点更新的业绩累加器，每个数据点 O(1) 更新运行高点、当前回撤、最大回撤和成立以来收益
+
+    每个固定周期维护一个区间摘要队列，只保存该周期起点之后的数据点，起点选取规则
+    （距离目标日期最近，距离相同取较晚的一天）与 AnalysisSession 一致。
+    同一天的多次更新（如盘中估值）只替换当天的值：最新一天的数据点暂不入队，
+    日期前进时才提交，因此替换同样是 O(1)。
+    """
+
+    def __init__(self, periods=None):
+        self.periods = dict(periods if periods is not None else FIXED_PERIODS)
+        self._queues = {name: _DrawdownQueue() for name in self.periods}
+        self.count = 0
+        self._first = None
+        # 已提交（早于最新一天）数据点的运行高点和最大回撤
+        self._committed_peak = -np.inf
+        self._committed_max_dd = 0.0
+        # 最新一天的数据点
+        self._last = None
+
+    @classmethod
+    def from_series(cls, series, periods=None):
+        """用历史序列初始化：运行指标向量化计算，只有各周期起点之后的数据点进入队列"""
+        metrics = cls(periods)
+        n = len(series)
+        if n == 0:
+            return metrics
+        days, navs = series.days, series.navs
+
+        metrics.count = n
+        metrics._first = (int(days[0]), float(navs[0]))
+        metrics._last = (int(days[-1]), float(navs[-1]))
+        if n > 1:
+            cummax = np.maximum.accumulate(navs[:-1])
+            metrics._committed_peak = float(cummax[-1])
+            metrics._committed_max_dd = float(((cummax - navs[:-1]) / cummax).max())
+
+        for name, period in metrics.periods.items():
+            target = days[-1] - period
+            start = int(np.searchsorted(days, target))
+            if start > 0 and days[start] - target > target - days[start - 1]:
+                start -= 1
+            queue = metrics._queues[name]
+            for day, nav in zip(days[start:n - 1].tolist(), navs[start:n - 1].tolist()):
+                queue.push(day, nav)
+        return metrics
+
+    def update(self, date, nav):
+        """加入一个数据点；与最新数据点同一天时替换其净值"""
+        day = int(to_day_number(date))
+        nav = float(nav)
+        if not nav > 0:
+            raise ValueError(f"单位净值无效: {nav}")
+
+        if self._last is None:
+            self._first = (day, nav)
+            self._last = (day, nav)
+            self.count = 1
+            return
+        last_day, last_nav = self._last
+        if day < last_day:
+            raise ValueError(f"数据日期 {from_day_number(day).date()} 早于已有数据")
+        if day == last_day:
+            self._last = (day, nav)
+            if self.count == 1:
+                self._first = (day, nav)
+            return
+
+        # 日期前进：提交上一天的数据点
+        self._committed_peak = max(self._committed_peak, last_nav)
+        self._committed_max_dd = max(self._committed_max_dd, 1 - last_nav / self._committed_peak)
+        for name, queue in self._queues.items():
+            queue.push(last_day, last_nav)
+        self._last = (day, nav)
+        self.count += 1
+
+        for name, period in self.periods.items():
+            self._evict(self._queues[name], day - period, day)
+
+    def update_many(self, dates, navs):
+        """按时间顺序批量加入数据点"""
+        for date, nav in zip(dates, navs):
+            self.update(date, nav)
+
+    @staticmethod
+    def _evict(queue, target, last_day):
+        """移除不可能再成为周期起点的最早数据点（目标日期只会前进）"""
+        while len(queue):
+            first_day = queue.peek(0)[0]
+            second_day = queue.peek(1)[0] if len(queue) > 1 else last_day
+            if second_day - target <= target - first_day:
+                queue.pop()
+            else:
+                break
+
+    # ---- 运行指标 ----
+
+    @property
+    def last_date(self):
+        return from_day_number(self._last[0]) if self._last else None
+
+    @property
+    def nav(self):
+        return self._last[1] if self._last else None
+
+    @property
+    def peak(self):
+        return max(self._committed_peak, self._last[1]) if self._last else None
+
+    @property
+    def drawdown(self):
+        """当前回撤"""
+        return 1 - self._last[1] / self.peak if self._last else None
+
+    @property
+    def max_drawdown(self):
+        return max(self._committed_max_dd, self.drawdown) if self._last else None
+
+    @property
+    def total_return(self):
+        """成立以来累计收益"""
+        return self._last[1] / self._first[1] - 1 if self._last else None
+
+    @property
+    def annual_return(self):
+        """成立以来年化收益；数据不足一天时为 None"""
+        if self._last is None or self._last[0] <= self._first[0]:
+            return None
+        return calculate_annual_return(self._first[1], self._last[1], self._last[0] - self._first[0])
+
+    def window(self, name):
+        """某个固定周期的指标：起始日期、实际天数、年化收益、最大回撤；数据点不足两个时返回 None"""
+        queue = self._queues[name]
+        if self._last is None or len(queue) == 0:
+            return None
+        last_day, last_nav = self._last
+        start_day, start_nav = queue.peek(0)
+        days_actual = last_day - start_day
+        summary = DrawdownIndex.combine(queue.summary(), (last_nav, last_nav, 0.0))
+        return {
+            'start_date': from_day_number(start_day),
+            'days': days_actual,
+            'annual_return': calculate_annual_return(start_nav, last_nav, days_actual),
+            'max_drawdown': float(summary[2])
+        }
+
+    def fixed_freq_results(self):
+        """与 AnalysisSession.calculate_fixed_freq 格式相同的结果列表"""
+        results = []
+        for name, period in self.periods.items():
+            metrics = self.window(name)
+            if metrics is None or metrics['days'] < period * 0.9:
+                results.append((name, '/', '/', '/'))
+            else:
+                results.append((name, metrics['days'], f"{metrics['annual_return']:.2%}", f"-{metrics['max_drawdown']:.2%}"))
+
+        if self.annual_return is not None and self.count > 1:
+            total_days = self._last[0] - self._first[0]
+            results.append(("成立以来", total_days, f"{self.annual_return:.2%}", f"-{self.max_drawdown:.2%}"))
+        else:
+            results.append(("成立以来", '/', '/', '/'))
+        return results
@@ -0,0 +1,72 @@
+# conftest.py
+import os
+import sys
+from types import SimpleNamespace
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_nav_frame(n=3000, seed=0, start='2005-01-03'):
+    """随机生成 n 个交易日的净值数据"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=n)
+    navs = np.cumprod(1 + rng.normal(0.0003, 0.01, n))
+    return pd.DataFrame({'日期': dates, '单位净值': navs})
+
+class FakeRoot:
+    """只实现 after/after_cancel 的 Tk 根窗口替身，run() 执行所有待处理的回调"""
+
+    def __init__(self):
+        self.pending = {}
+        self.counter = 0
+
+    def after(self, ms, func):
+        self.counter += 1
+        self.pending[self.counter] = func
+        return self.counter
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run(self):
+        pending, self.pending = self.pending, {}
+        for func in pending.values():
+            func()
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch):
+    """配置文件写到临时目录，不读写用户的真实配置"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+
+@pytest.fixture
+def chart_app(tmp_path):
+    """带真实 Agg 画布和图表工具的最小应用对象，已导入一份净值数据"""
+    import core
+    from config import Config
+    from chart_utils import ChartUtils
+    from analysis_operations import AnalysisOperations
+    from result_cache import ResultCache
+
+    figure, ax = plt.subplots(figsize=(6.5, 3.5), dpi=100)
+    app = SimpleNamespace(config=Config(), figure=figure, ax=ax, canvas=figure.canvas, root=FakeRoot(),
+                          is_activated=True, log=lambda message, message_type="info": None,
+                          result_cache=ResultCache(), current_plot_data=None,
+                          current_start_date=None, current_end_date=None)
+    app.config.settings["export_directory"] = str(tmp_path)
+    app.chart_utils = ChartUtils(app)
+    app.analysis_operations = AnalysisOperations(app)
+    app.canvas.mpl_connect('draw_event', app.chart_utils.on_draw)
+
+    analyzer = core.PerformanceAnalysis(make_nav_frame(), app.log)
+    app.nav_series = analyzer.get_series()
+    app.session = analyzer.get_session(app.result_cache)
+    app.chart_utils.initialize_chart()
+    yield app
+    plt.close(figure)
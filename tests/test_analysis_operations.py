@@ -0,0 +1,8 @@
+# test_analysis_operations.py
+
+def test_watch_settings_require_activation(chart_app):
+    shown = []
+    chart_app.is_activated = False
+    chart_app.analysis_operations.show_custom_message = lambda title, message: shown.append(message)
+    chart_app.analysis_operations.set_watch_settings()
+    assert shown == ["软件未激活，无法使用此功能"]
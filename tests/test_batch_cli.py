@@ -0,0 +1,40 @@
+# test_batch_cli.py
+import json
+
+import numpy as np
+import pandas as pd
+
+import batch_cli
+from conftest import make_nav_frame
+
+def test_results_are_numeric(tmp_path):
+    path = tmp_path / "fund.csv"
+    make_nav_frame(150).to_csv(path, index=False)
+    output = tmp_path / "results.csv"
+
+    code = batch_cli.main([str(path), "-o", str(output), "--workers", "1",
+                           "--start", "2005-02-01", "--end", "2005-05-01"])
+    assert code == 0
+
+    results = pd.read_csv(output)
+    for column in ("days", "annual_return", "max_drawdown"):
+        assert pd.api.types.is_numeric_dtype(results[column])
+    assert (results["max_drawdown"].dropna() >= 0).all()
+    # 数据不足的周期（近6月、近1年）为空值
+    assert results["annual_return"].isna().any()
+    assert results["annual_return"].notna().sum() >= 2
+
+def test_missing_input_is_reported_as_failure(tmp_path):
+    path = tmp_path / "fund.csv"
+    make_nav_frame(300).to_csv(path, index=False)
+    output = tmp_path / "results.json"
+    missing = str(tmp_path / "typo.csv")
+
+    code = batch_cli.main([str(path), missing, "-o", str(output), "--workers", "1"])
+    assert code != 0
+
+    failures = json.loads((tmp_path / "results.failures.json").read_text(encoding="utf-8"))
+    assert [failure["file"] for failure in failures] == [missing]
+    rows = json.loads(output.read_text(encoding="utf-8"))
+    assert {row["file"] for row in rows} == {"fund.csv"}
+    assert all(isinstance(row["annual_return"], (float, type(None))) for row in rows)
@@ -0,0 +1,58 @@
+# test_chart_utils.py
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+def _background_size(chart_utils):
+    x0, y0, x1, y1 = chart_utils._background.get_extents()
+    return x1 - x0, y1 - y0
+
+def test_export_does_not_replace_hover_background(chart_app):
+    chart_utils = chart_app.chart_utils
+    chart_app.analysis_operations.analyze_performance()
+    chart_app.canvas.draw()
+    screen_size = chart_app.canvas.get_width_height()
+    assert _background_size(chart_utils) == screen_size
+
+    chart_app.analysis_operations.export_chart()
+    assert len(os.listdir(chart_app.config.get("export_directory"))) == 1
+    assert _background_size(chart_utils) == screen_size
+
+    x = chart_utils.plot_x[100]
+    chart_utils.on_hover(SimpleNamespace(inaxes=chart_app.ax, xdata=x))
+    chart_app.root.run()
+    assert chart_utils.hover_line_x.get_visible()
+    assert chart_utils._hover_index == 100
+    assert _background_size(chart_utils) == screen_size
+
+def test_returning_to_full_view_reuses_plot_x_and_decimation(chart_app, monkeypatch):
+    import chart_utils as chart_utils_module
+    chart_utils = chart_app.chart_utils
+    session = chart_app.session
+    chart_app.analysis_operations.analyze_performance()
+    chart_app.analysis_operations.analyze_performance()  # 首次绘图会调整布局，坐标轴宽度随之变化
+    first_indices = chart_utils.lod_indices
+    assert first_indices is not None
+    full_line = chart_utils.nav_line.get_xdata()
+
+    calls = []
+    real_dates = chart_utils_module.mdates
+    # 只统计 chart_utils 自身的日期转换，matplotlib 内部计算刻度的调用不受影响
+    monkeypatch.setattr(chart_utils_module, "mdates", SimpleNamespace(
+        **{**vars(real_dates), "date2num": lambda d: calls.append("date2num") or real_dates.date2num(d)}))
+    real_lod = session.lod
+    monkeypatch.setattr(session, "lod", lambda: calls.append("lod") or real_lod())
+
+    start, end = session.series.date_at(100), session.series.date_at(400)
+    chart_app.analysis_operations.analyze_performance(start, end)
+    assert chart_utils.lod_indices is None and len(chart_utils.plot_x) == 301
+    chart_app.analysis_operations.analyze_performance()
+    assert calls == []
+    assert chart_utils.lod_indices is first_indices
+    np.testing.assert_array_equal(chart_utils.nav_line.get_xdata(), full_line)
+
+    with chart_utils.full_resolution():
+        assert len(chart_utils.nav_line.get_xdata()) == len(session)
+    np.testing.assert_array_equal(chart_utils.nav_line.get_xdata(), full_line)
+    assert calls == []
@@ -0,0 +1,105 @@
+# test_import_pipeline.py
+import os
+
+import numpy as np
+
+import parse_cache
+import utils
+from conftest import make_nav_frame
+from import_pipeline import load_nav_file, refresh_nav_file
+from parse_cache import ParseCache
+
+def quiet(message, message_type="info"):
+    pass
+
+def _append_rows(path, frame, encoding):
+    with open(path, "a", encoding=encoding, newline="") as f:
+        frame.to_csv(f, header=False, index=False, lineterminator="\n")
+
+def test_append_refresh_reads_only_the_tail(tmp_path, monkeypatch):
+    frame = make_nav_frame(400)
+    path = tmp_path / "fund.csv"
+    frame.iloc[:300].to_csv(path, index=False, lineterminator="\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    _, session, state = load_nav_file(str(path), quiet, parse_cache=cache)
+    main_file = os.path.join(cache.cache_dir, next(iter(cache._load_index().values()))["file"])
+    main_mtime = os.stat(main_file).st_mtime_ns
+
+    # 快速路径不应计算整个文件的哈希
+    def no_full_hash(path):
+        raise AssertionError("增量刷新不应计算整个文件的哈希")
+    monkeypatch.setattr(parse_cache, "file_content_hash", no_full_hash)
+
+    for start, stop in ((300, 350), (350, 400)):
+        _append_rows(path, frame.iloc[start:stop], "utf-8")
+        tail, state = refresh_nav_file(state, quiet, cache)
+        assert len(tail) == stop - start
+        session.extend(tail)
+
+    # 文件未变化时直接返回空尾部
+    tail, same_state = refresh_nav_file(state, quiet, cache)
+    assert len(tail) == 0 and same_state is state
+
+    assert os.stat(main_file).st_mtime_ns == main_mtime
+    cached, _, _ = cache.lookup(str(path), quiet)
+    np.testing.assert_array_equal(cached.days, session.days)
+    np.testing.assert_array_equal(cached.navs, session.navs)
+    assert len(cached) == 400
+
+def test_state_records_encoding_actually_used(tmp_path, monkeypatch):
+    frame = make_nav_frame(200).rename(columns={'日期': '净值日期'})
+    path = tmp_path / "fund.csv"
+    frame.iloc[:150].to_csv(path, index=False, encoding="gbk", lineterminator="\n")
+    # 探测结果错误时 read_csv_file 会改用后备编码，增量状态应记录实际成功的编码
+    monkeypatch.setattr(utils, "detect_encoding", lambda file_path, *args: "utf-8")
+
+    _, session, state = load_nav_file(str(path), quiet)
+    assert state.encoding == "gbk"
+
+    _append_rows(path, frame.iloc[150:], "gbk")
+    tail, state = refresh_nav_file(state, quiet)
+    assert len(tail) == 50
+    assert tail.days[0] > session.days[-1]
+
+def _write_text(path, text, mtime_ns):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_in_place_edit_is_not_served_from_stale_cache(tmp_path):
+    path = tmp_path / "fund.csv"
+    header = "日期,单位净值\n"
+    _write_text(path, header + "2020-01-02,1.0000\n2020-01-03,1.1000\n2020-01-06,1.2000\n", 10**18)
+    cache = ParseCache(str(tmp_path / "cache"))
+    _, _, state = load_nav_file(str(path), quiet, parse_cache=cache)
+
+    # 同样长度的修改，只有修改时间不同
+    _write_text(path, header + "2020-01-02,1.0000\n2020-01-03,1.5000\n2020-01-06,1.2000\n", 10**18 + 10**9)
+    assert refresh_nav_file(state, quiet) is None
+    series, _, _ = load_nav_file(str(path), quiet, parse_cache=cache)
+    assert series.navs.tolist() == [1.0, 1.5, 1.2]
+
+def test_older_edit_with_append_forces_full_import(tmp_path):
+    path = tmp_path / "fund.csv"
+    header = "日期,单位净值\n"
+    _write_text(path, header + "2020-01-02,1.0000\n2020-01-03,1.1000\n", 10**18)
+    _, _, state = load_nav_file(str(path), quiet)
+
+    _write_text(path, header + "2020-01-02,0.9000\n2020-01-03,1.1000\n2020-01-06,1.2000\n", 10**18 + 10**9)
+    assert refresh_nav_file(state, quiet) is None
+
+def test_completed_partial_last_line_with_new_value(tmp_path):
+    path = tmp_path / "fund.csv"
+    header = "日期,单位净值\n"
+    _write_text(path, header + "2020-01-02,1.0000\n2020-01-03,1.1", 10**18)
+    _, session, state = load_nav_file(str(path), quiet)
+    assert session.navs[-1] == 1.1
+
+    # 末行写完后与已导入的值相同：只追加新行
+    _write_text(path, header + "2020-01-02,1.0000\n2020-01-03,1.1\n2020-01-06,1.2\n", 10**18 + 10**9)
+    tail, _ = refresh_nav_file(state, quiet)
+    assert tail.navs.tolist() == [1.2]
+
+    # 末行写完后值发生变化：改为完整导入
+    _write_text(path, header + "2020-01-02,1.0000\n2020-01-03,1.15\n", 10**18 + 2 * 10**9)
+    assert refresh_nav_file(state, quiet) is None
@@ -0,0 +1,50 @@
+# test_nav_store.py
+import numpy as np
+
+import batch_cli
+from conftest import make_nav_frame
+from core import PerformanceAnalysis
+from import_pipeline import parse_nav_file
+from nav_store import NavStore
+from panel import NavPanel
+
+def _write_funds(directory, count=3):
+    paths = []
+    for i in range(count):
+        path = directory / f"fund{i}.csv"
+        make_nav_frame(500 + 100 * i, seed=i).to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def test_batch_cli_fills_store_for_later_analysis(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    paths = _write_funds(data_dir)
+    store_dir = tmp_path / "store"
+
+    code = batch_cli.main([str(data_dir), "-o", str(tmp_path / "results.csv"),
+                           "--workers", "1", "--store", str(store_dir)])
+    assert code == 0
+
+    store = NavStore(str(store_dir))
+    assert sorted(store.fund_ids()) == ["fund0", "fund1", "fund2"]
+    for i, path in enumerate(paths):
+        parsed, _ = parse_nav_file(str(path), lambda *a: None)
+        stored = store.open(f"fund{i}")
+        assert isinstance(stored.navs, np.memmap)
+        np.testing.assert_array_equal(stored.days, parsed.days)
+        np.testing.assert_array_equal(stored.navs, parsed.navs)
+        assert (PerformanceAnalysis.from_store(store, f"fund{i}").calculate_fixed_freq()
+                == PerformanceAnalysis.from_series(parsed).calculate_fixed_freq())
+
+    panel = NavPanel.from_store(store)
+    assert len(panel) == 3
+
+def test_add_entries_merges_with_index_written_elsewhere(tmp_path):
+    first = NavStore(str(tmp_path))
+    second = NavStore(str(tmp_path))
+    series_a, _ = parse_nav_file(str(_write_funds(tmp_path, 1)[0]), lambda *a: None)
+    first.fund_ids()  # 先读入（空）索引
+    second.put("a", series_a)
+    first.add_entries({"b": first.write_series("b", series_a)})
+    assert sorted(NavStore(str(tmp_path)).fund_ids()) == ["a", "b"]
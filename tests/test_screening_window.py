@@ -0,0 +1,35 @@
+# test_screening_window.py
+from types import SimpleNamespace
+
+import screening_window
+from conftest import make_nav_frame
+from config import Config
+from screening_window import ScreeningWindow
+
+def _drain(window):
+    messages = []
+    while not window._load_queue.empty():
+        messages.append(window._load_queue.get_nowait())
+    return messages
+
+def test_unexpected_parse_error_skips_file_and_finishes(tmp_path, monkeypatch):
+    paths = []
+    for i in range(2):
+        path = tmp_path / f"fund{i}.csv"
+        make_nav_frame(300, seed=i).to_csv(path, index=False)
+        paths.append(str(path))
+    real_parse = screening_window.parse_nav_file
+
+    def flaky_parse(path, log_callback):
+        if path.endswith("fund1.csv"):
+            raise KeyError("单位净值")
+        return real_parse(path, log_callback)
+
+    monkeypatch.setattr(screening_window, "parse_nav_file", flaky_parse)
+    window = ScreeningWindow(SimpleNamespace(config=Config()))
+    window._load_files_worker(paths)
+
+    kind, screener, failures = _drain(window)[-1]
+    assert kind == "done"
+    assert len(failures) == 1 and failures[0].startswith("fund1.csv")
+    assert screener.fund_ids == ["fund0"]
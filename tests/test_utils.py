@@ -0,0 +1,54 @@
+# test_utils.py
+import pandas as pd
+import pytest
+
+from utils import detect_encoding, parse_dates
+
+class LogRecorder:
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, message, message_type="info"):
+        self.messages.append((message_type, message))
+
+    def warnings(self):
+        return [message for message_type, message in self.messages if message_type == "warning"]
+
+@pytest.mark.parametrize("values", [
+    [44197.5, 44198.25, 0.0],           # 带小数的序列日期和 0
+    [1609459200.5, 1609545600.25],      # 秒级 Unix 时间戳
+])
+def test_parse_dates_non_integer_numbers_become_nat(values):
+    log = LogRecorder()
+    parsed = parse_dates(pd.Series(values), log)
+    assert parsed.isna().all()
+    assert len(log.warnings()) == 1
+
+def test_parse_dates_numeric_yyyymmdd_with_missing_values():
+    log = LogRecorder()
+    parsed = parse_dates(pd.Series([20200101.0, None, 20200103.0]), log)
+    assert parsed.tolist()[0] == pd.Timestamp('2020-01-01')
+    assert pd.isna(parsed.tolist()[1])
+    assert parsed.tolist()[2] == pd.Timestamp('2020-01-03')
+
+def test_parse_dates_datetime_column_logs_invalid_rows():
+    log = LogRecorder()
+    parsed = parse_dates(pd.Series(pd.to_datetime(['2020-01-01', None, '2020-01-03'])), log)
+    assert parsed.isna().sum() == 1
+    assert len(log.warnings()) == 1
+
+def _fake_chardet(monkeypatch, encoding, confidence):
+    import chardet
+    monkeypatch.setattr(chardet, "detect", lambda sample: {'encoding': encoding, 'confidence': confidence})
+
+def test_detect_encoding_prefers_gb18030_over_low_confidence_guess(tmp_path, monkeypatch):
+    path = tmp_path / "fund.csv"
+    path.write_bytes("净值日期,单位净值\n2020-01-02,1.0000\n".encode("gbk"))
+    _fake_chardet(monkeypatch, "Big5", 0.4)
+    assert detect_encoding(str(path)) == "gb18030"
+
+def test_detect_encoding_keeps_confident_guess(tmp_path, monkeypatch):
+    path = tmp_path / "fund.csv"
+    path.write_bytes("淨值日期,單位淨值\n2020-01-02,1.0000\n".encode("big5"))
+    _fake_chardet(monkeypatch, "Big5", 0.99)
+    assert detect_encoding(str(path)) == "big5"
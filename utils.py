@@ -11,6 +11,7 @@ import re
 from dateutil.parser import parse as dateutil_parse
 import warnings
 import chardet
+import zipfile
 
 # 全局变量跟踪打开的窗口数
 OPEN_WINDOWS = 0
@@ -95,35 +96,176 @@ def normalize_date_string(date_str, log_callback):
         log_callback(f"日期规范化过程中发生未知错误: {e}", "error")
         raise ValueError(f"日期规范化失败: {date_str}")
 
+# 候选日期格式：均为年份在前、不存在日/月歧义的格式，按常见程度排列
+DATE_FORMAT_CANDIDATES = [
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%Y%m%d',
+    '%Y.%m.%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y年%m月%d日',
+]
+
+# Excel 序列日期的有效范围（1900-01-01 至 9999-12-31）及起点
+EXCEL_SERIAL_MIN = 1
+EXCEL_SERIAL_MAX = 2958465
+EXCEL_EPOCH = '1899-12-30'
+
+def _sample_values(values, sample_size):
+    """在整列中等间距抽样，避免只看到文件开头的格式"""
+    if len(values) <= sample_size:
+        return values
+    positions = np.linspace(0, len(values) - 1, sample_size).astype(np.int64)
+    return values.iloc[positions]
+
+def _is_excel_serial(numbers):
+    """判断一组数值是否都落在 Excel 序列日期的范围内"""
+    return len(numbers) > 0 and bool(((numbers >= EXCEL_SERIAL_MIN) & (numbers <= EXCEL_SERIAL_MAX)).all())
+
+def _is_yyyymmdd(numbers):
+    """判断一组数值是否都是 YYYYMMDD 形式的整数"""
+    return (len(numbers) > 0 and bool((numbers == np.floor(numbers)).all())
+            and bool(((numbers >= 19000101) & (numbers <= 29991231)).all()))
+
+def detect_date_format(date_series, sample_size=1000):
+    """抽样检测日期列的主导格式
+
+    返回 'datetime'（已是日期类型）、'excel_serial'（Excel 序列日期）、
+    DATE_FORMAT_CANDIDATES 中的某个格式字符串，或 None（无法识别，需逐个解析）。
+    """
+    if pd.api.types.is_datetime64_any_dtype(date_series):
+        return 'datetime'
+
+    non_null = date_series.dropna()
+    if len(non_null) == 0:
+        return None
+
+    if pd.api.types.is_numeric_dtype(date_series):
+        numbers = non_null.to_numpy(dtype=np.float64)
+        if _is_yyyymmdd(numbers):
+            return '%Y%m%d'
+        if _is_excel_serial(numbers):
+            return 'excel_serial'
+        return None
+
+    sample = _sample_values(non_null, sample_size)
+    if pd.api.types.infer_dtype(sample, skipna=True) in ('datetime', 'datetime64', 'date'):
+        return 'datetime'
+
+    sample = sample.astype(str).str.strip()
+    best_format, best_count = None, 0
+    for fmt in DATE_FORMAT_CANDIDATES:
+        count = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        if count > best_count:
+            best_format, best_count = fmt, count
+            if count == len(sample):
+                break
+
+    # 纯数字文本（如 '44197' 或 '44197.0'）可能是导出为文本的 Excel 序列日期
+    numbers = pd.to_numeric(sample, errors='coerce')
+    serial_count = int(numbers.between(EXCEL_SERIAL_MIN, EXCEL_SERIAL_MAX).sum())
+    if serial_count > best_count:
+        return 'excel_serial'
+
+    return best_format
+
 def parse_dates(date_series, log_callback):
-    """对DataFrame的日期列进行批量解析，同时记录无法解析的日期"""
-    parsed_dates = pd.to_datetime(date_series, errors='coerce', format='mixed')
-    
+    """对DataFrame的日期列进行批量解析，同时记录无法解析的日期
+
+    先抽样识别主导格式并按该格式一次性向量化解析，只有剩余无法解析的行才回退到
+    逐个识别的 mixed 模式。
+    """
+    date_format = detect_date_format(date_series)
+
+    if date_format == 'datetime':
+        parsed_dates = pd.to_datetime(date_series, errors='coerce')
+        if getattr(parsed_dates.dt, 'tz', None) is not None:
+            parsed_dates = parsed_dates.dt.tz_localize(None)
+        _log_invalid_dates(date_series, parsed_dates, log_callback)
+        return parsed_dates
+
+    if date_format == 'excel_serial':
+        numbers = pd.to_numeric(date_series, errors='coerce')
+        numbers = numbers.where(numbers.between(EXCEL_SERIAL_MIN, EXCEL_SERIAL_MAX))
+        log_callback("检测到日期列为 Excel 序列日期", "info")
+        parsed_dates = pd.to_datetime(numbers, unit='D', origin=EXCEL_EPOCH, errors='coerce')
+        text_series = date_series.astype(str)
+    else:
+        numeric_values = date_series.dropna() if pd.api.types.is_numeric_dtype(date_series) else None
+        if numeric_values is not None and (numeric_values % 1 == 0).all():
+            # 数值型的 YYYYMMDD 先转为整数文本，避免出现 '20200101.0'
+            text_series = date_series.astype('Int64').astype(str)
+        else:
+            # 不预先去除空白：带空白的少数行会在下面的 mixed 回退中处理
+            text_series = date_series.astype(str)
+
+        if date_format is not None:
+            log_callback(f"检测到日期格式: {date_format}", "info")
+            parsed_dates = pd.to_datetime(text_series, format=date_format, errors='coerce')
+        else:
+            parsed_dates = pd.Series(pd.NaT, index=date_series.index, dtype='datetime64[ns]')
+
+    # 只对未能按主导格式解析的非空行回退到 mixed 模式
+    leftover_mask = parsed_dates.isna() & date_series.notna()
+    if leftover_mask.any():
+        leftover = pd.to_datetime(text_series[leftover_mask], errors='coerce', format='mixed')
+        parsed_dates = parsed_dates.astype('datetime64[ns]')
+        parsed_dates[leftover_mask] = leftover.astype('datetime64[ns]')
+
+    _log_invalid_dates(date_series, parsed_dates, log_callback)
+    return parsed_dates
+
+def _log_invalid_dates(date_series, parsed_dates, log_callback):
+    """汇总记录无法解析的日期"""
     invalid_mask = parsed_dates.isna()
     if invalid_mask.any():
-        invalid_dates = date_series[invalid_mask]
-        unique_invalid = invalid_dates.unique()
-        for date_str in unique_invalid:
-            log_callback(f"警告: 日期格式 '{date_str}' 无效，已跳过。", "warning")
+        unique_invalid = date_series[invalid_mask].astype(str).unique()
+        examples = ", ".join(f"'{v}'" for v in unique_invalid[:3])
+        log_callback(f"警告: 共 {int(invalid_mask.sum())} 行日期格式无效（{len(unique_invalid)} 种，例如 {examples}），已跳过。", "warning")
 
-    return parsed_dates
+# 文件头魔数
+ZIP_MAGIC = b'PK\x03\x04'
+OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm', '.xls', '.ods')
+
+def detect_excel_format(file_path):
+    """根据文件头魔数判断表格格式，返回 'xlsx'、'ods'、'xls' 或 None"""
+    with open(file_path, 'rb') as f:
+        header = f.read(8)
+
+    if header.startswith(OLE2_MAGIC):
+        return 'xls'
+    if header.startswith(ZIP_MAGIC):
+        # ZIP 容器：ODS 以未压缩的 mimetype 文件开头，XLSX 包含 xl/workbook.xml
+        try:
+            with zipfile.ZipFile(file_path) as zf:
+                names = set(zf.namelist())
+                if 'mimetype' in names and zf.read('mimetype').startswith(b'application/vnd.oasis.opendocument.spreadsheet'):
+                    return 'ods'
+                if 'xl/workbook.xml' in names or any(n.startswith('xl/') for n in names):
+                    return 'xlsx'
+        except zipfile.BadZipFile:
+            return None
+    return None
 
 def detect_file_type(file_path, log_callback):
-    """通过文件扩展名和内容检测文件类型"""
+    """通过文件头魔数和扩展名检测文件类型"""
     file_path = str(file_path)
+    is_excel_ext = file_path.lower().endswith(EXCEL_EXTENSIONS)
     
-    # 优先检查文件内容是否为 Excel XLSX 格式
+    # 优先根据文件内容判断是否为 Excel/ODS 格式
     try:
-        with open(file_path, 'rb') as f:
-            header = f.read(2)
-            if header == b'PK':
-                log_callback("警告：文件扩展名为.csv，但内容为XLSX格式。", "warning")
-                return 'excel'
+        excel_format = detect_excel_format(file_path)
+        if excel_format is not None:
+            if not is_excel_ext:
+                log_callback(f"警告：文件扩展名与内容不符，内容为{excel_format.upper()}格式。", "warning")
+            return 'excel'
     except Exception as e:
         log_callback(f"文件内容类型检测失败: {e}", "warning")
         
-    # 如果文件内容不是 XLSX，则回退到按扩展名判断
-    if file_path.lower().endswith(('.xlsx', '.xls')):
+    # 如果文件内容不是表格格式，则回退到按扩展名判断
+    if is_excel_ext:
         return 'excel'
     if file_path.lower().endswith('.csv'):
         return 'csv'
@@ -131,14 +273,121 @@ def detect_file_type(file_path, log_callback):
     return 'unknown'
 
 
+# 日期列和单位净值列的识别关键字（与导入时的列名匹配规则一致）
+DATE_COLUMN_KEYWORDS = ['日期', '净值日期', 'date', '交易日期', '时间', 'time', '净值时间', '净值日期']
+NAV_COLUMN_KEYWORDS = ['单位净值', 'net', 'nav', '净值', '单位价值', '单位份额净值', '份额净值']
+
+def match_columns(columns, log_callback=None):
+    """按关键字在列名中查找日期列和单位净值列的位置
+
+    返回 (date_pos, nav_pos)，找不到时对应位置为 None。
+    """
+    date_pos = None
+    nav_pos = None
+    for pos, col in enumerate(columns):
+        col_str = str(col).lower().replace(" ", "").replace("_", "")
+        if date_pos is None:
+            for keyword in DATE_COLUMN_KEYWORDS:
+                if keyword.lower() in col_str:
+                    date_pos = pos
+                    if log_callback:
+                        log_callback(f"找到日期列: '{col}'", "info")
+                    break
+        # 同一列不能同时作为日期列和净值列（例如 '净值日期' 同时包含两类关键字）
+        if nav_pos is None and pos != date_pos:
+            for keyword in NAV_COLUMN_KEYWORDS:
+                if keyword.lower() in col_str:
+                    nav_pos = pos
+                    if log_callback:
+                        log_callback(f"找到单位净值列: '{col}'", "info")
+                    break
+        if date_pos is not None and nav_pos is not None:
+            break
+    return date_pos, nav_pos
+
+def resolve_columns(columns):
+    """确定需要读取的两列位置；未匹配到标准列名时使用前两列，列数不足时返回 None"""
+    date_pos, nav_pos = match_columns(columns)
+    if date_pos is None or nav_pos is None:
+        if len(columns) < 2:
+            return None
+        date_pos, nav_pos = 0, 1
+    return sorted({date_pos, nav_pos})
+
+# 编码探测所读取的样本大小
+ENCODING_SAMPLE_SIZE = 64 * 1024
+# 探测失败时依次尝试的编码
+FALLBACK_ENCODINGS = ['utf-8', 'gbk', 'gb18030', 'iso-8859-1']
+# chardet 置信度低于该值时先尝试 GB18030（短样本常被误判为 Big5 等编码）
+CHARDET_MIN_CONFIDENCE = 0.8
+
+def _sample_decodes(sample, encoding, sample_size):
+    """样本能否按 encoding 解码；样本读满时末尾截断的多字节字符不算失败"""
+    try:
+        sample.decode(encoding)
+        return True
+    except UnicodeDecodeError as e:
+        return e.start >= len(sample) - 3 and len(sample) == sample_size
+
+def detect_encoding(file_path, sample_size=ENCODING_SAMPLE_SIZE):
+    """读取文件开头的一小段样本判断编码"""
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+
+    if sample.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    if _sample_decodes(sample, 'utf-8', sample_size):
+        return 'utf-8'
+
+    result = chardet.detect(sample)
+    guess = (result.get('encoding') or '').lower()
+    if guess in ('gb2312', 'gbk', 'gb18030', 'hz-gb-2312'):
+        # GB18030 是 GB2312/GBK 的超集，避免样本外的生僻字解码失败
+        return 'gb18030'
+    if (result.get('confidence') or 0) < CHARDET_MIN_CONFIDENCE and _sample_decodes(sample, 'gb18030', sample_size):
+        return 'gb18030'
+    return guess or 'gb18030'
+
+def _csv_engines():
+    """可用的 CSV 解析引擎，优先使用 pyarrow"""
+    try:
+        import pyarrow  # noqa: F401
+        return ['pyarrow', 'c', 'python']
+    except ImportError:
+        return ['c', 'python']
+
 def read_csv_file(file_path, log_callback):
-    """读取CSV文件，自动检测编码"""
-    encodings = ['utf-8', 'gbk', 'gb18030', 'iso-8859-1']
+    """读取CSV文件：探测编码、先读表头确定所需两列，再只解析这两列
+
+    实际成功解码所用的编码记录在返回 DataFrame 的 attrs['encoding'] 中。
+    """
+    try:
+        encoding = detect_encoding(file_path)
+    except OSError as e:
+        log_callback(f"读取CSV文件失败: {str(e)}", "error")
+        return None
+
+    encodings = [encoding] + [enc for enc in FALLBACK_ENCODINGS if enc != encoding]
     for encoding in encodings:
         try:
-            df = pd.read_csv(file_path, encoding=encoding, engine='python')
-            log_callback(f"成功读取CSV文件: {len(df)}行 (使用编码: {encoding})", "success")
-            return df
+            header = pd.read_csv(file_path, encoding=encoding, nrows=0)
+            usecols = resolve_columns(header.columns)
+            if usecols is None:
+                # 列数不足时读取全部列，交由导入逻辑给出提示
+                usecols = list(range(len(header.columns)))
+
+            last_error = None
+            for engine in _csv_engines():
+                try:
+                    df = pd.read_csv(file_path, encoding=encoding, usecols=usecols, engine=engine)
+                    log_callback(f"成功读取CSV文件: {len(df)}行 (使用编码: {encoding}, 引擎: {engine})", "success")
+                    df.attrs['encoding'] = encoding
+                    return df
+                except UnicodeDecodeError:
+                    raise
+                except Exception as e:
+                    last_error = e
+            raise last_error
         except UnicodeDecodeError:
             log_callback(f"尝试使用编码 {encoding} 解码失败。", "warning")
         except Exception as e:
@@ -147,8 +396,98 @@ def read_csv_file(file_path, log_callback):
     log_callback("无法找到合适的编码来读取CSV文件。", "error")
     return None
 
+def _header_names(header):
+    """与 pandas 一致地处理空表头"""
+    return [h if h is not None and h != '' else f"Unnamed: {i}" for i, h in enumerate(header)]
+
+def _read_xlsx_columns(file_path):
+    """以只读流式模式读取 XLSX 第一个工作表：先读表头，再只取需要的两列"""
+    import openpyxl
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        header_rows = ws.iter_rows(min_row=1, max_row=1, values_only=True)
+        header = _header_names(next(header_rows, ()))
+        usecols = resolve_columns(header)
+        if usecols is None:
+            usecols = list(range(len(header)))
+        if not usecols:
+            return pd.DataFrame()
+
+        first, last = usecols[0] + 1, usecols[-1] + 1
+        offsets = [pos - usecols[0] for pos in usecols]
+        data = {header[pos]: [] for pos in usecols}
+        columns = list(data.values())
+        for row in ws.iter_rows(min_row=2, min_col=first, max_col=last, values_only=True):
+            values = [row[i] if i < len(row) else None for i in offsets]
+            if all(v is None for v in values):
+                continue
+            for column, value in zip(columns, values):
+                column.append(value)
+        return pd.DataFrame(data)
+    finally:
+        wb.close()
+
+def _read_xls_columns(file_path):
+    """按需加载 XLS 第一个工作表，只读取需要的两列"""
+    import xlrd
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        if sheet.nrows == 0:
+            return pd.DataFrame()
+        header = _header_names(sheet.row_values(0))
+        usecols = resolve_columns(header)
+        if usecols is None:
+            usecols = list(range(len(header)))
+
+        data = {}
+        for pos in usecols:
+            values = sheet.col_values(pos, start_rowx=1)
+            types = sheet.col_types(pos, start_rowx=1)
+            column = []
+            for value, ctype in zip(values, types):
+                if ctype == xlrd.XL_CELL_DATE:
+                    value = xlrd.xldate_as_datetime(value, book.datemode)
+                elif ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+                    value = None
+                column.append(value)
+            data[header[pos]] = column
+
+        df = pd.DataFrame(data)
+        return df.dropna(how='all').reset_index(drop=True)
+    finally:
+        book.release_resources()
+
+def _read_ods_columns(file_path):
+    """读取 ODS：先读表头确定所需两列，再按列裁剪读取"""
+    header = pd.read_excel(file_path, engine='odf', nrows=0).columns
+    usecols = resolve_columns(header)
+    return pd.read_excel(file_path, engine='odf', usecols=usecols)
+
 def read_excel_file(file_path, log_callback):
-    """读取Excel文件"""
+    """读取Excel文件：按文件头魔数选择引擎，先读表头再只读取日期列和单位净值列"""
+    readers = {
+        'xlsx': (_read_xlsx_columns, 'openpyxl只读模式'),
+        'xls': (_read_xls_columns, 'xlrd'),
+        'ods': (_read_ods_columns, 'odf'),
+    }
+    try:
+        excel_format = detect_excel_format(file_path)
+    except OSError as e:
+        log_callback(f"读取Excel文件失败: {str(e)}", "error")
+        return None
+
+    if excel_format in readers:
+        reader, engine_name = readers[excel_format]
+        try:
+            df = reader(file_path)
+            log_callback(f"成功读取Excel文件: {len(df)}行 (使用{engine_name}引擎)", "success")
+            return df
+        except Exception as e:
+            log_callback(f"按{excel_format.upper()}格式读取失败，尝试其他引擎: {str(e)}", "warning")
+
+    # 无法识别格式或专用读取失败时，依次尝试各引擎完整读取
     try:
         df = pd.read_excel(file_path, engine='openpyxl')
         log_callback(f"成功读取Excel文件: {len(df)}行", "success")
@@ -211,4 +550,62 @@ def clean_numeric_string(s):
     if not cleaned_s:
         return np.nan
         
-    return cleaned_s
\ No newline at end of file
+    return cleaned_s
+
+def clean_numeric_series(series):
+    """clean_numeric_string 的向量化版本，结果与逐行调用完全一致
+
+    已是数值类型的列直接返回；否则把所有单元格以 \\x00 拼接成一个缓冲区，转换为
+    Unicode 码点数组后用 NumPy 掩码一次性删除非数字字符和多余的小数点，再拆回各单元格。
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+
+    values = series.to_numpy(dtype=object)
+    result = np.empty(len(values), dtype=object)
+    if len(values) == 0:
+        return pd.Series(result, index=series.index, name=series.name)
+
+    if pd.api.types.infer_dtype(values, skipna=True) == 'string':
+        # 纯字符串列（缺失值清理后同样为 NaN，可统一按空串处理）
+        passthrough = np.zeros(len(values), dtype=bool)
+        texts = np.where(pd.isna(values), '', values)
+    else:
+        # 混合类型列：数值原样保留，其余转为字符串
+        passthrough = np.fromiter(
+            (isinstance(v, (int, float, np.int64, np.float64)) for v in values),
+            dtype=bool, count=len(values)
+        )
+        texts = np.array([v if isinstance(v, str) else str(v) for v in values], dtype=object)
+        texts[passthrough] = ''
+
+    buffer = '\x00'.join(texts.tolist())
+    codes = np.frombuffer(buffer.encode('utf-32-le'), dtype=np.uint32)
+    separators = codes == 0
+    if separators.sum() != len(values) - 1:
+        # 单元格本身含有分隔符，回退到逐行清理
+        return series.apply(clean_numeric_string)
+
+    # 保留数字、小数点和分隔符；非 ASCII 字符按正则 \d 的规则逐个判定（只需检查出现过的字符）
+    keep = ((codes >= 48) & (codes <= 57)) | (codes == 46) | separators
+    non_ascii = codes[codes > 127]
+    if len(non_ascii):
+        present = np.flatnonzero(np.bincount(non_ascii))
+        unicode_digits = [c for c in present if re.match(r'\d', chr(c))]
+        if unicode_digits:
+            keep |= np.isin(codes, unicode_digits)
+    codes = codes[keep]
+
+    # 每个单元格只保留第一个小数点
+    dots = np.flatnonzero(codes == 46)
+    if len(dots) > 1:
+        field_ids = np.cumsum(codes == 0)[dots]
+        extra_dots = dots[1:][field_ids[1:] == field_ids[:-1]]
+        if len(extra_dots):
+            codes = np.delete(codes, extra_dots)
+
+    cleaned = np.array(codes.tobytes().decode('utf-32-le').split('\x00'), dtype=object)
+    cleaned[cleaned == ''] = np.nan
+    result[:] = cleaned
+    result[passthrough] = values[passthrough]
+    return pd.Series(result, index=series.index, name=series.name)